@@ -1,19 +1,41 @@
 from django.contrib import admin
-from .models import Hat, Durak, HatDurak, TalepVerisi, DurakVaris
+from .models import Hat, Durak, HatDurak, TalepVerisi, DurakVaris, TalepKupu
+from .veri_damgasi import damgala
+
+
+class DamgaliAdmin(admin.ModelAdmin):
+    """Admin'deki kayıt / silme işlemleri ilgili veri damgalarını yeniler (önbellekler bütün süreçlerde yenilenir)."""
+    damgalar = ()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        damgala(*self.damgalar)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        damgala(*self.damgalar)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        damgala(*self.damgalar)
+
 
 @admin.register(Hat)
-class HatAdmin(admin.ModelAdmin):
+class HatAdmin(DamgaliAdmin):
+    damgalar = ('tarife', 'guzergah', 'durak', 'varis')  # Silme rota / durak / varış kayıtlarına yayılır
     list_display = ('ana_hat_no', 'alt_hat_no', 'ana_hat_adi', 'alt_hat_adi', 'durak_sayisi', 'uzunluk_km')
     search_fields = ('ana_hat_no', 'ana_hat_adi')
     list_filter = ('durak_sayisi',)
 
 @admin.register(Durak)
-class DurakAdmin(admin.ModelAdmin):
+class DurakAdmin(DamgaliAdmin):
+    damgalar = ('durak', 'varis')  # Silme DurakVaris'e de yayılır
     list_display = ('durak_no', 'durak_adi', 'enlem', 'boylam')
     search_fields = ('durak_no', 'durak_adi')
 
 @admin.register(HatDurak)
-class HatDurakAdmin(admin.ModelAdmin):
+class HatDurakAdmin(DamgaliAdmin):
+    damgalar = ('durak',)
     list_display = ('hat', 'durak', 'sira', 'istikamet')
     list_filter = ('hat',)
     search_fields = ('hat__ana_hat_adi', 'durak__durak_adi')
@@ -24,6 +46,12 @@ class TalepVerisiAdmin(admin.ModelAdmin):
     list_filter = ('tarih_saat', 'hat')
 
 @admin.register(DurakVaris)
-class DurakVarisAdmin(admin.ModelAdmin):
+class DurakVarisAdmin(DamgaliAdmin):
+    damgalar = ('varis',)
     list_display = ('hat', 'baslangic_durak', 'bitis_durak', 'cikis_zaman', 'varis_zaman', 'arac_no')
-    list_filter = ('hat', 'arac_no')
\ No newline at end of file
+    list_filter = ('hat', 'arac_no')
+@admin.register(TalepKupu)
+class TalepKupuAdmin(admin.ModelAdmin):
+    list_display = ('hat_no', 'tarih', 'saat', 'yolcu', 'kaynak')
+    list_filter = ('kaynak',)
+    search_fields = ('hat_no',)
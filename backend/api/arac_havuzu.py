@@ -0,0 +1,137 @@
+"""
+Hat -> araç havuzu indeksi (DurakVaris.arac_no'dan).
+
+Her ana hat için o hatta görülmüş araçlar, sefer (varış kaydı) sayısı ve son
+görülme zamanı TEK bir toplama sorgusuyla çıkarılır ve
+veri_seti/_depo/arac_havuzu.json dosyasına yazılır. Süreçler dosyayı
+milisaniyeler içinde yükler; dosyadaki veri imzası (DurakVaris'in en büyük
+id'si) veritabanıyla uyuşmuyorsa indeks yeniden kurulur.
+
+Sorgular O(1) sözlük erişimidir:
+
+    arac_havuzu().hat_araclari('10')     # ['696', '96', ...] (en aktif önce)
+    arac_havuzu().arac_hatlari('696')    # ['10', '12']
+
+Yeniden kurmak için: python manage.py arac_havuzu_olustur
+"""
+import os
+import json
+
+from django.db.models import Count, Max
+
+from .models import DurakVaris
+from .veri_araclari import DEPO_KLASORU, hat_no_temizle
+from .dosya_onbellegi import SureliNesne
+from .veri_damgasi import damga_yollari
+
+ARAC_HAVUZU_DOSYASI = os.path.join(DEPO_KLASORU, 'arac_havuzu.json')
+HAVUZ_OMRU = 600  # Bu aralıkla veri imzası kontrol edilir (1 indeks araması)
+
+
+def veri_imzasi():
+    """
+    DurakVaris tablosunun ucuz imzası: [en büyük id]. MAX(id) birincil anahtar
+    indeksinden okunur (COUNT gibi tabloyu taramaz). Kayıtlar sadece eklenir;
+    yeniden yükleme (veri_yukle) havuzu zaten yeniden kurar.
+    """
+    return [DurakVaris.objects.aggregate(son_id=Max('id'))['son_id']]
+
+
+class AracHavuzu:
+    """ana hat no -> [{arac_no, sefer_sayisi, son_gorulme}] (en aktif araç önce)."""
+
+    def __init__(self, hatlar=None, imza=None):
+        self.hatlar = hatlar or {}
+        self.imza = imza
+        self.araclar = {}  # arac_no -> [ana hat no]
+        self.hat_listeleri = {}  # ana hat no -> [arac_no]
+        for hat, kayitlar in self.hatlar.items():
+            self.hat_listeleri[hat] = [k['arac_no'] for k in kayitlar]
+            for k in kayitlar:
+                self.araclar.setdefault(k['arac_no'], []).append(hat)
+
+    @classmethod
+    def veritabanindan(cls, imza=None):
+        """Tek GROUP BY sorgusu: (ana hat, araç) -> varış sayısı, son varış zamanı."""
+        hatlar = {}
+        for satir in (DurakVaris.objects
+                      .exclude(arac_no__isnull=True).exclude(arac_no='').exclude(hat__isnull=True)
+                      .values('hat__ana_hat_no', 'arac_no')
+                      .annotate(adet=Count('id'), son=Max('varis_zaman'))):
+            hatlar.setdefault(hat_no_temizle(satir['hat__ana_hat_no']), []).append({
+                'arac_no': str(satir['arac_no']).strip(),
+                'sefer_sayisi': satir['adet'],
+                'son_gorulme': satir['son'].isoformat() if satir['son'] else None,
+            })
+        for kayitlar in hatlar.values():
+            kayitlar.sort(key=lambda k: (-k['sefer_sayisi'], k['arac_no']))
+        return cls(hatlar, imza if imza is not None else veri_imzasi())
+
+    @classmethod
+    def dosyadan(cls, yol=None):
+        with open(yol or ARAC_HAVUZU_DOSYASI, 'r', encoding='utf-8') as f:
+            veri = json.load(f)
+        return cls(veri.get('hatlar'), veri.get('imza'))
+
+    def kaydet(self, yol=None):
+        yol = yol or ARAC_HAVUZU_DOSYASI  # Çağrı anında çözülür (testler yolu değiştirebilir)
+        try:
+            os.makedirs(os.path.dirname(yol), exist_ok=True)
+            gecici = f"{yol}.tmp{os.getpid()}"
+            with open(gecici, 'w', encoding='utf-8') as f:
+                json.dump({'imza': self.imza, 'hatlar': self.hatlar}, f, ensure_ascii=False)
+            os.replace(gecici, yol)
+        except Exception as e:
+            print(f"[ARAÇ] Havuz dosyası yazılamadı: {e}")
+
+    # =========================================================================
+    # SORGULAR (O(1))
+    # =========================================================================
+    def hat_araclari(self, ana_hat_no, n=None):
+        liste = self.hat_listeleri.get(hat_no_temizle(ana_hat_no), [])
+        return liste[:n] if n else liste
+
+    def hat_kayitlari(self, ana_hat_no):
+        return self.hatlar.get(hat_no_temizle(ana_hat_no), [])
+
+    def arac_hatlari(self, arac_no):
+        return self.araclar.get(str(arac_no).strip(), [])
+
+    def __len__(self):
+        return len(self.araclar)
+
+
+def _havuzu_yukle():
+    """Dosyadaki indeks güncelse onu, değilse veritabanından kurulanı döner."""
+    imza = veri_imzasi()
+    try:
+        havuz = AracHavuzu.dosyadan()
+        if havuz.imza == imza:
+            return havuz
+    except Exception:
+        pass
+
+    havuz = AracHavuzu.veritabanindan(imza)
+    havuz.kaydet()
+    print(f"[ARAÇ] Araç havuzu kuruldu: {len(havuz.hatlar)} hat, {len(havuz)} araç")
+    return havuz
+
+
+# --- SÜREÇ İÇİ HAVUZ ---
+_HAVUZ = SureliNesne(_havuzu_yukle, HAVUZ_OMRU, dosya_bulucu=lambda: damga_yollari('varis'))
+
+
+def arac_havuzu():
+    return _HAVUZ.getir()
+
+
+def havuzu_gecersiz_kil():
+    _HAVUZ.gecersiz_kil()
+
+
+def havuzu_yeniden_olustur():
+    """İndeksi veritabanından kurar, dosyaya yazar ve süreç içi kopyayı yeniler."""
+    havuz = AracHavuzu.veritabanindan()
+    havuz.kaydet()
+    havuzu_gecersiz_kil()
+    return havuz
@@ -0,0 +1,122 @@
+"""
+Araç konumlarının sunucudan itmeli (Server-Sent Events) canlı yayını.
+
+İstemciler /api/simulasyon/akis/?hat_id=.. adresine EventSource ile bağlanır.
+Her yayın anahtarı (hat_id, veya tüm ağ için None) için TEK bir üretici görev
+çalışır: her TICK_SURESI saniyede tick zamanlayıcısının son görüntüsünü
+(zamanlayici) okur ve o anahtarın (bir kez kodlanmış) JSON metnini abone olan
+TÜM istemcilere dağıtır. Görüntü değişmediyse yayın yapılmaz. Böylece hesap ve
+veritabanı yükü bağlı istemci sayısıyla artmaz. Son abone ayrılınca üretici
+durur.
+
+Yayın ASGI sunucusu (uvicorn/daphne ile core.asgi:application) gerektirir.
+WSGI altında (runserver) tek bir görüntü gönderilir ve istemci 'retry'
+süresi sonunda yeniden bağlanır; bu da eski yoklama davranışına denktir.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from .zamanlayici import son_goruntu, TICK_ARALIGI
+
+TICK_SURESI = TICK_ARALIGI  # saniye
+CANLI_KALMA_SURESI = 15.0  # Veri gelmese de bu aralıkla yorum satırı gönderilir
+YENIDEN_BAGLANMA_MS = 2000
+
+
+def anlik_goruntu(hat_id=None):
+    """Yayın anahtarı için son görüntünün araç listesi (JSON metni)."""
+    return son_goruntu().json(hat_id)
+
+
+def olay_metni(veri, sira=None):
+    """SSE olay biçimi: (id) + data satırı + boş satır."""
+    bas = f"id: {sira}\n" if sira is not None else ""
+    return f"{bas}data: {veri}\n\n"
+
+
+class Yayin:
+    """Tek bir anahtarın son görüntüsü, sıra numarası ve aboneleri."""
+
+    def __init__(self, anahtar):
+        self.anahtar = anahtar
+        self.veri = None
+        self.sira = 0
+        self.abone_sayisi = 0
+        self.kosul = asyncio.Condition()
+        self.gorev = None
+
+    async def yayinla(self, veri):
+        if veri == self.veri:
+            return
+        async with self.kosul:
+            self.veri = veri
+            self.sira += 1
+            self.kosul.notify_all()
+
+    async def bekle(self, son_sira, zaman_asimi):
+        """Yeni görüntü gelene (sira > son_sira) ya da zaman aşımına kadar bekler."""
+        async with self.kosul:
+            try:
+                await asyncio.wait_for(self.kosul.wait_for(lambda: self.sira > son_sira), zaman_asimi)
+            except asyncio.TimeoutError:
+                return None
+            return self.sira, self.veri
+
+
+class Yayinci:
+    """Anahtar -> Yayin eşlemesi ve üretici görevlerin yaşam döngüsü."""
+
+    def __init__(self, tick=TICK_SURESI):
+        self.tick = tick
+        self.yayinlar = {}
+        self.hesapla = sync_to_async(anlik_goruntu, thread_sensitive=True)
+
+    async def _uret(self, yayin):
+        while True:
+            try:
+                await yayin.yayinla(await self.hesapla(yayin.anahtar))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[YAYIN] Görüntü hesaplanamadı ({yayin.anahtar}): {e}")
+            await asyncio.sleep(self.tick)
+
+    def abone_ol(self, anahtar):
+        yayin = self.yayinlar.get(anahtar)
+        if yayin is None:
+            yayin = self.yayinlar[anahtar] = Yayin(anahtar)
+        yayin.abone_sayisi += 1
+        if yayin.gorev is None or yayin.gorev.done():
+            yayin.gorev = asyncio.ensure_future(self._uret(yayin))
+        return yayin
+
+    def ayril(self, yayin):
+        yayin.abone_sayisi -= 1
+        if yayin.abone_sayisi <= 0:
+            if yayin.gorev is not None:
+                yayin.gorev.cancel()
+            self.yayinlar.pop(yayin.anahtar, None)
+
+    async def akis(self, anahtar):
+        """Bir istemci için SSE olay akışı (async üreteç)."""
+        yayin = self.abone_ol(anahtar)
+        try:
+            yield f"retry: {YENIDEN_BAGLANMA_MS}\n\n"
+            son_sira = 0
+            while True:
+                sonuc = await yayin.bekle(son_sira, CANLI_KALMA_SURESI)
+                if sonuc is None:
+                    yield ": canli\n\n"
+                    continue
+                son_sira, veri = sonuc
+                yield olay_metni(veri, son_sira)
+        finally:
+            self.ayril(yayin)
+
+    def durum(self):
+        return {str(a): {'abone': y.abone_sayisi, 'sira': y.sira} for a, y in self.yayinlar.items()}
+
+
+# --- SÜREÇ İÇİ ORTAK YAYINCI (ASGI olay döngüsünde yaşar) ---
+YAYINCI = Yayinci()
@@ -0,0 +1,188 @@
+"""
+Dosya tabanlı veri okuyucuları için parmak izi (yol + mtime + boyut) anahtarlı,
+bellek sınırlı LRU sonuç önbelleği.
+
+Kullanım:
+
+    @dosya_onbellekli(lambda: tarife_adaylari())
+    def get_tarife_dataframe():
+        ...
+
+Her çağrıda sadece ilgili dosyaların os.stat bilgisi okunur. Parmak izi
+değişmişse (dosya güncellendi, eklendi, silindi) kayıt otomatik olarak
+geçersiz sayılır ve fonksiyon yeniden çalıştırılır. Toplam boyut sınırı
+aşılınca en uzun süredir kullanılmayan kayıtlar atılır.
+
+Veritabanından kurulan süreç içi yapılar (tarife indeksi, ağ durumu) için
+SureliNesne kullanılır: nesne, bağlı olduğu veri damgaları (veri_damgasi)
+değişince bütün süreçlerde bir sonraki çağrıda yeniden kurulur; 'omur' ek
+bir üst sınırdır.
+"""
+import os
+import sys
+import time
+import threading
+import functools
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+VARSAYILAN_BELLEK_SINIRI = 256 * 1024 * 1024  # 256 MB
+
+
+def parmak_izi(dosyalar):
+    """Dosya listesinin (yol, mtime_ns, boyut) imzası. Silinmiş dosyalar None ile temsil edilir."""
+    iz = []
+    for dosya in dosyalar:
+        try:
+            st = os.stat(dosya)
+            iz.append((dosya, st.st_mtime_ns, st.st_size))
+        except OSError:
+            iz.append((dosya, None, None))
+    return tuple(iz)
+
+
+def nesne_boyutu(deger, _gorulen=None):
+    """
+    Önbellekteki bir değerin yaklaşık bellek kullanımı (bayt).
+    Kapsayıcılar (list / dict / tuple / set) ve düz nesnelerin öznitelikleri
+    özyinelemeli ölçülür; aynı nesne bir kez sayılır. Kendi __sizeof__'unu
+    tanımlayan sınıflar (AgDurumu, Guzergahlar, TarifeIndeksi...) ona göre ölçülür.
+    """
+    if _gorulen is None:
+        _gorulen = set()
+    if id(deger) in _gorulen:
+        return 0
+    _gorulen.add(id(deger))
+
+    if isinstance(deger, pd.DataFrame):
+        return int(deger.memory_usage(index=True, deep=True).sum())
+    if isinstance(deger, pd.Series):
+        return int(deger.memory_usage(index=True, deep=True))
+    if isinstance(deger, np.ndarray):
+        return sys.getsizeof(deger) if deger.base is None else deger.nbytes
+    boyut = sys.getsizeof(deger)
+    if isinstance(deger, dict):
+        return boyut + sum(nesne_boyutu(k, _gorulen) + nesne_boyutu(v, _gorulen) for k, v in deger.items())
+    if isinstance(deger, (list, tuple, set, frozenset)):
+        return boyut + sum(nesne_boyutu(v, _gorulen) for v in deger)
+    if type(deger).__sizeof__ is object.__sizeof__ and hasattr(deger, '__dict__'):
+        return boyut + nesne_boyutu(vars(deger), _gorulen)
+    return boyut
+
+
+def _kopya(deger):
+    # Çağıranlar dönen DataFrame'e sütun ekleyebilir; önbellekteki nesne etkilenmesin.
+    if isinstance(deger, (pd.DataFrame, pd.Series)):
+        return deger.copy(deep=False)
+    return deger
+
+
+class DosyaOnbellegi:
+    def __init__(self, bellek_siniri=VARSAYILAN_BELLEK_SINIRI):
+        self.bellek_siniri = bellek_siniri
+        self._kayitlar = OrderedDict()  # anahtar -> (parmak_izi, deger, boyut)
+        self._toplam = 0
+        self._kilit = threading.RLock()
+        self.isabet = 0
+        self.iska = 0
+
+    def getir(self, anahtar, iz, yukleyici):
+        """Parmak izi eşleşiyorsa önbellekteki değeri, değilse yukleyici() sonucunu döner."""
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is not None and kayit[0] == iz:
+                self._kayitlar.move_to_end(anahtar)
+                self.isabet += 1
+                return kayit[1]
+            self.iska += 1
+
+        deger = yukleyici()
+        boyut = nesne_boyutu(deger)
+
+        with self._kilit:
+            self._sil(anahtar)
+            if boyut <= self.bellek_siniri:
+                self._kayitlar[anahtar] = (iz, deger, boyut)
+                self._toplam += boyut
+                while self._toplam > self.bellek_siniri and self._kayitlar:
+                    self._sil(next(iter(self._kayitlar)))
+        return deger
+
+    def _sil(self, anahtar):
+        kayit = self._kayitlar.pop(anahtar, None)
+        if kayit is not None:
+            self._toplam -= kayit[2]
+
+    def temizle(self):
+        with self._kilit:
+            self._kayitlar.clear()
+            self._toplam = 0
+
+    def istatistik(self):
+        with self._kilit:
+            return {
+                'kayit_sayisi': len(self._kayitlar),
+                'toplam_bayt': self._toplam,
+                'bellek_siniri': self.bellek_siniri,
+                'isabet': self.isabet,
+                'iska': self.iska,
+            }
+
+
+# --- SÜREÇ İÇİ ORTAK ÖNBELLEK ---
+ONBELLEK = DosyaOnbellegi()
+
+
+def dosya_onbellekli(dosya_bulucu, onbellek=None):
+    """
+    Fonksiyonun sonucunu, dosya_bulucu(*args, **kwargs) ile bulunan dosyaların
+    parmak izine bağlı olarak önbelleğe alan dekoratör.
+    """
+    def sarmal(fonk):
+        @functools.wraps(fonk)
+        def ic(*args, **kwargs):
+            hedef = onbellek or ONBELLEK
+            iz = parmak_izi(dosya_bulucu(*args, **kwargs))
+            anahtar = (fonk.__module__, fonk.__qualname__, args, tuple(sorted(kwargs.items())))
+            return _kopya(hedef.getir(anahtar, iz, lambda: fonk(*args, **kwargs)))
+        return ic
+    return sarmal
+
+
+# =============================================================================
+# VERİTABANINDAN KURULAN SÜREÇ İÇİ NESNELER
+# =============================================================================
+class SureliNesne:
+    """
+    kurucu() sonucunu 'omur' saniye boyunca (veya gecersiz_kil() çağrılana kadar) tutar.
+    dosya_bulucu verilirse (örn. veri damgaları) bu dosyaların parmak izi
+    değişince de bir sonraki çağrıda yeniden kurulur.
+    """
+
+    def __init__(self, kurucu, omur=60, dosya_bulucu=None):
+        self.kurucu = kurucu
+        self.omur = omur
+        self.dosya_bulucu = dosya_bulucu
+        self._deger = None
+        self._iz = None
+        self._zaman = 0.0
+        self._kilit = threading.Lock()
+
+    def _taze_mi(self, iz):
+        return self._deger is not None and iz == self._iz and time.monotonic() - self._zaman < self.omur
+
+    def getir(self):
+        iz = parmak_izi(self.dosya_bulucu()) if self.dosya_bulucu else None
+        if self._taze_mi(iz):
+            return self._deger
+        with self._kilit:
+            if not self._taze_mi(iz):
+                self._deger = self.kurucu()
+                self._iz = iz  # Kurulum sırasında damga değiştiyse bir sonraki çağrı yeniden kurar
+                self._zaman = time.monotonic()
+            return self._deger
+
+    def gecersiz_kil(self):
+        self._deger = None
@@ -0,0 +1,187 @@
+"""
+Toplu talep modeli eğitimi: paralel ve kaldığı yerden devam edebilen.
+
+    egit(isci_sayisi=8, devam=True)
+
+- Hatlar ana hat numarasına göre tekilleştirilir (alt hatlar aynı modeli paylaşır).
+- Seriler ana süreçte tek küp sorgusuyla hazırlanır (akış modunda her işçi
+  kendi hattının serisini sütunsal depodan toplar) ve eğitim süreç havuzunda
+  (prophet_egitimi.hat_egit) yapılır.
+- Her hattın durumu (tamam / veri_yok / hata), süresi ve satır sayısı, hat
+  biter bitmez veri_seti/_depo/egitim_manifesti.json dosyasına yazılır.
+- devam=True ile başlatılan eğitim, son çalışmanın manifestini kullanır:
+  modeli tamamlanmış hatları atlar; yarıda kalan (çökme, kesinti), hata veren
+  ve henüz başlamamış hatları eğitir. devam=False her zaman yeni bir tam
+  eğitim başlatır (gece eğitimi).
+"""
+import os
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+
+from .models import Hat
+from .veri_araclari import DEPO_KLASORU, hat_no_temizle
+from .talep_kupu import tum_hat_serileri
+from .elkart_deposu import depoyu_guncelle
+from .prophet_egitimi import prophet_model_yolu, hat_egit
+
+MANIFEST_YOLU = os.path.join(DEPO_KLASORU, 'egitim_manifesti.json')
+ISCI_SAYISI = os.cpu_count() or 1
+
+
+def _hat_sirasi(hat_no):
+    return (0, int(hat_no), '') if hat_no.isdigit() else (1, 0, hat_no)
+
+
+def egitilecek_hatlar():
+    """Veritabanındaki tekil ana hat numaraları (doğal sırada)."""
+    hatlar = {hat_no_temizle(h) for h in Hat.objects.values_list('ana_hat_no', flat=True).distinct()}
+    return sorted((h for h in hatlar if h), key=_hat_sirasi)
+
+
+# =============================================================================
+# MANİFEST
+# =============================================================================
+class EgitimManifesti:
+    """Son eğitim çalışmasının hat bazında durum kaydı (JSON dosyası)."""
+
+    def __init__(self, veri=None, yol=None):
+        self.yol = yol or MANIFEST_YOLU  # Çağrı anında çözülür (testler yolu değiştirebilir)
+        self.veri = veri or {'calisma': {}, 'hatlar': {}}
+
+    @classmethod
+    def oku(cls, yol=None):
+        yol = yol or MANIFEST_YOLU
+        try:
+            with open(yol, 'r', encoding='utf-8') as f:
+                return cls(json.load(f), yol)
+        except Exception:
+            return cls(yol=yol)
+
+    @property
+    def hatlar(self):
+        return self.veri['hatlar']
+
+    def calisma_var_mi(self):
+        return bool((self.veri.get('calisma') or {}).get('baslangic'))
+
+    def tamamlandi_mi(self, hat_no):
+        """Hat bu çalışmada eğitildi ve model dosyası hâlâ yerinde mi?"""
+        return self.hatlar.get(hat_no, {}).get('durum') == 'tamam' and os.path.exists(prophet_model_yolu(hat_no))
+
+    def yeni_calisma(self, hatlar, isci_sayisi, kaynak):
+        self.veri = {
+            'calisma': {'baslangic': datetime.now().isoformat(timespec='seconds'), 'bitis': None,
+                        'isci_sayisi': isci_sayisi, 'kaynak': kaynak, 'devam_sayisi': 0},
+            'hatlar': {h: {'durum': 'bekliyor'} for h in hatlar},
+        }
+        self.kaydet()
+
+    def devam_et(self, hatlar, isci_sayisi):
+        calisma = self.veri['calisma']
+        calisma['devam_sayisi'] = calisma.get('devam_sayisi', 0) + 1
+        calisma['isci_sayisi'] = isci_sayisi
+        calisma['bitis'] = None
+        for h in hatlar:
+            self.hatlar.setdefault(h, {'durum': 'bekliyor'})
+        self.kaydet()
+
+    def isle(self, kayit):
+        hat_no = kayit.pop('hat_no')
+        kayit['zaman'] = datetime.now().isoformat(timespec='seconds')
+        self.hatlar[hat_no] = kayit
+        self.kaydet()
+
+    def bitir(self, sure_sn):
+        self.veri['calisma']['bitis'] = datetime.now().isoformat(timespec='seconds')
+        self.veri['calisma']['sure_sn'] = round(sure_sn, 2)
+        self.kaydet()
+
+    def ozet(self):
+        sayilar = {}
+        for kayit in self.hatlar.values():
+            sayilar[kayit.get('durum')] = sayilar.get(kayit.get('durum'), 0) + 1
+        return sayilar
+
+    def kaydet(self):
+        try:
+            os.makedirs(os.path.dirname(self.yol), exist_ok=True)
+            gecici = f"{self.yol}.tmp{os.getpid()}"
+            with open(gecici, 'w', encoding='utf-8') as f:
+                json.dump(self.veri, f, ensure_ascii=False, indent=1)
+            os.replace(gecici, self.yol)
+        except Exception as e:
+            print(f"[EĞİTİM] Manifest yazılamadı: {e}")
+
+
+# =============================================================================
+# ORKESTRASYON
+# =============================================================================
+def egit(hatlar=None, isci_sayisi=None, devam=False, akis=False, yazdir=print):
+    """
+    Verilen (yoksa tüm) ana hatların Prophet modellerini süreç havuzunda eğitir.
+    Manifesti döner.
+    """
+    bas = time.perf_counter()
+    hatlar = [hat_no_temizle(h) for h in hatlar] if hatlar else egitilecek_hatlar()
+    isci_sayisi = max(1, isci_sayisi or ISCI_SAYISI)
+    kaynak = 'akis' if akis else 'kup'
+
+    manifest = EgitimManifesti.oku()
+    if devam and manifest.calisma_var_mi():
+        manifest.devam_et(hatlar, isci_sayisi)
+        bekleyen = [h for h in hatlar if not manifest.tamamlandi_mi(h)]
+        yazdir(f"Önceki eğitime devam ediliyor: {len(hatlar) - len(bekleyen)} hat tamam, "
+               f"{len(bekleyen)} hat kaldı.")
+    else:
+        manifest.yeni_calisma(hatlar, isci_sayisi, kaynak)
+        bekleyen = list(hatlar)
+
+    # Seriler ana süreçte hazırlanır; işçiler veritabanına bağlanmaz
+    seriler = None
+    if akis:
+        depoyu_guncelle()
+    else:
+        yazdir("Talep küpünden tüm hatların serileri okunuyor...")
+        seriler = tum_hat_serileri(guncelle=True)
+
+    gorevler = []
+    for hat_no in bekleyen:
+        seri = None
+        if seriler is not None:
+            seri = seriler.get(hat_no)
+            if seri is None:
+                manifest.isle({'hat_no': hat_no, 'durum': 'veri_yok', 'satir': 0, 'hata': None, 'sure_sn': 0})
+                yazdir(f"Hat {hat_no}: veri yok, atlandı.")
+                continue
+        gorevler.append((hat_no, seri))
+
+    def isle(kayit):
+        hat_no = kayit['hat_no']
+        yazdir(f"Hat {hat_no}: {kayit['durum']} ({kayit['sure_sn']} sn)"
+               + (f" - {kayit['hata']}" if kayit.get('hata') else ""))
+        manifest.isle(kayit)
+
+    isci_sayisi = min(isci_sayisi, len(gorevler))
+    if isci_sayisi <= 1:
+        for gorev in gorevler:
+            isle(hat_egit(*gorev))
+    else:
+        yazdir(f"{len(gorevler)} hat {isci_sayisi} süreçte eğitiliyor...")
+        connections.close_all()  # Çatallanan süreçler açık bağlantıyı devralmasın
+        with ProcessPoolExecutor(max_workers=isci_sayisi) as havuz:
+            isler = {havuz.submit(hat_egit, *gorev): gorev[0] for gorev in gorevler}
+            for is_ in as_completed(isler):
+                try:
+                    kayit = is_.result()
+                except Exception as e:
+                    # İşçi süreç çöktü (bellek, sinyal); hat bir sonraki devamda yeniden denenir
+                    kayit = {'hat_no': isler[is_], 'durum': 'hata', 'satir': 0, 'hata': str(e) or type(e).__name__,
+                             'sure_sn': 0}
+                isle(kayit)
+
+    manifest.bitir(time.perf_counter() - bas)
+    return manifest
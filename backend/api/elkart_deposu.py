@@ -0,0 +1,420 @@
+"""
+Elkart biniş verileri için hat bazında bölümlenmiş sütunsal depo.
+
+Her elkart*.csv dosyası BİR KEZ okunur ve şu yapıya dönüştürülür:
+
+    veri_seti/_depo/elkart/<csv_adi>/<hat_no>/tarih.npy   (datetime64[D])
+    veri_seti/_depo/elkart/<csv_adi>/<hat_no>/saat.npy    (int8, 0-23)
+    veri_seti/_depo/elkart/<csv_adi>/<hat_no>/yolcu.npy   (int32)
+    veri_seti/_depo/elkart/<csv_adi>/ozet.npz             (tüm hatlar: hat x tarih x saat toplamları)
+
+Aynı okuma sırasında her parça vektörel olarak (hat, tarih, saat) bazında
+toplanır; böylece tek geçişte TÜM hatların özeti de üretilir.
+
+Okuyucular sadece istedikleri hattın klasörünü açar; böylece bir hattın
+verisini okumanın maliyeti tüm CSV'lerin boyutuna değil, o hattın kendi
+verisine bağlı olur.
+
+Dönüşüm (depoyu_guncelle) sadece yönetim komutlarından çalışır
+(elkart_donustur, kupu_guncelle, analiz_araclar --egit --akis); CSV değişmişse
+(mtime/boyut) dosya yeniden dönüştürülür. Web istekleri dönüşüm başlatmaz,
+depoda o an ne varsa onu okur. Aynı anda tek bir dönüşüm çalışır (süreç içi
+kilit + depo klasöründeki kilit dosyası); yeni bölüm benzersiz bir geçici
+klasörde hazırlanır, eskisi yeniden adlandırılıp yerine konduktan sonra silinir.
+"""
+import os
+import glob
+import json
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .veri_araclari import VERI_SETI_KLASORU, DEPO_KLASORU, hat_no_temizle
+from .zaman_donusum import saat_vektor, tarih_vektor
+from .paralel_okuyucu import dosya_gorevleri, parca_oku, paralel_calistir
+from .dosya_onbellegi import dosya_onbellekli
+from .veri_semasi import eksik_roller
+
+ELKART_DEPO_KLASORU = os.path.join(DEPO_KLASORU, 'elkart')
+MANIFEST_ADI = 'manifest.json'
+OZET_ADI = 'ozet.npz'
+DEPO_SURUMU = 2
+SUTUNLAR = ('tarih', 'saat', 'yolcu')
+DONUSUM_CHUNK = 200000
+AKIS_DILIMI = 1000000
+ELKART_ROLLERI = ['hat', 'tarih', 'saat', 'yolcu']
+KILIT_ADI = '.donusum.kilit'
+
+_DONUSUM_KILIDI = threading.Lock()
+
+
+# =============================================================================
+# YARDIMCI FONKSİYONLAR
+# =============================================================================
+def elkart_dosyalari():
+    """veri_seti içindeki elkart*.csv dosyalarını (yeniden eskiye) listeler."""
+    if not os.path.exists(VERI_SETI_KLASORU):
+        return []
+    dosyalar = glob.glob(os.path.join(VERI_SETI_KLASORU, "elkart*.csv"))
+    dosyalar.sort(reverse=True)
+    return dosyalar
+
+
+def klasor_adi(hat_no):
+    """Hat numarasını dosya sistemi için güvenli bir klasör adına çevirir."""
+    s = hat_no_temizle(hat_no)
+    return "".join(c if (c.isalnum() or c in '-_') else '_' for c in s) or '_'
+
+
+def kaynak_klasoru(dosya):
+    return os.path.join(ELKART_DEPO_KLASORU, os.path.splitext(os.path.basename(dosya))[0])
+
+
+def dosya_imzasi(dosya):
+    st = os.stat(dosya)
+    return {'mtime': st.st_mtime, 'boyut': st.st_size}
+
+
+def manifest_dosyalari():
+    """Depodaki bölümlerin manifestleri (okuyucuların önbellek bağımlılığı)."""
+    return [os.path.join(kaynak_klasoru(d), MANIFEST_ADI) for d in elkart_dosyalari()]
+
+
+def manifest_oku(klasor):
+    try:
+        with open(os.path.join(klasor, MANIFEST_ADI), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def guncel_mi(dosya):
+    """Dosyanın depodaki kopyası CSV ile aynı mtime/boyuta sahip mi?"""
+    manifest = manifest_oku(kaynak_klasoru(dosya))
+    if not manifest:
+        return False
+    imza = dosya_imzasi(dosya)
+    return (manifest.get('surum') == DEPO_SURUMU
+            and manifest.get('mtime') == imza['mtime'] and manifest.get('boyut') == imza['boyut'])
+
+
+# =============================================================================
+# DÖNÜŞÜM (CSV -> Hat Bölümlü .npy Sütunları)
+# =============================================================================
+def _chunk_donustur(chunk):
+    """
+    Rol adlarıyla okunmuş bir CSV parçasını (hat, tarih, saat, yolcu) sütunlarına
+    indirger. tarih / yolcu sütunları şemada yoksa NaT / 1 kabul edilir.
+    """
+    saat = saat_vektor(chunk['saat'])
+    if 'tarih' in chunk:
+        tarih = tarih_vektor(chunk['tarih'])
+    else:
+        tarih = pd.Series(pd.NaT, index=chunk.index, dtype='datetime64[ns]')
+    if 'yolcu' in chunk:
+        yolcu = pd.to_numeric(chunk['yolcu'], errors='coerce').fillna(1)
+    else:
+        yolcu = pd.Series(1, index=chunk.index)
+
+    df = pd.DataFrame({
+        'hat': chunk['hat'].astype(str).str.strip().str.split('.').str[0],
+        'tarih': tarih,
+        'saat': saat,
+        'yolcu': yolcu,
+    })
+    return df[(df['saat'] >= 0) & (df['saat'] <= 23)]
+
+
+def _sutunlari_kaydet(klasor, df):
+    os.makedirs(klasor, exist_ok=True)
+    np.save(os.path.join(klasor, 'tarih.npy'), df['tarih'].values.astype('datetime64[D]'))
+    np.save(os.path.join(klasor, 'saat.npy'), df['saat'].values.astype(np.int8))
+    np.save(os.path.join(klasor, 'yolcu.npy'), df['yolcu'].values.astype(np.int32))
+
+
+def _ozet_birlestir(parcalar):
+    """Kısmi (hat, tarih, saat) toplamlarını tek bir toplamda birleştirir."""
+    if not parcalar:
+        return None
+    return pd.concat(parcalar).groupby(level=['hat', 'tarih', 'saat'], sort=False).sum()
+
+
+def _gecici_klasor(dosya):
+    """Dönüşüm için benzersiz geçici klasör (hedefle aynı dizinde; rename atomik kalsın)."""
+    os.makedirs(ELKART_DEPO_KLASORU, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{os.path.basename(kaynak_klasoru(dosya))}.tmp", dir=ELKART_DEPO_KLASORU)
+
+
+@contextmanager
+def donusum_kilidi():
+    """
+    Aynı anda tek dönüşüm: süreç içi kilit (thread'ler) + depo klasöründeki
+    kilit dosyası (süreçler). Kilit serbest kalana kadar bekler.
+    """
+    os.makedirs(ELKART_DEPO_KLASORU, exist_ok=True)
+    with _DONUSUM_KILIDI, open(os.path.join(ELKART_DEPO_KLASORU, KILIT_ADI), 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _parca_donustur(dosya, bas, bit, sema, gecici, parca_no):
+    """
+    [İŞÇİ SÜREÇ] Dosyanın bir bayt aralığını okur, her hattın satırlarını geçici
+    klasöre alt parça olarak yazar ve parçanın (hat, tarih, saat) özetini döner.
+    Ana sürece sadece küçük sonuçlar (özet, parça adları, satır sayısı) gider.
+    Sadece şemadaki rol sütunları okunur; hat / saat sütunu yoksa parça boş döner.
+    """
+    hat_parcalari = {}
+    ozet_parcalari = []
+    satir = 0
+    if eksik_roller(sema, ['hat', 'saat']):
+        return hat_parcalari, None, satir
+
+    iter_csv = parca_oku(dosya, bas, bit, sema, ELKART_ROLLERI, chunksize=DONUSUM_CHUNK)
+    for i, chunk in enumerate(iter_csv):
+        df = _chunk_donustur(chunk)
+        if df.empty:
+            continue
+        satir += len(df)
+        ozet_parcalari.append(
+            df.dropna(subset=['tarih']).groupby(['hat', 'tarih', 'saat'], sort=False)['yolcu'].sum()
+        )
+        if len(ozet_parcalari) >= 20:
+            ozet_parcalari = [_ozet_birlestir(ozet_parcalari)]
+        for hat_no, grup in df.groupby('hat', sort=False):
+            ad = f"p{parca_no:04d}_{i:05d}"
+            _sutunlari_kaydet(os.path.join(gecici, klasor_adi(hat_no), ad), grup)
+            hat_parcalari.setdefault(hat_no, []).append(ad)
+
+    return hat_parcalari, _ozet_birlestir(ozet_parcalari), satir
+
+
+def _donusumu_tamamla(dosya, gecici, imza, sonuclar):
+    """Parça sonuçlarını birleştirir, özeti ve manifesti yazar, depoyu yerine koyar."""
+    # 1. Her hattın alt parçalarını (dosya sırasıyla) tek sütun dosyasında birleştir
+    hat_parcalari = {}
+    for parca_sonucu, _, _ in sonuclar:
+        for hat_no, adlar in parca_sonucu.items():
+            hat_parcalari.setdefault(hat_no, []).extend(adlar)
+
+    hat_satirlari = {}
+    for hat_no, adlar in hat_parcalari.items():
+        hat_klasoru = os.path.join(gecici, klasor_adi(hat_no))
+        parcalar = [os.path.join(hat_klasoru, ad) for ad in adlar]
+        for sutun in SUTUNLAR:
+            birlesik = np.concatenate([np.load(os.path.join(p, f"{sutun}.npy")) for p in parcalar])
+            np.save(os.path.join(hat_klasoru, f"{sutun}.npy"), birlesik)
+        hat_satirlari[hat_no] = int(len(birlesik))
+        for p in parcalar:
+            shutil.rmtree(p)
+
+    # 2. Ağ geneli özeti kaydet
+    ozet = _ozet_birlestir([o for _, o, _ in sonuclar if o is not None])
+    if ozet is None:
+        ozet = pd.Series([], dtype=np.int64, index=pd.MultiIndex.from_arrays(
+            [[], pd.DatetimeIndex([]), []], names=['hat', 'tarih', 'saat']))
+    ozet = ozet.reset_index()
+    np.savez(os.path.join(gecici, OZET_ADI),
+             hat=ozet['hat'].to_numpy(dtype=str),
+             tarih=ozet['tarih'].values.astype('datetime64[D]'),
+             saat=ozet['saat'].values.astype(np.int8),
+             yolcu=ozet['yolcu'].values.astype(np.int64))
+
+    manifest = {'kaynak': os.path.basename(dosya), 'surum': DEPO_SURUMU,
+                'satir': sum(s for _, _, s in sonuclar), 'hatlar': hat_satirlari, **imza}
+    with open(os.path.join(gecici, MANIFEST_ADI), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    # 3. Eski depoyu değiştir: önce kenara al, yenisini koy, sonra sil
+    hedef = kaynak_klasoru(dosya)
+    eski = None
+    if os.path.exists(hedef):
+        eski = tempfile.mkdtemp(prefix=f"{os.path.basename(hedef)}.eski", dir=ELKART_DEPO_KLASORU)
+        os.rename(hedef, os.path.join(eski, 'bolum'))
+    os.rename(gecici, hedef)
+    if eski:
+        shutil.rmtree(eski, ignore_errors=True)
+    return manifest
+
+
+def dosyalari_donustur(dosyalar, isci_sayisi=None):
+    """
+    Elkart CSV dosyalarını hat bazında bölümlenmiş .npy sütunlarına çevirir.
+    Tüm dosyaların bayt aralığı parçaları tek bir süreç havuzunda işlenir;
+    her dosyanın parçaları önce geçici klasöre yazılır, sonra birleştirilip
+    tek hamlede asıl klasörün yerine konur. Dönüştürülen dosyaları döner.
+    """
+    gorevler = dosya_gorevleri(dosyalar, 'elkart')
+    if not gorevler:
+        return []
+
+    imzalar = {}
+    geciciler = {}
+    for dosya in dict.fromkeys(g[0] for g in gorevler):
+        imzalar[dosya] = dosya_imzasi(dosya)
+        geciciler[dosya] = _gecici_klasor(dosya)
+
+    # (dosya, bas, bit, sema) + (geçici klasör, parça sırası)
+    isci_gorevleri = [g + (geciciler[g[0]], i) for i, g in enumerate(gorevler)]
+    sonuclar = paralel_calistir(_parca_donustur, isci_gorevleri, isci_sayisi)
+
+    dosya_sonuclari = {}
+    hatali = set()
+    for gorev, sonuc in zip(gorevler, sonuclar):
+        if sonuc is None:
+            hatali.add(gorev[0])
+        dosya_sonuclari.setdefault(gorev[0], []).append(sonuc)
+
+    donusturulen = []
+    for dosya, parca_sonuclari in dosya_sonuclari.items():
+        gecici = geciciler[dosya]
+        if dosya in hatali:
+            print(f"[DEPO] {os.path.basename(dosya)} dönüştürülemedi, eski depo korunuyor.")
+            shutil.rmtree(gecici, ignore_errors=True)
+            continue
+        _donusumu_tamamla(dosya, gecici, imzalar[dosya], parca_sonuclari)
+        donusturulen.append(dosya)
+    return donusturulen
+
+
+def depoyu_guncelle(zorla=False):
+    """
+    Eksik veya değişmiş elkart dosyalarını (paralel olarak) dönüştürür,
+    kaynağı silinmiş bölümleri ve yarım kalmış geçici klasörleri temizler.
+    Dönüştürülen dosya adlarını döner.
+    SADECE yönetim komutlarından çağrılır (süreç havuzu başlatır).
+    """
+    with donusum_kilidi():
+        dosyalar = elkart_dosyalari()
+        eskiler = [d for d in dosyalar if zorla or not guncel_mi(d)]
+        donusturulen = []
+        if eskiler:
+            print(f"[DEPO] {len(eskiler)} elkart dosyası sütunsal depoya dönüştürülüyor...")
+            try:
+                donusturulen = [os.path.basename(d) for d in dosyalari_donustur(eskiler)]
+            except Exception as e:
+                print(f"[DEPO] Dönüşüm hatası: {e}")
+
+        # Kilit bizde: başka dönüşüm yok, kalan .tmp / .eski klasörleri artıktır
+        gecerli = {os.path.basename(kaynak_klasoru(d)) for d in dosyalar}
+        for ad in os.listdir(ELKART_DEPO_KLASORU):
+            yol = os.path.join(ELKART_DEPO_KLASORU, ad)
+            if ad not in gecerli and os.path.isdir(yol):
+                shutil.rmtree(yol, ignore_errors=True)
+    return donusturulen
+
+
+# =============================================================================
+# OKUMA
+# =============================================================================
+@dosya_onbellekli(lambda hat_no: manifest_dosyalari())
+def hat_verisini_oku(hat_no):
+    """
+    Bir hattın tüm elkart kayıtlarını depodan okur.
+    Sütunlar: tarih (datetime64), saat (int), yolcu (int). Veri yoksa boş DataFrame.
+    Depo yeniden dönüştürülmediği sürece sonuç önbellekten döner.
+    """
+    hat_klasor_adi = klasor_adi(hat_no)
+    parcalar = []
+    for dosya in elkart_dosyalari():
+        hat_klasoru = os.path.join(kaynak_klasoru(dosya), hat_klasor_adi)
+        if not os.path.isdir(hat_klasoru):
+            continue
+        try:
+            parcalar.append({s: np.load(os.path.join(hat_klasoru, f"{s}.npy")) for s in SUTUNLAR})
+        except Exception as e:
+            print(f"[DEPO] Okuma hatası ({hat_klasoru}): {e}")
+
+    if not parcalar:
+        return pd.DataFrame(columns=list(SUTUNLAR))
+
+    return pd.DataFrame({s: np.concatenate([p[s] for p in parcalar]) for s in SUTUNLAR})
+
+
+def ozet_oku(dosya):
+    """
+    Bir kaynak dosyanın tüm hatlar için (hat, tarih, saat, yolcu) özetini döner.
+    Dönüşüm sırasında tek geçişte üretilmiştir; CSV tekrar okunmaz.
+    """
+    yol = os.path.join(kaynak_klasoru(dosya), OZET_ADI)
+    if not os.path.exists(yol):
+        return pd.DataFrame(columns=['hat', 'tarih', 'saat', 'yolcu'])
+    with np.load(yol) as veri:
+        return pd.DataFrame({s: veri[s] for s in ('hat', 'tarih', 'saat', 'yolcu')})
+
+
+def ag_ozeti():
+    """
+    Tüm elkart dosyalarının ağ geneli (hat, tarih, saat) toplamlarını döner.
+    Her dosya en fazla bir kez okunur; sonuç tüm hatları birlikte içerir.
+    """
+    parcalar = [ozet_oku(d) for d in elkart_dosyalari()]
+    parcalar = [p for p in parcalar if not p.empty]
+    if not parcalar:
+        return pd.DataFrame(columns=['hat', 'tarih', 'saat', 'yolcu'])
+
+    return (pd.concat(parcalar, ignore_index=True)
+            .groupby(['hat', 'tarih', 'saat'], sort=False)['yolcu'].sum().reset_index())
+
+
+def hat_saatlik_akis(hat_no, dilim=AKIS_DILIMI):
+    """
+    Bir hattın saatlik biniş toplamlarını AKIŞ modunda hesaplar (Prophet formatı: ds, y).
+
+    Hat bölümleri bellek eşlemeli (mmap) açılır ve 'dilim' satırlık parçalar
+    halinde okunur; her parça hemen saatlik toplamlara indirgenip önceki kısmi
+    toplamlarla birleştirilir. Ham biniş satırları hiçbir zaman birlikte
+    bellekte tutulmaz; tepe bellek kullanımı saat sayısıyla sınırlıdır.
+    """
+    hat_klasor_adi = klasor_adi(hat_no)
+    birikim = None
+    for dosya in elkart_dosyalari():
+        hat_klasoru = os.path.join(kaynak_klasoru(dosya), hat_klasor_adi)
+        if not os.path.isdir(hat_klasoru):
+            continue
+        try:
+            sutunlar = {s: np.load(os.path.join(hat_klasoru, f"{s}.npy"), mmap_mode='r') for s in SUTUNLAR}
+        except Exception as e:
+            print(f"[DEPO] Okuma hatası ({hat_klasoru}): {e}")
+            continue
+
+        for bas in range(0, len(sutunlar['tarih']), dilim):
+            tarih = np.asarray(sutunlar['tarih'][bas:bas + dilim])
+            gecerli = ~np.isnat(tarih)
+            if not gecerli.any():
+                continue
+            saat_anahtari = (tarih[gecerli].astype('datetime64[h]')
+                             + np.asarray(sutunlar['saat'][bas:bas + dilim])[gecerli].astype('timedelta64[h]'))
+            anahtarlar, ters = np.unique(saat_anahtari, return_inverse=True)
+            toplamlar = np.bincount(ters, weights=np.asarray(sutunlar['yolcu'][bas:bas + dilim])[gecerli])
+            kismi = pd.Series(toplamlar, index=anahtarlar)
+            birikim = kismi if birikim is None else birikim.add(kismi, fill_value=0)
+
+    if birikim is None:
+        return pd.DataFrame(columns=['ds', 'y'])
+
+    birikim = birikim.sort_index()
+    return pd.DataFrame({'ds': pd.to_datetime(birikim.index.values), 'y': birikim.values.astype(np.int64)})
@@ -0,0 +1,155 @@
+"""
+Hat güzergahlarının önceden hesaplanmış geometrisi.
+
+Tüm hatların HatGuzergah noktaları tek sorguyla okunur ve uç uca eklenmiş
+float dizilerinde tutulur:
+
+    enlem, boylam : noktalar (hat, sıra düzeninde)
+    mesafe        : ağ boyunca KÜMÜLATİF haversine mesafesi (km); hat
+                    sınırlarında artmaz, böylece her hattın dilimi sıralı kalır
+    bas, sayi     : hat başına dizilerdeki ofset / nokta sayısı
+    uzunluk       : hat başına toplam güzergah uzunluğu (km)
+
+Konum sorguları ("hattın f oranındaki konumu", "hattın d km'sindeki konumu")
+ikili arama (searchsorted) ve iki nokta arasında doğrusal ara değerleme ile
+vektörel olarak yanıtlanır; noktaların eşit aralıklı olduğu varsayılmaz.
+
+Geometri süreç içinde tutulur ve 'guzergah' veri damgası değişince (rota
+yükleme komutları) bütün süreçlerde bir sonraki sorguda yeniden kurulur.
+"""
+import numpy as np
+
+from .models import Hat, HatGuzergah
+from .dosya_onbellegi import SureliNesne
+from .veri_damgasi import damga_yollari
+
+DUNYA_YARICAPI_KM = 6371.0088
+GEOMETRI_OMRU = 300
+
+
+def haversine_km(enlem1, boylam1, enlem2, boylam2):
+    """İki nokta (veya nokta dizileri) arasındaki büyük daire mesafesi (km)."""
+    enlem1, boylam1, enlem2, boylam2 = map(np.radians, (enlem1, boylam1, enlem2, boylam2))
+    a = (np.sin((enlem2 - enlem1) / 2) ** 2
+         + np.cos(enlem1) * np.cos(enlem2) * np.sin((boylam2 - boylam1) / 2) ** 2)
+    return 2 * DUNYA_YARICAPI_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class Guzergahlar:
+    """Tüm hatların güzergah noktaları ve kümülatif mesafe dizileri."""
+
+    def __init__(self, hat_idleri, enlem, boylam):
+        """
+        hat_idleri, enlem, boylam: nokta başına diziler; hat ve sıra düzeninde
+        (aynı hattın noktaları ardışık) olmalıdır.
+        """
+        hat_idleri = np.asarray(hat_idleri, dtype=np.int64)
+        self.enlem = np.asarray(enlem, dtype=np.float64)
+        self.boylam = np.asarray(boylam, dtype=np.float64)
+        self.hat_idleri, self.bas, self.sayi = np.unique(hat_idleri, return_index=True, return_counts=True)
+        self.hat_sirasi = {int(h): k for k, h in enumerate(self.hat_idleri)}
+
+        # Ardışık noktalar arası mesafe; hat sınırını aşan parçalar sayılmaz
+        parca = np.zeros(len(self.enlem))
+        if len(parca) > 1:
+            parca[1:] = haversine_km(self.enlem[:-1], self.boylam[:-1], self.enlem[1:], self.boylam[1:])
+            parca[self.bas] = 0.0
+        self.mesafe = np.cumsum(parca)
+        self.uzunluk = (self.mesafe[self.bas + self.sayi - 1] - self.mesafe[self.bas]) if len(self.bas) \
+            else np.empty(0, dtype=np.float64)
+
+    @classmethod
+    def veritabanindan(cls):
+        noktalar = np.array(
+            HatGuzergah.objects.order_by('hat_id', 'sira').values_list('hat_id', 'enlem', 'boylam'),
+            dtype=np.float64
+        ).reshape(-1, 3)
+        return cls(noktalar[:, 0].astype(np.int64), noktalar[:, 1], noktalar[:, 2])
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(
+            v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+
+    def sira(self, hat_id):
+        """Hat.id -> dizilerdeki hat sırası (güzergahı yoksa None)."""
+        return self.hat_sirasi.get(int(hat_id))
+
+    # =========================================================================
+    # KONUM SORGULARI (hat SIRALARI üzerinden, vektörel)
+    # =========================================================================
+    def mesafedeki_konum(self, hatlar, mesafe_km):
+        """
+        Her (hat sırası, mesafe) çifti için güzergah üzerindeki (enlem, boylam).
+        Mesafe [0, uzunluk] aralığına kırpılır; tek noktalı hatlarda o nokta döner.
+        """
+        hatlar = np.atleast_1d(np.asarray(hatlar, dtype=np.int64))
+        bas, sayi = self.bas[hatlar], self.sayi[hatlar]
+        hedef = self.mesafe[bas] + np.clip(np.broadcast_to(mesafe_km, hatlar.shape), 0, self.uzunluk[hatlar])
+
+        # Hedefi aşan ilk nokta; hattın kendi dilimine [bas+1, son] kırpılır
+        son = bas + sayi - 1
+        j = np.clip(np.searchsorted(self.mesafe, hedef, side='right'), bas + 1, np.maximum(son, bas + 1))
+        j = np.minimum(j, son)
+        i = np.maximum(j - 1, bas)
+
+        parca = self.mesafe[j] - self.mesafe[i]
+        t = np.divide(hedef - self.mesafe[i], parca, out=np.zeros_like(parca), where=parca > 0)
+        t = np.clip(t, 0, 1)
+        enlem = self.enlem[i] + t * (self.enlem[j] - self.enlem[i])
+        boylam = self.boylam[i] + t * (self.boylam[j] - self.boylam[i])
+        return enlem, boylam
+
+    def oran_konumu(self, hatlar, oran):
+        """Her (hat sırası, oran) için güzergah uzunluğunun 'oran' kadarındaki konum."""
+        hatlar = np.atleast_1d(np.asarray(hatlar, dtype=np.int64))
+        return self.mesafedeki_konum(hatlar, np.clip(oran, 0, 1) * self.uzunluk[hatlar])
+
+    # =========================================================================
+    # TEK HAT KOLAYLIKLARI
+    # =========================================================================
+    def konum(self, hat_id, oran=None, mesafe_km=None):
+        """Tek hat için (enlem, boylam); güzergahı yoksa None."""
+        k = self.sira(hat_id)
+        if k is None:
+            return None
+        if mesafe_km is not None:
+            enlem, boylam = self.mesafedeki_konum([k], mesafe_km)
+        else:
+            enlem, boylam = self.oran_konumu([k], oran or 0.0)
+        return float(enlem[0]), float(boylam[0])
+
+    def hat_uzunlugu(self, hat_id):
+        k = self.sira(hat_id)
+        return float(self.uzunluk[k]) if k is not None else 0.0
+
+
+# --- SÜREÇ İÇİ GEOMETRİ ---
+_GEOMETRI = SureliNesne(lambda: Guzergahlar.veritabanindan(), GEOMETRI_OMRU,
+                        dosya_bulucu=lambda: damga_yollari('guzergah'))
+
+
+def geometriyi_gecersiz_kil():
+    _GEOMETRI.gecersiz_kil()
+
+
+def guzergah_geometrisi():
+    """Güncel güzergah geometrisini döner; güzergah değişince ilk sorguda yeniden kurulur."""
+    return _GEOMETRI.getir()
+
+
+# =============================================================================
+# Hat.uzunluk_km
+# =============================================================================
+def hat_uzunluklarini_guncelle():
+    """
+    Güzergah geometrisinden Hat.uzunluk_km alanlarını toplu günceller.
+    Güzergahı olmayan hatlar 0 olur. Güncellenen hat sayısını döner.
+    """
+    geometri = Guzergahlar.veritabanindan()
+    hatlar = list(Hat.objects.only('id', 'uzunluk_km'))
+    for hat in hatlar:
+        hat.uzunluk_km = round(geometri.hat_uzunlugu(hat.id), 3)
+    Hat.objects.bulk_update(hatlar, ['uzunluk_km'], batch_size=1000)
+
+    geometriyi_gecersiz_kil()
+    return len(hatlar)
@@ -0,0 +1,144 @@
+"""
+Simülasyon uç noktaları için hat başına statik bağlam önbelleği.
+
+Bir hattın her yoklamada değişmeyen verisi (güzergah dizileri, sıralı durak
+adları, araç havuzu) ilk istekte bir kez kurulur ve süreç içinde saklanır.
+Kararlı durumda yoklamalar hiç SQL sorgusu çalıştırmaz.
+
+Önbellek sürümlüdür: hat / güzergah / durak / varış verisinin damgaları
+(veri_damgasi) değiştiğinde genel sürüm artar ve tüm bağlamlar bir sonraki
+istekte yeniden kurulur. Yükleme komutları başka süreçte çalışsa da
+değişiklik bütün worker'larda bir sonraki yoklamada görünür; BAGLAM_OMRU
+yalnızca ek bir üst sınırdır.
+"""
+import time
+import threading
+
+from .models import Hat, HatDurak
+from .veri_araclari import hat_no_temizle
+from .guzergah_geometrisi import guzergah_geometrisi
+from .arac_havuzu import arac_havuzu
+from .dosya_onbellegi import parmak_izi
+from .veri_damgasi import damga_yollari
+
+BAGLAM_OMRU = 300
+BAGLAM_DAMGALARI = ('tarife', 'guzergah', 'durak', 'varis')  # Hat, rota, durak adları, araç havuzu
+SIMULASYON_ARAC_SAYISI = 5
+
+
+# =============================================================================
+# SİMÜLASYON ARAÇLARI
+# =============================================================================
+def simulasyon_araclari(ana_hat_no):
+    """
+    Hattın simülasyonda yürütülecek araçları: DurakVaris'te o hatta en çok görülen
+    araçlar (arac_havuzu). Hatta hiç araç kaydı yoksa yedek numaralar üretilir.
+    """
+    gercek_araclar = arac_havuzu().hat_araclari(ana_hat_no, SIMULASYON_ARAC_SAYISI)
+    if len(gercek_araclar) < 3:
+        return [f"{ana_hat_no}-BUS-{i + 100}" for i in range(3)]
+    return list(gercek_araclar)
+
+
+# =============================================================================
+# HAT BAĞLAMI
+# =============================================================================
+class HatBaglami:
+    """Tek hattın statik verisi: güzergah dizileri, durak adları, araç havuzu."""
+
+    __slots__ = ('hat_id', 'ana_hat_no', 'enlem', 'boylam', 'durak_adlari', 'araclar', 'surum', 'zaman')
+
+    def __init__(self, hat_id, ana_hat_no, enlem, boylam, durak_adlari, araclar, surum):
+        self.hat_id = hat_id
+        self.ana_hat_no = ana_hat_no
+        self.enlem = enlem
+        self.boylam = boylam
+        self.durak_adlari = durak_adlari
+        self.araclar = araclar
+        self.surum = surum
+        self.zaman = time.monotonic()
+
+    @classmethod
+    def kur(cls, hat_id, surum):
+        """Hattın bağlamını kurar; hat yoksa None. (2 sorgu + paylaşılan geometri)"""
+        hat = Hat.objects.filter(id=hat_id).values('id', 'ana_hat_no').first()
+        if hat is None:
+            return None
+
+        geometri = guzergah_geometrisi()
+        k = geometri.sira(hat_id)
+        if k is None:
+            enlem = boylam = geometri.enlem[:0]
+        else:
+            bas, bit = geometri.bas[k], geometri.bas[k] + geometri.sayi[k]
+            enlem, boylam = geometri.enlem[bas:bit], geometri.boylam[bas:bit]
+
+        # Durak adları tek JOIN sorgusuyla; araç başına .durak erişimi (ek sorgu) yapılmaz
+        durak_adlari = list(HatDurak.objects.filter(hat_id=hat_id)
+                            .order_by('sira').values_list('durak__durak_adi', flat=True))
+
+        ana_hat_no = hat_no_temizle(hat['ana_hat_no'])
+        return cls(hat['id'], ana_hat_no, enlem, boylam, durak_adlari, simulasyon_araclari(ana_hat_no), surum)
+
+    def __len__(self):
+        return len(self.enlem)
+
+
+class BaglamOnbellegi:
+    """
+    hat_id -> HatBaglami. Veri damgaları ya da genel sürüm değişince veya süre
+    dolunca yeniden kurulur.
+    """
+
+    def __init__(self, omur=BAGLAM_OMRU, damgalar=BAGLAM_DAMGALARI):
+        self.omur = omur
+        self.damgalar = damgalar
+        self.surum = 1
+        self._iz = None
+        self._baglamlar = {}
+        self._kilit = threading.Lock()
+
+    def _gecerli_mi(self, baglam):
+        return baglam.surum == self.surum and time.monotonic() - baglam.zaman < self.omur
+
+    def _damgalari_denetle(self):
+        """Damgalar (başka süreçteki yüklemeler) değiştiyse bütün bağlamları düşürür."""
+        iz = parmak_izi(damga_yollari(*self.damgalar))
+        if iz != self._iz:
+            with self._kilit:
+                if iz != self._iz:
+                    self.surum += 1
+                    self._baglamlar.clear()
+                    self._iz = iz
+
+    def getir(self, hat_id):
+        self._damgalari_denetle()
+        baglam = self._baglamlar.get(hat_id)
+        if baglam is not None and self._gecerli_mi(baglam):
+            return baglam
+        with self._kilit:
+            baglam = self._baglamlar.get(hat_id)
+            if baglam is None or not self._gecerli_mi(baglam):
+                baglam = HatBaglami.kur(hat_id, self.surum)
+                if baglam is None:
+                    self._baglamlar.pop(hat_id, None)
+                    return None
+                self._baglamlar[hat_id] = baglam
+            return baglam
+
+    def gecersiz_kil(self):
+        with self._kilit:
+            self.surum += 1
+            self._baglamlar.clear()
+
+
+# --- SÜREÇ İÇİ ORTAK ÖNBELLEK ---
+BAGLAMLAR = BaglamOnbellegi()
+
+
+def hat_baglami(hat_id):
+    return BAGLAMLAR.getir(int(hat_id))
+
+
+def baglamlari_gecersiz_kil():
+    BAGLAMLAR.gecersiz_kil()
@@ -0,0 +1,220 @@
+"""
+Kapasite ve izdiham analizi (saat x hat doluluk matrisi).
+
+Ağ genelindeki matris TEK geçişte kurulur:
+  - Arz   : HatTarife (tüm gün tipleri) ve aktif EkSefer kayıtlarının
+            (ana hat, saat) bazında GROUP BY sayımları
+  - Talep : talep küpünden (TalepKupu) tek GROUP BY (hat, saat) sorgusu ve
+            hat başına veri bulunan gün sayısı
+Doluluk, periyot çarpanı uygulanarak tüm matris üzerinde vektörel hesaplanır.
+
+Sonuçlar dosya_onbellekli ile saklanır: ağ matrisi bir kez (periyotlar ondan
+türetilir), tek hat analizi ise (hat, periyot) başına. Önbellek anahtarı veri
+damgalarına (veri_damgasi) bağlıdır; ek sefer ekleme /
+silme, tarife ve talep küpü yüklemeleri damgaları yeniler ve sonuçlar TÜM
+worker süreçlerinde bir sonraki istekte yeniden hesaplanır. Ek sefer
+değişikliği sadece ilgili hattın (ve ağ matrisinin) kayıtlarını düşürür.
+"""
+import numpy as np
+import pandas as pd
+from django.db.models import Sum, Count
+from django.db.models.functions import ExtractHour
+
+from .models import TalepKupu, HatTarife, EkSefer
+from .veri_araclari import hat_no_temizle
+from .tarife_motoru import saatlik_planli_sefer
+from .talep_kupu import hat_saatlik_ortalama
+from .dosya_onbellegi import dosya_onbellekli
+from .veri_damgasi import damga_yolu, damgala, ek_sefer_damgasi
+
+OTOBUS_KAPASITESI = 80
+PERIYOT_CARPANLARI = {'daily': 0.5, 'weekly': 7, 'monthly': 30, 'yearly': 365}
+VARSAYILAN_PERIYOT = 'daily'
+ANALIZ_SAATLERI = np.arange(6, 24)
+ASIRI_YUK_ESIGI = 90  # % (Dashboard'daki risk eşiği)
+
+
+def periyot_bul(period):
+    """Bilinmeyen periyotlar günlük sayılır (önbellek anahtarı sınırlı kalsın)."""
+    return period if period in PERIYOT_CARPANLARI else VARSAYILAN_PERIYOT
+
+
+def _bagimliliklar(*damgalar):
+    return [damga_yolu(ad) for ad in ('tarife', 'talep') + damgalar]
+
+
+def _hat_sirasi(hat_no):
+    return (0, int(hat_no), '') if hat_no.isdigit() else (1, 0, hat_no)
+
+
+def doluluk_hesapla(gunluk_sefer, gunluk_yolcu, carpan):
+    """
+    Günlük sefer ve ortalama yolcu dizilerine periyot çarpanını uygular.
+    (sefer, yolcu, kapasite, doluluk %) tamsayı dizileri döner; dizi boyutu serbesttir.
+    Kapasite yokken yolcu varsa doluluk %100 sayılır.
+    """
+    sefer = np.floor(np.asarray(gunluk_sefer, dtype=float) * carpan).astype(np.int64)
+    yolcu = np.round(np.asarray(gunluk_yolcu, dtype=float) * carpan).astype(np.int64)
+    kapasite = sefer * OTOBUS_KAPASITESI
+    oran = np.round(yolcu / np.maximum(kapasite, 1) * 100)
+    doluluk = np.where(kapasite > 0, oran, np.where(yolcu > 0, 100, 0)).astype(np.int64)
+    return sefer, yolcu, kapasite, doluluk
+
+
+# =============================================================================
+# GÜNLÜK TEMEL MATRİS
+# =============================================================================
+class GunlukKapasite:
+    """Hat x 24 saat günlük planlı sefer ve ortalama günlük yolcu matrisleri."""
+
+    def __init__(self, hatlar, sefer, yolcu):
+        self.hatlar = hatlar
+        self.sefer = sefer
+        self.yolcu = yolcu
+        self.sira = {h: i for i, h in enumerate(hatlar)}
+        self._periyotlar = {}
+
+    @classmethod
+    def veritabanindan(cls):
+        """3 toplama sorgusu (planlı sefer, ek sefer, talep) + gün sayıları."""
+        def saatlik(qs):
+            return pd.DataFrame.from_records(
+                qs.annotate(saat=ExtractHour('kalkis_saati')).values('hat__ana_hat_no', 'saat')
+                .annotate(toplam=Count('id')).order_by(), columns=['hat__ana_hat_no', 'saat', 'toplam']
+            ).rename(columns={'hat__ana_hat_no': 'hat_no'})
+
+        planli = saatlik(HatTarife.objects.all())
+        ek = saatlik(EkSefer.objects.filter(aktif=True))
+        talep = pd.DataFrame.from_records(
+            TalepKupu.objects.values('hat_no', 'saat').annotate(toplam=Sum('yolcu')).order_by(),
+            columns=['hat_no', 'saat', 'toplam'])
+        gunler = {hat_no_temizle(h): n for h, n in TalepKupu.objects.values('hat_no')
+                  .annotate(gun=Count('tarih', distinct=True)).order_by().values_list('hat_no', 'gun')}
+        for df in (planli, ek, talep):
+            df['hat_no'] = df['hat_no'].map(hat_no_temizle)
+
+        hatlar = sorted(set(planli['hat_no']) | set(ek['hat_no']) | set(talep['hat_no']), key=_hat_sirasi)
+        sira = {h: i for i, h in enumerate(hatlar)}
+
+        def matris(df):
+            m = np.zeros((len(hatlar), 24), dtype=float)
+            if not df.empty:
+                satir = df['hat_no'].map(sira).to_numpy()
+                saat = df['saat'].to_numpy(dtype=np.int64)
+                gecerli = (saat >= 0) & (saat < 24)
+                np.add.at(m, (satir[gecerli], saat[gecerli]), df['toplam'].to_numpy(dtype=float)[gecerli])
+            return m
+
+        # ARZ: planlı + ek sefer (saat başına)
+        sefer = (matris(planli) + matris(ek)).astype(np.int64)
+
+        # TALEP: ortalama günlük biniş (veri bulunan gün sayısına bölünür)
+        yolcu = matris(talep)
+        gun_sayisi = np.array([gunler.get(h, 0) for h in hatlar], dtype=float)[:, None]
+        yolcu = np.divide(yolcu, gun_sayisi, out=np.zeros_like(yolcu), where=gun_sayisi > 0)
+
+        return cls(hatlar, sefer, yolcu)
+
+    def periyot(self, period):
+        """Periyodun saat x hat matrisi; periyot başına bir kez hesaplanır."""
+        period = periyot_bul(period)
+        sonuc = self._periyotlar.get(period)
+        if sonuc is None:
+            sonuc = self._periyotlar.setdefault(period, KapasiteMatrisi(self, period))
+        return sonuc
+
+
+class KapasiteMatrisi:
+    """Bir periyodun ANALIZ_SAATLERI x hat doluluk matrisi (satır = saat, sütun = hat)."""
+
+    def __init__(self, temel, period):
+        self.period = period
+        self.carpan = PERIYOT_CARPANLARI[period]
+        self.hatlar = temel.hatlar
+        self.sira = temel.sira
+        self.sefer, self.yolcu, self.kapasite, self.doluluk = (
+            m.T for m in doluluk_hesapla(temel.sefer[:, ANALIZ_SAATLERI], temel.yolcu[:, ANALIZ_SAATLERI], self.carpan))
+        self._sozluk = None
+
+    def asiri_yuklu(self, esik=ASIRI_YUK_ESIGI):
+        """Doluluğu eşiği aşan (saat, hat) hücreleri, en yoğun önce."""
+        saat_i, hat_i = np.nonzero(self.doluluk > esik)
+        sira = np.argsort(-self.doluluk[saat_i, hat_i], kind='stable')
+        return [{
+            "hat_no": self.hatlar[hat_i[k]],
+            "saat": f"{ANALIZ_SAATLERI[saat_i[k]]:02d}:00",
+            "doluluk_yuzdesi": int(self.doluluk[saat_i[k], hat_i[k]]),
+        } for k in sira]
+
+    def sozluk(self):
+        """API yanıtı (bir kez kurulur)."""
+        if self._sozluk is None:
+            self._sozluk = {
+                "period": self.period,
+                "saatler": [f"{s:02d}:00" for s in ANALIZ_SAATLERI],
+                "hatlar": list(self.hatlar),
+                "doluluk": self.doluluk.tolist(),
+                "ortalama_yolcu": self.yolcu.tolist(),
+                "sefer_sayisi": self.sefer.tolist(),
+                "kapasite": self.kapasite.tolist(),
+                "asiri_yuklu": self.asiri_yuklu(),
+            }
+        return self._sozluk
+
+
+@dosya_onbellekli(lambda: _bagimliliklar(ek_sefer_damgasi()))
+def gunluk_kapasite():
+    return GunlukKapasite.veritabanindan()
+
+
+def ag_kapasite_matrisi(period=VARSAYILAN_PERIYOT):
+    return gunluk_kapasite().periyot(period)
+
+
+# =============================================================================
+# TEK HAT ANALİZİ
+# =============================================================================
+@dosya_onbellekli(lambda hat_no, period: _bagimliliklar(ek_sefer_damgasi(hat_no)))
+def _hat_kapasitesi(hat_no, period):
+    # 1. ARZ - PLANLI (HatTarife, tüm gün tipleri) + aktif ek seferler
+    sefer_sayilari = saatlik_planli_sefer(hat_no)
+    try:
+        for ek in EkSefer.objects.filter(hat__ana_hat_no=hat_no, aktif=True).values_list('kalkis_saati', flat=True):
+            sefer_sayilari[ek.hour] = sefer_sayilari.get(ek.hour, 0) + 1
+    except Exception as e:
+        print(f"Ek sefer hatası: {e}")
+
+    # 2. TALEP (Talep Küpü: saat bazında ortalama günlük biniş)
+    talep_ort = {}
+    try:
+        talep_ort = hat_saatlik_ortalama(hat_no)
+    except Exception as e:
+        print(f"Talep küpü hatası: {e}")
+
+    # 3. BİRLEŞTİRME
+    sefer, yolcu, kapasite, doluluk = doluluk_hesapla(
+        [sefer_sayilari.get(int(s), 0) for s in ANALIZ_SAATLERI],
+        [talep_ort.get(int(s), 0) for s in ANALIZ_SAATLERI], PERIYOT_CARPANLARI[period])
+    return [{
+        "saat": f"{s:02d}:00",
+        "ortalama_yolcu": int(yolcu[i]),
+        "sefer_sayisi": int(sefer[i]),
+        "kapasite": int(kapasite[i]),
+        "doluluk_yuzdesi": int(doluluk[i]),
+    } for i, s in enumerate(ANALIZ_SAATLERI)]
+
+
+def hat_kapasite_analizi(hat_no, period=VARSAYILAN_PERIYOT):
+    """Ana hattın saatlik kapasite analizi; (hat, periyot) başına önbellekli."""
+    return _hat_kapasitesi(hat_no_temizle(hat_no), periyot_bul(period))
+
+
+def kapasiteyi_gecersiz_kil(ana_hat_no=None):
+    """
+    Kapasite sonuçlarını tüm süreçlerde geçersiz kılar: ana_hat_no verilirse
+    sadece o hattın ek sefer damgası (ve ağ matrisi), yoksa tarife damgası.
+    """
+    if ana_hat_no is None:
+        damgala('tarife')
+    else:
+        damgala(ek_sefer_damgasi(), ek_sefer_damgasi(ana_hat_no))
@@ -0,0 +1,160 @@
+"""
+Araç konumları için sıra numaralı FARK (delta) protokolü.
+
+İstemci son aldığı paketin 'akis' ve 'sira' değerlerini geri gönderir
+(?fark=1&akis=..&sira=..). Sunucu o sıradaki görüntüyü geçmişinde bulursa
+sadece farkı döner, bulamazsa (ilk istek, eski sıra, başka süreç) tam görüntü
+döner:
+
+    {
+      "akis": "3f9c1a", "sira": 42, "tam": false, "olcek": 100000,
+      "eklenen": [[no, id, <sabit alanlar...>, enlem, boylam, <değişken alanlar...>], ...],
+      "degisen": [[no, d_enlem, d_boylam, <değişken alanlar...>], ...],
+      "silinen": [no, ...]
+    }
+
+Her araca akış içinde kısa bir tamsayı 'no' verilir; 'id' ve sabit alanlar
+(arac_no, hedef_durak ...) sadece araç ilk göründüğünde ya da sabit alanı
+değiştiğinde 'eklenen' içinde gönderilir. Koordinatlar sabit noktalı
+tamsayıdır (derece * olcek, ~1 m); 'eklenen' mutlak, 'degisen' istemcinin
+elindeki (son_sira) değere göre farktır. Yerinde duran araçlar gönderilmez.
+Tam görüntüde 'alanlar' sütun sırasını açıklar ve istemci durumunu sıfırlar.
+"""
+import uuid
+import threading
+from collections import deque, OrderedDict
+
+KOORDINAT_OLCEGI = 100000  # 1e-5 derece
+GECMIS_BOYUTU = 30  # Anahtar başına saklanan görüntü sayısı
+AZAMI_ANAHTAR = 1024  # Saklanan akış (hat / ağ) sayısı sınırı
+KOORDINATLAR = ('enlem', 'boylam')
+
+
+def fark_istegi_mi(request):
+    return request.GET.get('fark') in ('1', 'true')
+
+
+def _sabit_nokta(deger):
+    return int(round(float(deger) * KOORDINAT_OLCEGI))
+
+
+class FarkKaydi:
+    """Bir akışın (örn. tek hat) son görüntüleri: sira -> {id: (no, sabit, hareket)}."""
+
+    def __init__(self, degisken):
+        self.akis = uuid.uuid4().hex[:8]
+        self.degisken = tuple(degisken)
+        self.sabit = None  # Sabit alan adları (ilk dolu görüntüden)
+        self.sira = 0
+        self.gecmis = deque(maxlen=GECMIS_BOYUTU)
+        self.numaralar = {}  # id -> no
+        self.sonraki_no = 0
+        self.kaynak = None  # Son kodlanan görüntünün kimliği (tick sırası)
+        self.kilit = threading.Lock()
+
+    def _numara(self, arac_id):
+        no = self.numaralar.get(arac_id)
+        if no is None:
+            no = self.numaralar[arac_id] = self.sonraki_no
+            self.sonraki_no += 1
+        return no
+
+    def _kodla(self, araclar):
+        if self.sabit is None and araclar:
+            # Sütunlar ilk dolu görüntüden belirlenir; önceki (boş) görüntülere fark verilmez
+            self.sabit = tuple(k for k in araclar[0] if k != 'id' and k not in KOORDINATLAR and k not in self.degisken)
+            self.gecmis.clear()
+        durum = {}
+        for a in araclar:
+            sabit = tuple(a.get(k) for k in self.sabit)
+            hareket = (_sabit_nokta(a['enlem']), _sabit_nokta(a['boylam'])) + tuple(a.get(k) for k in self.degisken)
+            durum[a['id']] = (self._numara(a['id']), sabit, hareket)
+        return durum
+
+    def _numaralari_buda(self):
+        # Geçmişte artık hiç görünmeyen araçların numaraları bırakılır
+        if len(self.numaralar) > 4 * max(len(self.gecmis[-1][1]), 64):
+            canli = set().union(*(d.keys() for _, d in self.gecmis))
+            self.numaralar = {i: n for i, n in self.numaralar.items() if i in canli}
+
+    def kaydet(self, araclar, kaynak=None):
+        """
+        Görüntüyü kodlar; öncekinden farklıysa yeni sıra numarası verir.
+        kaynak (örn. tick sırası) son kodlananla aynıysa tekrar kodlanmaz.
+        """
+        if kaynak is not None and kaynak == self.kaynak and self.gecmis:
+            return self.gecmis[-1]
+        self.kaynak = kaynak
+        durum = self._kodla(araclar)
+        if not self.gecmis or self.gecmis[-1][1] != durum:
+            self.sira += 1
+            self.gecmis.append((self.sira, durum))
+            self._numaralari_buda()
+        return self.gecmis[-1]
+
+    def bul(self, sira):
+        for s, durum in self.gecmis:
+            if s == sira:
+                return durum
+        return None
+
+    def paket(self, araclar, akis=None, son_sira=None, kaynak=None):
+        with self.kilit:
+            sira, durum = self.kaydet(araclar, kaynak)
+            onceki = self.bul(son_sira) if akis == self.akis and son_sira is not None else None
+
+        paket = {"akis": self.akis, "sira": sira, "tam": onceki is None, "olcek": KOORDINAT_OLCEGI}
+        if onceki is None:
+            paket["alanlar"] = {
+                "eklenen": ['no', 'id', *(self.sabit or ()), *KOORDINATLAR, *self.degisken],
+                "degisen": ['no', *('d_' + k for k in KOORDINATLAR), *self.degisken],
+            }
+            paket["eklenen"] = [[no, i, *s, *h] for i, (no, s, h) in durum.items()]
+            paket["degisen"], paket["silinen"] = [], []
+            return paket
+
+        eklenen, degisen = [], []
+        for i, (no, s, h) in durum.items():
+            eski = onceki.get(i)
+            if eski is None or eski[1] != s:
+                eklenen.append([no, i, *s, *h])
+            elif eski[2] != h:
+                degisen.append([no, h[0] - eski[2][0], h[1] - eski[2][1], *h[2:]])
+        paket["eklenen"], paket["degisen"] = eklenen, degisen
+        paket["silinen"] = [no for i, (no, _, _) in onceki.items() if i not in durum]
+        return paket
+
+
+class FarkDeposu:
+    """Anahtar -> FarkKaydi (en son kullanılanlar tutulur)."""
+
+    def __init__(self, azami=AZAMI_ANAHTAR):
+        self.azami = azami
+        self._kayitlar = OrderedDict()
+        self._kilit = threading.Lock()
+
+    def kayit(self, anahtar, degisken):
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is None:
+                kayit = self._kayitlar[anahtar] = FarkKaydi(degisken)
+                while len(self._kayitlar) > self.azami:
+                    self._kayitlar.popitem(last=False)
+            self._kayitlar.move_to_end(anahtar)
+            return kayit
+
+
+# --- SÜREÇ İÇİ ORTAK DEPO ---
+DEPO = FarkDeposu()
+
+
+def fark_paketi(request, anahtar, araclar, degisken=('kalan_sure_dk',), kaynak=None):
+    """
+    İsteğin akis/sira parametrelerine göre araç listesinin fark paketini üretir.
+    kaynak: görüntü kimliği; aynı görüntü için gelen istekler yeniden kodlama yapmaz.
+    """
+    try:
+        son_sira = int(request.GET['sira']) if request.GET.get('sira') else None
+    except ValueError:
+        son_sira = None
+    return DEPO.kayit(anahtar, degisken).paket(araclar, request.GET.get('akis'), son_sira, kaynak)
@@ -0,0 +1,190 @@
+"""
+Ağ geneli, vektörel araç konum motoru.
+
+Tüm hatların sefer kalkışları (HatTarife + aktif EkSefer) bir kez NumPy
+dizilerine yüklenir; güzergahlar ve duraklar ortak önbelleklerden gelir:
+
+    seferler  : kalkış dakikasına göre SIRALI (dakika, hat sırası, sefer id, ek mi, gün tipi)
+    güzergah  : Guzergahlar (kümülatif mesafe dizileri, hat sırası buradan)
+    profiller : SeferProfilleri (duraklar + saatlik kümülatif durak arası süreler)
+
+Her HatTarife satırı tek bir araçtır: kendi Hat kaydında (o Hat'ın güzergahı
+yoksa aynı ana hattın güzergahı olan ilk Hat'ında) ve sadece kendi gün tipinde
+(H/C/P) yürür; ek seferler her gün geçerlidir.
+
+Her tick'te yoldaki seferler ikili arama ile bulunur ([şimdi - en uzun sefer,
+şimdi] aralığı, günün gün tipi); gece yarısını geçen seferler için önceki
+günün (kendi gün tipiyle) seferlerine de bakılır. Tüm hatların araç konumları
+tek bir vektörel geçişte hesaplanır. Sefer süresi, bulunulan durak aralığı ve hedef durak, kalkış
+saatinin DurakVaris profilinden (sefer_profili) okunur; veri olmayan hatlarda
+60 dk'lık doğrusal ilerleme kullanılır. Konum güzergah mesafesi üzerinden
+ara değerlenir.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+
+from .models import Hat, HatTarife, EkSefer
+from .veri_araclari import hat_no_temizle
+from .tarife_motoru import dakika_metni, gun_tipi_bul, GUN_TIPLERI
+from .dosya_onbellegi import SureliNesne
+from .veri_damgasi import damga_yollari
+from .guzergah_geometrisi import Guzergahlar
+from .sefer_profili import SeferProfilleri, sefer_profilleri
+
+AG_OMRU = 60
+AG_DAMGALARI = ('tarife', 'ek_sefer', 'guzergah', 'durak', 'varis')
+HER_GUN = -1  # sefer_gun: ek seferler gün tipinden bağımsız
+
+
+class AgDurumu:
+    """Ağın statik verisi (seferler, güzergahlar, duraklar) ve vektörel konum hesabı."""
+
+    def __init__(self, profil=None):
+        self.profil = profil if profil is not None else SeferProfilleri(Guzergahlar([], [], []))
+        self.geometri = self.profil.geometri
+        self.hat_idleri = self.geometri.hat_idleri
+        self.hat_sirasi = self.geometri.hat_sirasi  # Hat.id -> dizilerdeki sıra
+        self.hat_anahtarlari = []  # sıra -> ana hat no
+        self.sefer_dk = np.empty(0, dtype=np.float64)
+        self.sefer_hat = self.sefer_id = np.empty(0, dtype=np.int64)
+        self.sefer_ek = np.empty(0, dtype=bool)
+        self.sefer_gun = np.empty(0, dtype=np.int8)  # GUN_TIPLERI sırası / HER_GUN
+        self.sefer_arac = np.empty(0, dtype=object)
+
+    @classmethod
+    def veritabanindan(cls):
+        """
+        Tüm ağı 3 sorguyla yükler (güzergah ve duraklar ortak önbelleklerden gelir).
+        Güzergahı olmayan hatlar ağa alınmaz.
+        """
+        ag = cls(sefer_profilleri())
+
+        # 1. Ana hat numaraları; güzergahı olmayan Hat'ların seferleri için aynı
+        #    ana hattın güzergahı olan ilk Hat'ı (en küçük id)
+        ana_hatlar = {h: hat_no_temizle(a) for h, a in Hat.objects.values_list('id', 'ana_hat_no')}
+        ag.hat_anahtarlari = [ana_hatlar.get(int(h), '') for h in ag.hat_idleri]
+        ana_yedek = {}
+        for h in sorted(ag.hat_sirasi):
+            ana_yedek.setdefault(ana_hatlar.get(h, ''), ag.hat_sirasi[h])
+
+        def hat_sirasi(hat_id):
+            k = ag.hat_sirasi.get(hat_id)
+            return k if k is not None else ana_yedek.get(ana_hatlar.get(hat_id))
+
+        # 2. Seferler: her tarife satırı tek araç (kendi Hat'ı, kendi gün tipi)
+        gun_kodlari = {kod: i for i, kod in enumerate(GUN_TIPLERI)}
+        dk, hat, sefer_id, ek, gun, arac = [], [], [], [], [], []
+        for tarife_id, h, tip, z in HatTarife.objects.values_list('id', 'hat_id', 'tarife_tipi', 'kalkis_saati'):
+            k = hat_sirasi(h)
+            if k is None:
+                continue
+            dk.append(z.hour * 60 + z.minute)
+            hat.append(k)
+            sefer_id.append(tarife_id)
+            ek.append(False)
+            gun.append(gun_kodlari.get(tip, gun_kodlari['H']))
+            arac.append(ag.hat_anahtarlari[k])
+        for ek_id, h, z, arac_no in EkSefer.objects.filter(aktif=True).values_list(
+                'id', 'hat_id', 'kalkis_saati', 'arac_no'):
+            k = hat_sirasi(h)
+            if k is None:
+                continue
+            dk.append(z.hour * 60 + z.minute)
+            hat.append(k)
+            sefer_id.append(ek_id)
+            ek.append(True)
+            gun.append(HER_GUN)
+            arac.append(arac_no)
+
+        sira = np.argsort(np.asarray(dk, dtype=np.float64), kind='stable')
+        ag.sefer_dk = np.asarray(dk, dtype=np.float64)[sira]
+        ag.sefer_hat = np.asarray(hat, dtype=np.int64)[sira]
+        ag.sefer_id = np.asarray(sefer_id, dtype=np.int64)[sira]
+        ag.sefer_ek = np.asarray(ek, dtype=bool)[sira]
+        ag.sefer_gun = np.asarray(gun, dtype=np.int8)[sira]
+        ag.sefer_arac = np.array(arac + [None], dtype=object)[:-1][sira]
+        return ag
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(
+            v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+
+    def anlik(self, simdi=None, hat_id=None):
+        """
+        Yoldaki tüm araçların konumlarını tek vektörel geçişte hesaplar.
+        hat_id verilirse sadece o hattın araçları döner. Her araç:
+        id, hat_id, arac_no, enlem, boylam, durum, kalan_sure_dk, hedef_durak.
+        """
+        simdi = simdi or datetime.now()
+        simdi_sn = simdi.hour * 3600 + simdi.minute * 60 + simdi.second + simdi.microsecond / 1e6
+
+        # 1. Yoldaki seferler: kalkış ∈ [şimdi - en uzun sefer, şimdi], bugünün gün tipi;
+        #    pencere gece yarısından önceye taşıyorsa dünün (kendi gün tipiyle) seferleri de
+        gunler = [(simdi_sn, gun_tipi_bul(simdi))]
+        if simdi_sn < self.profil.azami_sure:
+            gunler.append((simdi_sn + 86400, gun_tipi_bul(simdi - timedelta(days=1))))
+        secimler, gecenler = [], []
+        for an_sn, kod in gunler:
+            bas = np.searchsorted(self.sefer_dk, (an_sn - self.profil.azami_sure) / 60, side='left')
+            bit = np.searchsorted(self.sefer_dk, min(an_sn, 86400) / 60, side='right')
+            s = np.arange(bas, bit)
+            g = self.sefer_gun[s]
+            s = s[(g == GUN_TIPLERI.index(kod)) | (g == HER_GUN)]
+            secimler.append(s)
+            gecenler.append(an_sn - self.sefer_dk[s] * 60)
+        secim, gecen_sn = np.concatenate(secimler), np.concatenate(gecenler)
+        if hat_id is not None:
+            k = self.hat_sirasi.get(int(hat_id))
+            if k is None:
+                return []
+            maske = self.sefer_hat[secim] == k
+            secim, gecen_sn = secim[maske], gecen_sn[maske]
+
+        # 2. Profil: kalkış saatine göre sefer süresi, katedilen mesafe ve hedef durak
+        hat = self.sefer_hat[secim]
+        saat = (self.sefer_dk[secim] // 60).astype(np.int64)
+        toplam_sn, mesafe, hedef = self.profil.ilerleme(hat, saat, gecen_sn)
+
+        yolda = (gecen_sn >= 0) & (gecen_sn <= toplam_sn)
+        secim, hat, gecen_sn = secim[yolda], hat[yolda], gecen_sn[yolda]
+        toplam_sn, mesafe, hedef = toplam_sn[yolda], mesafe[yolda], hedef[yolda]
+        if not len(secim):
+            return []
+
+        # 3. Koordinat: güzergah üzerinde katedilen mesafe (ara değerleme)
+        enlem, boylam = self.geometri.mesafedeki_konum(hat, mesafe)
+        hedef = self.profil.hedef_adlari(hedef)
+
+        kalan_dk = ((toplam_sn - gecen_sn) / 60).astype(np.int64)
+        dakika = self.sefer_dk[secim].astype(np.int64)
+        ek = self.sefer_ek[secim]
+
+        araclar = []
+        for i, s in enumerate(secim.tolist()):
+            k = int(hat[i])
+            kod = f"EK-{self.sefer_arac[s]}" if ek[i] else f"{self.hat_anahtarlari[k]}-{dakika_metni(int(dakika[i]))}"
+            araclar.append({
+                "id": f"{kod}_{int(self.sefer_id[s])}",
+                "hat_id": int(self.hat_idleri[k]),
+                "arac_no": self.sefer_arac[s],
+                "enlem": float(enlem[i]), "boylam": float(boylam[i]),
+                "durum": 'kritik' if ek[i] else 'normal',
+                "kalan_sure_dk": int(kalan_dk[i]),
+                "hedef_durak": hedef[i],
+            })
+        return araclar
+
+
+# --- SÜREÇ İÇİ AĞ DURUMU ---
+# Yükleme komutları / ek sefer değişiklikleri damgaları yeniler; ağ bütün
+# süreçlerde bir sonraki tick'te yeniden kurulur.
+_AG = SureliNesne(lambda: AgDurumu.veritabanindan(), AG_OMRU, dosya_bulucu=lambda: damga_yollari(*AG_DAMGALARI))
+
+
+def agi_gecersiz_kil():
+    _AG.gecersiz_kil()
+
+
+def ag_durumu():
+    """Güncel ağ durumunu döner; veri değişince ilk sorguda yeniden kurulur."""
+    return _AG.getir()
@@ -1,12 +1,7 @@
-import os
 from django.core.management.base import BaseCommand
-from api.models import Hat
 
-# ml_models dosyasından demand_predictor nesnesini çağırıyoruz
-try:
-    from api.ml_models import demand_predictor
-except ImportError:
-    demand_predictor = None
+from api.prophet_egitimi import prophet_sinifi
+from api.egitim_yoneticisi import egit, ISCI_SAYISI, MANIFEST_YOLU
 
 
 class Command(BaseCommand):
@@ -15,37 +10,37 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         # --egit parametresini sisteme tanıtıyoruz
         parser.add_argument('--egit', action='store_true', help='Talep tahmin modellerini eğitir')
+        parser.add_argument('--akis', action='store_true',
+                            help='Eğitim verisini küp yerine sütunsal depodan akış modunda toplar (düşük bellek)')
+        parser.add_argument('--isci', type=int, default=ISCI_SAYISI,
+                            help=f'Paralel eğitim süreci sayısı (varsayılan: {ISCI_SAYISI})')
+        parser.add_argument('--devam', action='store_true',
+                            help='Önceki eğitim yarıda kaldıysa tamamlanan hatları atlayıp devam eder')
+        parser.add_argument('--hat', nargs='+', help='Sadece verilen ana hatları eğitir')
 
     def handle(self, *args, **options):
         # Eğer --egit parametresi varsa burası çalışır
         if options['egit']:
-            if not demand_predictor:
-                self.stdout.write(self.style.ERROR("HATA: ml_models.py yüklenemedi veya Prophet kütüphanesi eksik."))
+            if prophet_sinifi() is None:
+                self.stdout.write(self.style.ERROR("HATA: Prophet kütüphanesi eksik."))
                 return
 
             self.stdout.write(self.style.WARNING("Yapay Zeka Eğitimi Başlıyor..."))
 
-            # Veritabanındaki tüm hatları çek
-            hatlar = Hat.objects.all().order_by('ana_hat_no')
+            manifest = egit(hatlar=options['hat'], isci_sayisi=options['isci'], devam=options['devam'],
+                            akis=options['akis'], yazdir=self.stdout.write)
 
-            if not hatlar.exists():
+            if not manifest.hatlar:
                 self.stdout.write(
                     self.style.ERROR("Veritabanında kayıtlı hat bulunamadı! Önce hat verilerini yükleyin."))
                 return
 
-            basarili = 0
-            for hat in hatlar:
-                hat_no = str(hat.ana_hat_no)
-                self.stdout.write(f"Hat {hat_no} eğitiliyor...")
-
-                # Eğitimi başlat
-                sonuc = demand_predictor.train_model(hat_no)
-                self.stdout.write(f"   -> {sonuc}")
-
-                if "başarıyla" in str(sonuc) or "eğitildi" in str(sonuc):
-                    basarili += 1
-
-            self.stdout.write(self.style.SUCCESS(f"İŞLEM TAMAMLANDI! Toplam {basarili} model güncellendi."))
+            ozet = manifest.ozet()
+            self.stdout.write(self.style.SUCCESS(
+                f"İŞLEM TAMAMLANDI! Toplam {ozet.get('tamam', 0)} model güncellendi "
+                f"({ozet.get('veri_yok', 0)} hat veri yok, {ozet.get('hata', 0)} hata). Manifest: {MANIFEST_YOLU}"))
+            if ozet.get('hata'):
+                self.stdout.write(self.style.WARNING("Hatalı hatları yeniden denemek için: --egit --devam"))
 
         else:
-            self.stdout.write("Lütfen komutu şöyle kullanın: python manage.py analiz_araclar --egit")
\ No newline at end of file
+            self.stdout.write("Lütfen komutu şöyle kullanın: python manage.py analiz_araclar --egit")
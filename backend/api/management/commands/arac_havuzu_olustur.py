@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.arac_havuzu import havuzu_yeniden_olustur, ARAC_HAVUZU_DOSYASI
+
+
+class Command(BaseCommand):
+    help = 'Hat -> araç havuzu indeksini DurakVaris.arac_no verisinden kurar (veri_seti/_depo/arac_havuzu.json).'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Araç havuzu kuruluyor...")
+        havuz = havuzu_yeniden_olustur()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(havuz.hatlar)} hat, {len(havuz)} araç indekslendi -> {ARAC_HAVUZU_DOSYASI}"))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from api.models import Hat, HatDurak, HatGuzergah, Durak
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -53,5 +54,6 @@ class Command(BaseCommand):
 
             self.stdout.write(f"Hat {hat.ana_hat_no}: {durak_sayisi} durak rotaya oturtuldu.", ending='\r')
 
+        damgala('durak')  # Önbellekler bir kez yenilensin
         self.stdout.write(self.style.SUCCESS(
             f"\n\nİŞLEM TAMAM! Toplam {duzeltilen_durak_sayisi} durağın konumu rotaya göre güncellendi."))
\ No newline at end of file
@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from django.core.management.base import BaseCommand
 from api.models import Durak
+from api.veri_semasi import sema_bul, okuma_ayarlari
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -25,15 +27,9 @@ class Command(BaseCommand):
         self.stdout.write("Dosya bulundu, okuma başlıyor...")
 
         try:
-            # 2. CSV'yi Oku (Ayırıcı ; veya , olabilir)
-            try:
-                # Önce noktalı virgül dene (Genelde Türkçe CSV'ler böyledir)
-                df = pd.read_csv(csv_path, sep=';', encoding='utf-8-sig', on_bad_lines='skip', dtype=str)
-                if len(df.columns) < 2:  # Eğer tek kolon okuduysa ayırıcı yanlıştır
-                    raise ValueError
-            except:
-                # Virgül dene
-                df = pd.read_csv(csv_path, sep=',', encoding='utf-8-sig', on_bad_lines='skip', dtype=str)
+            # 2. CSV'yi Oku (Ayırıcı ve kodlama şema kaydından gelir)
+            sema = sema_bul(csv_path)
+            df = pd.read_csv(csv_path, on_bad_lines='skip', **okuma_ayarlari(sema))
 
             # 3. Kolon İsimlerini Temizle
             df.columns = [c.strip().upper() for c in df.columns]
@@ -70,6 +66,7 @@ class Command(BaseCommand):
                         if updated_count % 100 == 0:
                             self.stdout.write(f"{updated_count} durak güncellendi...", ending='\r')
 
+            damgala('durak')  # Önbellekler bir kez yenilensin
             self.stdout.write(
                 self.style.SUCCESS(f"\nİŞLEM TAMAM! Toplam {updated_count} durağın ismi gerçek isme dönüştürüldü."))
 
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.elkart_deposu import depoyu_guncelle, elkart_dosyalari, ELKART_DEPO_KLASORU
+
+
+class Command(BaseCommand):
+    help = 'Elkart CSV dosyalarını hat bazında bölümlenmiş sütunsal (.npy) depoya dönüştürür.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zorla', action='store_true', help='Güncel olsa bile tüm dosyaları yeniden dönüştürür')
+
+    def handle(self, *args, **options):
+        dosyalar = elkart_dosyalari()
+        if not dosyalar:
+            self.stdout.write(self.style.ERROR("veri_seti klasöründe elkart*.csv dosyası bulunamadı."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{len(dosyalar)} elkart dosyası kontrol ediliyor..."))
+        donusturulen = depoyu_guncelle(zorla=options['zorla'])
+
+        for ad in donusturulen:
+            self.stdout.write(f"   -> {ad} dönüştürüldü.")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ İŞLEM TAMAMLANDI! {len(donusturulen)} dosya güncellendi. Depo: {ELKART_DEPO_KLASORU}"))
@@ -1,6 +1,7 @@
 import random
 from django.core.management.base import BaseCommand
 from api.models import Durak
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -34,4 +35,5 @@ class Command(BaseCommand):
             if batch and len(batch) % 100 == 0:
                 self.stdout.write(".", ending="")
 
+        damgala('durak')  # Önbellekler bir kez yenilensin
         self.stdout.write(self.style.SUCCESS(f'\nBAŞARILI! {toplam} durağa koordinat atandı.'))
\ No newline at end of file
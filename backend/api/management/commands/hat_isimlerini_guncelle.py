@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from django.core.management.base import BaseCommand
 from api.models import Hat
+from api.veri_semasi import sema_bul, okuma_ayarlari
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -19,16 +21,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING(f"Hat bilgileri okunuyor: {dosya_yolu}"))
 
         try:
-            # 2. CSV OKUMA (Encoding ve Ayırıcı Denemeleri)
-            try:
-                # Genelde noktalı virgül ve Türkçe karakter içerir
-                df = pd.read_csv(dosya_yolu, sep=';', encoding='utf-8-sig', dtype=str, on_bad_lines='skip')
-            except:
-                try:
-                    df = pd.read_csv(dosya_yolu, sep=';', encoding='cp1254', dtype=str, on_bad_lines='skip')
-                except:
-                    # Virgül ile ayrılmış olabilir
-                    df = pd.read_csv(dosya_yolu, sep=',', encoding='utf-8', dtype=str, on_bad_lines='skip')
+            # 2. CSV OKUMA (Ayırıcı ve kodlama şema kaydından gelir)
+            sema = sema_bul(dosya_yolu)
+            df = pd.read_csv(dosya_yolu, on_bad_lines='skip', **okuma_ayarlari(sema))
 
             # Sütun isimlerini temizle (Boşlukları sil, büyüt)
             df.columns = [c.strip().upper() for c in df.columns]
@@ -74,6 +69,7 @@ class Command(BaseCommand):
                 except Exception as e:
                     continue
 
+            damgala('tarife')  # Önbellekler bir kez yenilensin
             self.stdout.write(
                 self.style.SUCCESS(f"\n✅ İŞLEM TAMAM! Toplam {guncellenen_sayisi} hattın ismi güncellendi."))
 
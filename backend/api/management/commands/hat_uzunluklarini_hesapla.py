@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from api.guzergah_geometrisi import hat_uzunluklarini_guncelle
+
+
+class Command(BaseCommand):
+    help = 'Hat.uzunluk_km alanlarını güzergah noktalarından (haversine) yeniden hesaplar.'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Hat uzunlukları hesaplanıyor...")
+        sayi = hat_uzunluklarini_guncelle()
+        self.stdout.write(self.style.SUCCESS(f"✅ {sayi} hattın uzunluğu güncellendi."))
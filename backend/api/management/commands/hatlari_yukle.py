@@ -3,6 +3,8 @@ import pandas as pd
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from api.models import Hat, Durak, TalepVerisi, DurakVaris
+from api.veri_semasi import sema_bul, okuma_ayarlari
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -20,6 +22,8 @@ class Command(BaseCommand):
         DurakVaris.objects.all().delete()
         Hat.objects.all().delete()
         Durak.objects.all().delete()
+        # Hat silme tarife / güzergah / durak ilişkilerine yayılır; damgalar toplu işlemden sonra bir kez
+        damgala('tarife', 'guzergah', 'durak', 'varis')
 
         self.stdout.write(self.style.SUCCESS('--- ✅ TEMİZLİK BİTTİ. SIFIRDAN YÜKLEME BAŞLIYOR ---'))
 
@@ -36,16 +40,11 @@ class Command(BaseCommand):
 
             if not os.path.exists(dosya_yolu):
                 dosya_yolu = os.path.join(data_path, 'tarifeler.xlsx - Sheet1.csv')
-                sep = ','
-            else:
-                sep = ';'
 
             self.stdout.write(f"📂 Okunuyor: {os.path.basename(dosya_yolu)}")
 
-            try:
-                df_hat = pd.read_csv(dosya_yolu, sep=sep, dtype=str, encoding='utf-8')
-            except UnicodeDecodeError:
-                df_hat = pd.read_csv(dosya_yolu, sep=sep, dtype=str, encoding='latin-1')
+            # Ayırıcı ve kodlama şema kaydından gelir
+            df_hat = pd.read_csv(dosya_yolu, **okuma_ayarlari(sema_bul(dosya_yolu)))
 
             df_hat.columns = df_hat.columns.str.strip().str.lower()
 
@@ -79,10 +78,7 @@ class Command(BaseCommand):
             if os.path.exists(dosya_yolu):
                 self.stdout.write(f"📂 Okunuyor: {dosya_adi}")
 
-                try:
-                    df_durak = pd.read_csv(dosya_yolu, sep=';', dtype=str, encoding='utf-8')
-                except UnicodeDecodeError:
-                    df_durak = pd.read_csv(dosya_yolu, sep=';', dtype=str, encoding='latin-1')
+                df_durak = pd.read_csv(dosya_yolu, **okuma_ayarlari(sema_bul(dosya_yolu)))
 
                 df_durak.columns = df_durak.columns.str.strip().str.lower()
 
@@ -119,4 +115,6 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.ERROR('Durak dosyasında "Durak No" sütunu bulunamadı!'))
 
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Duraklar yüklenirken hata: {e}'))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f'Duraklar yüklenirken hata: {e}'))
+
+        damgala('tarife', 'durak')  # Yeni hat / durak kayıtları (bulk_create sinyal üretmez)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.talep_kupu import kupu_guncelle
+from api.models import TalepKupu
+
+
+class Command(BaseCommand):
+    help = 'Elkart verilerinden Hat x Tarih x Saat talep küpünü (artımlı) günceller.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zorla', action='store_true', help='Tüm kaynakları yeniden işler')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("Talep küpü güncelleniyor..."))
+        guncellenen = kupu_guncelle(zorla=options['zorla'])
+
+        for ad in guncellenen:
+            self.stdout.write(f"   -> {ad} küpe işlendi.")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ İŞLEM TAMAMLANDI! {len(guncellenen)} kaynak güncellendi, küpte {TalepKupu.objects.count()} hücre var."))
@@ -3,6 +3,9 @@ import pandas as pd
 import numpy as np
 from django.core.management.base import BaseCommand
 from api.models import Hat, Durak, HatGuzergah, HatDurak, HatTarife
+from api.tarife_motoru import tarifeleri_veritabanina_yukle
+from api.guzergah_geometrisi import hat_uzunluklarini_guncelle
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -12,7 +15,6 @@ class Command(BaseCommand):
         base_path = r"C:\Users\Quantum\PycharmProjects\KonyaBusProject\veri_seti"
         dosya_guzergah = os.path.join(base_path, "guzergah.csv")
         dosya_hatdurak = os.path.join(base_path, "hatdurak.csv")
-        dosya_tarife = os.path.join(base_path, "tarifeler.xlsx - Sheet1.csv")
 
         self.stdout.write(self.style.WARNING("⚠️  VERİTABANI SIFIRLANIYOR..."))
         HatGuzergah.objects.all().delete()
@@ -74,6 +76,7 @@ class Command(BaseCommand):
 
             if rota_batch: HatGuzergah.objects.bulk_create(rota_batch)
             self.stdout.write("   -> Rota yüklendi.")
+            self.stdout.write(f"   -> {hat_uzunluklarini_guncelle()} hattın uzunluğu hesaplandı.")
 
         # --- 2. DURAKLARI VE İSTİKAMETİ YÜKLE ---
         self.stdout.write("2. Duraklar ve İstikametler yükleniyor...")
@@ -137,33 +140,15 @@ class Command(BaseCommand):
 
         # --- 4. TARİFELERİ YÜKLE ---
         self.stdout.write("4. Sefer saatleri yükleniyor...")
-        if os.path.exists(dosya_tarife):
-            try:
-                df_tarife = pd.read_csv(dosya_tarife, sep=',', encoding='utf-8-sig', dtype=str)
-                tarife_batch = []
-                for _, row in df_tarife.iterrows():
-                    try:
-                        # CSV yapısı: Hat No, Alt Hat No...
-                        ana = str(row.iloc[0]).strip()
-                        # Alt hat sütunu bazen "0 - HOCAFAKIH" gibi geliyor, sadece 0'ı alalım
-                        alt_raw = str(row.iloc[1])
-                        alt = alt_raw.split(' ')[0].split('-')[0].strip()
-
-                        h_key = f"{ana}-{alt}"
-                        hat = hat_db.get(h_key)
-
-                        if hat:
-                            tarife_batch.append(HatTarife(
-                                hat=hat,
-                                kalkis_saati=row.iloc[2].strip(),  # Saat sütunu
-                                yon=row.iloc[4].strip()  # Çıkış/Varış
-                            ))
-                    except:
-                        continue
-
-                if tarife_batch: HatTarife.objects.bulk_create(tarife_batch)
-                self.stdout.write("   -> Tarifeler yüklendi.")
-            except Exception as e:
-                self.stdout.write(f"   -> Tarife hatası: {e}")
-
+        try:
+            sonuc = tarifeleri_veritabanina_yukle()
+            if sonuc is None:
+                self.stdout.write("   -> Tarife dosyası bulunamadı.")
+            else:
+                self.stdout.write(f"   -> {sonuc['yuklenen']} sefer saati yüklendi.")
+        except Exception as e:
+            self.stdout.write(f"   -> Tarife hatası: {e}")
+
+        # Durak silme DurakVaris'i de (cascade) temizler
+        damgala('tarife', 'guzergah', 'durak', 'varis')
         self.stdout.write(self.style.SUCCESS("\n✅ KURULUM BAŞARIYLA TAMAMLANDI! SUNUCUYU YENİDEN BAŞLATIN."))
\ No newline at end of file
@@ -0,0 +1,39 @@
+import os
+import glob
+
+from django.core.management.base import BaseCommand
+
+from api.prophet_egitimi import MODEL_DIR
+from api.paralel_okuyucu import paralel_calistir
+from api.tahmin_deposu import hat_tahminini_guncelle, TAHMIN_KLASORU
+
+
+class Command(BaseCommand):
+    help = ('Eğitilmiş Prophet modellerinin saatlik tahmin deposunu yeniler. '
+            'Zamanlanmış görev olarak (örn. her gece) çalıştırılır; sadece ufku azalan hatlar yeniden hesaplanır.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hat', nargs='+', help='Sadece verilen ana hatları yeniler')
+        parser.add_argument('--zorla', action='store_true', help='Ufku yeterli olsa da tüm tahminleri yeniden hesaplar')
+
+    def handle(self, *args, **options):
+        hatlar = options['hat'] or sorted(
+            os.path.basename(p)[len('prophet_hat_'):-len('.pkl')]
+            for p in glob.glob(os.path.join(MODEL_DIR, 'prophet_hat_*.pkl')))
+        if not hatlar:
+            self.stdout.write(self.style.ERROR("Eğitilmiş model bulunamadı! Önce: python manage.py analiz_araclar --egit"))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{len(hatlar)} hattın tahmin deposu kontrol ediliyor..."))
+        sayilar = {}
+        for sonuc in paralel_calistir(hat_tahminini_guncelle, [(h, options['zorla']) for h in hatlar]):
+            if sonuc is None:
+                continue
+            hat_no, durum, ek = sonuc
+            sayilar[durum] = sayilar.get(durum, 0) + 1
+            if durum != 'guncel':
+                self.stdout.write(f"   -> Hat {hat_no}: {durum}" + (f" ({ek})" if ek else ""))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ İŞLEM TAMAMLANDI! {sayilar.get('yenilendi', 0)} yenilendi, {sayilar.get('guncel', 0)} güncel, "
+            f"{sayilar.get('hata', 0)} hata. Depo: {TAHMIN_KLASORU}"))
@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from django.core.management.base import BaseCommand
 from api.models import Hat, HatGuzergah, HatDurak
+from api.guzergah_geometrisi import hat_uzunluklarini_guncelle
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -21,6 +23,7 @@ class Command(BaseCommand):
         self.stdout.write("2. Rota verisi yükleniyor...")
         if not os.path.exists(dosya_yolu):
             self.stdout.write(self.style.ERROR(f"DOSYA BULUNAMADI: {dosya_yolu}"))
+            damgala('guzergah')  # Rota silindi
             return
 
         df = pd.read_csv(dosya_yolu, sep=';', encoding='utf-8-sig', dtype=str)
@@ -76,6 +79,7 @@ class Command(BaseCommand):
 
         if batch: HatGuzergah.objects.bulk_create(batch)
         self.stdout.write(self.style.SUCCESS(f"\n   -> Toplam {count} rota noktası yüklendi."))
+        self.stdout.write(f"   -> {hat_uzunluklarini_guncelle()} hattın uzunluğu hesaplandı.")
 
         # 3. DURAKLARI ROTAYA OTURTMA
         self.stdout.write("3. Duraklar rotanın üzerine çivileniyor...")
@@ -99,4 +103,5 @@ class Command(BaseCommand):
                 d.save()
                 duzeltilen += 1
 
+        damgala('guzergah', 'durak')  # Toplu işlemden sonra bir kez: önbellekler yenilensin
         self.stdout.write(self.style.SUCCESS(f"✅ İŞLEM BİTTİ! {duzeltilen} durak haritaya yerleştirildi."))
\ No newline at end of file
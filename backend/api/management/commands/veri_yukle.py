@@ -4,6 +4,8 @@ from django.core.management.base import BaseCommand
 from django.utils.timezone import make_aware
 from datetime import datetime
 from api.models import Hat, Durak, HatDurak, DurakVaris
+from api.arac_havuzu import havuzu_yeniden_olustur
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -27,6 +29,9 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'❌ KRİTİK HATA: {str(e)}'))
 
+        # Toplu yükleme bitti: profil / ağ / havuz / bağlam önbellekleri bir kez yenilensin
+        damgala('tarife', 'durak', 'varis')
+
     def yukle_hatlar(self, dosya_yolu):
         if not os.path.exists(dosya_yolu):
             self.stdout.write(self.style.WARNING(f'⚠️ Dosya yok: {dosya_yolu}'))
@@ -176,5 +181,9 @@ class Command(BaseCommand):
             DurakVaris.objects.bulk_create(batch)
 
         self.stdout.write(self.style.SUCCESS(f'\n✅ İŞLEM TAMAMLANDI! Toplam {count} Durak Varış verisi yüklendi.'))
+
+        # Araç havuzu indeksi yeni varış verisiyle yeniden kurulsun
+        havuz = havuzu_yeniden_olustur()
+        self.stdout.write(f"   -> Araç havuzu: {len(havuz.hatlar)} hat, {len(havuz)} araç.")
         if hatalar > 0:
             self.stdout.write(self.style.WARNING(f"⚠️ Toplam {hatalar} satır hatalı olduğu için atlandı."))
\ No newline at end of file
@@ -2,6 +2,7 @@ import os
 import pandas as pd
 from django.core.management.base import BaseCommand
 from api.models import Hat, Durak, HatDurak
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -114,4 +115,6 @@ class Command(BaseCommand):
         if rel_batch:
             HatDurak.objects.bulk_create(rel_batch)
 
+        # Durak silme DurakVaris'i de (cascade) temizler; önbellekler bir kez yenilensin
+        damgala('durak', 'varis')
         self.stdout.write(self.style.SUCCESS(f"\n✅ İŞLEM TAMAM! Toplam {count} durak hatta bağlandı."))
\ No newline at end of file
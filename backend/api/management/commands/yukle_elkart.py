@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime
 from django.core.management.base import BaseCommand
 from api.models import Hat, TalepVerisi
+from api.veri_semasi import sema_bul, okuma_ayarlari, rol_eslemesi, eksik_roller
 from django.utils import timezone
 
 
@@ -20,26 +21,19 @@ class Command(BaseCommand):
         self.stdout.write("1. Veriler okunuyor...")
 
         try:
-            # CSV Oku
-            df = pd.read_csv(dosya_yolu, sep=';', encoding='utf-8-sig', dtype=str)
-
-            # Sütun isimlerini normalize et
-            def temizle(col):
-                return col.strip().lower().replace(' ', '').replace('_', '').replace('ı', 'i').replace('ş',
-                                                                                                       's').replace('ç',
-                                                                                                                    'c')
-
-            df.columns = [temizle(c) for c in df.columns]
-
-            # Sütunları Bul
-            col_hat = next((c for c in df.columns if 'hat' in c and 'no' in c), None)
-            col_tarih = next((c for c in df.columns if 'tarih' in c), None)
-            col_saat = next((c for c in df.columns if 'saat' in c), None)  # Saat ayrı sütundaysa
-
-            if not col_hat or not col_tarih:
+            # CSV Oku (Ayırıcı, kodlama ve sütunlar şema kaydından gelir; sadece gerekli sütunlar okunur)
+            sema = sema_bul(dosya_yolu, 'elkart')
+            if eksik_roller(sema, ['hat', 'tarih']):
                 self.stdout.write(self.style.ERROR("❌ HATA: Gerekli sütunlar bulunamadı!"))
                 return
 
+            df = pd.read_csv(dosya_yolu, **okuma_ayarlari(sema, ['hat', 'tarih', 'saat']))
+            df = df.rename(columns=rol_eslemesi(sema))
+
+            col_hat = 'hat'
+            col_tarih = 'tarih'
+            col_saat = 'saat' if 'saat' in df.columns else None  # Saat ayrı sütundaysa
+
             # Hatları Hafızaya Al
             hat_cache = {str(h.ana_hat_no).strip(): h for h in Hat.objects.all()}
 
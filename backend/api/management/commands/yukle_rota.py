@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from django.core.management.base import BaseCommand
 from api.models import Hat, HatGuzergah
+from api.guzergah_geometrisi import hat_uzunluklarini_guncelle
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
@@ -120,4 +122,7 @@ class Command(BaseCommand):
         if batch:
             HatGuzergah.objects.bulk_create(batch)
 
-        self.stdout.write(self.style.SUCCESS(f"\nİŞLEM TAMAM! Toplam {count} nokta yüklendi."))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"\nİŞLEM TAMAM! Toplam {count} nokta yüklendi."))
+
+        self.stdout.write(f"3. Hat uzunlukları hesaplanıyor... ({hat_uzunluklarini_guncelle()} hat)")
+        damgala('guzergah')  # bulk_create sinyal üretmez; geometri / bağlam önbellekleri yenilensin
\ No newline at end of file
@@ -1,42 +1,41 @@
-import os
-import pandas as pd
-from datetime import datetime
 from django.core.management.base import BaseCommand
 from api.models import Hat, HatTarife
+from api.tarife_motoru import tarifeleri_veritabanina_yukle, indeksi_gecersiz_kil, ZAMANLAR
+from api.veri_damgasi import damgala
 
 
 class Command(BaseCommand):
-    help = 'Sefer saatlerini yükler.'
+    help = 'Sefer saatlerini tarife dosyasından (veri_seti/tarifeler.csv / .xlsx) HatTarife tablosuna toplu yükler.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ornek', action='store_true',
+                            help='Tarife dosyası yoksa her hat için saat başı örnek seferler oluşturur.')
 
     def handle(self, *args, **options):
-        # Dosya ismini kontrol et!
-        dosya_yolu = r"C:\Users\Quantum\PycharmProjects\KonyaBusProject\veri_seti\tarifeler.csv"
+        self.stdout.write("Tarifeler yükleniyor...")
+        sonuc = tarifeleri_veritabanina_yukle()
 
-        if not os.path.exists(dosya_yolu):
-            # Dosya yoksa bile örnek veri basalım ki sistem çalışsın
-            self.stdout.write(self.style.WARNING("Tarife dosyası bulunamadı, RASTGELE örnek saatler oluşturuluyor..."))
-            HatTarife.objects.all().delete()
+        if sonuc is None:
+            if not options['ornek']:
+                self.stdout.write(self.style.ERROR("Tarife dosyası bulunamadı! (Örnek veri için: --ornek)"))
+                return
+
+            # Dosya yoksa örnek veri basalım ki sistem çalışsın
+            self.stdout.write(self.style.WARNING("Tarife dosyası bulunamadı, örnek saatler oluşturuluyor..."))
+            kayitlar = []
             for hat in Hat.objects.all():
                 # Her hat için sabah 06:00'dan 23:00'a kadar saat başı sefer ekle
                 for saat in range(6, 24):
-                    HatTarife.objects.create(
-                        hat=hat,
-                        kalkis_saati=f"{saat:02d}:00",
-                        yon="Merkez"
-                    )
-                    HatTarife.objects.create(
-                        hat=hat,
-                        kalkis_saati=f"{saat:02d}:30",
-                        yon="Dönüş"
-                    )
-            self.stdout.write(self.style.SUCCESS("✅ Örnek tarifeler yüklendi."))
+                    kayitlar.append(HatTarife(hat=hat, kalkis_saati=ZAMANLAR[saat * 60], yon="Merkez"))
+                    kayitlar.append(HatTarife(hat=hat, kalkis_saati=ZAMANLAR[saat * 60 + 30], yon="Dönüş"))
+            HatTarife.objects.all().delete()
+            HatTarife.objects.bulk_create(kayitlar, batch_size=5000)
+            indeksi_gecersiz_kil()
+            damgala('tarife')
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(kayitlar)} örnek tarife yüklendi."))
             return
 
-        self.stdout.write("Tarifeler yükleniyor...")
-        HatTarife.objects.all().delete()
-
-        # Dosya okuma mantığı (Eğer gerçek dosyan varsa burayı açabilirsin)
-        # df = pd.read_csv(dosya_yolu, ...)
-        # ...
-
-        self.stdout.write(self.style.SUCCESS("İşlem tamam."))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f"✅ {sonuc['yuklenen']} sefer saati yüklendi."))
+        if sonuc['eslesmeyen']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {sonuc['eslesmeyen']} satırın hattı veritabanında olmadığı için atlandı."))
@@ -0,0 +1,55 @@
+import time
+import random
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from api.veri_araclari import parse_time_column
+from api.zaman_donusum import saat_vektor, tarih_vektor
+
+
+class Command(BaseCommand):
+    help = 'Vektörel saat/tarih dönüşümünü satır bazlı fonksiyonlarla karşılaştırır (hız + doğruluk).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--satir', type=int, default=500000, help='Test edilecek satır sayısı')
+
+    def sure_olc(self, islev):
+        bas = time.perf_counter()
+        sonuc = islev()
+        return sonuc, time.perf_counter() - bas
+
+    def handle(self, *args, **options):
+        n = options['satir']
+        random.seed(42)
+        self.stdout.write(f"{n} satırlık örnek veri üretiliyor...")
+
+        saat_ornekleri = ['06:00', '6', '06.30', '6.0', ' 7:15 ', '23:59:00', '', 'nan', 'abc', '8.5', '12']
+        saatler = pd.Series([random.choice(saat_ornekleri) for _ in range(n)])
+        tarihler = pd.Series([
+            f"{random.randint(1, 28):02d}.{random.randint(1, 12):02d}.2021" if random.random() < 0.7
+            else f"2021-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+            for _ in range(n)
+        ])
+
+        # 1. SAAT
+        eski, eski_sure = self.sure_olc(lambda: saatler.apply(parse_time_column))
+        yeni, yeni_sure = self.sure_olc(lambda: saat_vektor(saatler))
+        ayni = bool((eski.values == yeni.values).all())
+        self.stdout.write(f"Saat  | satır bazlı: {eski_sure:.3f} sn | vektörel: {yeni_sure:.3f} sn | "
+                          f"hız: {eski_sure / max(yeni_sure, 1e-9):.1f}x | sonuçlar aynı: {ayni}")
+
+        # 2. TARİH (eski yol: format tahmini + dayfirst; ilk değerin formatına uymayanlar NaT olur)
+        eski, eski_sure = self.sure_olc(lambda: pd.to_datetime(tarihler, dayfirst=True, errors='coerce'))
+        yeni, yeni_sure = self.sure_olc(lambda: tarih_vektor(tarihler))
+        cozulen = eski.notna()
+        tarih_ayni = bool((eski[cozulen].dt.floor('D').values == yeni[cozulen].values).all())
+        self.stdout.write(f"Tarih | format tahmini: {eski_sure:.3f} sn | açık format: {yeni_sure:.3f} sn | "
+                          f"hız: {eski_sure / max(yeni_sure, 1e-9):.1f}x | ortak satırlar aynı: {tarih_ayni}")
+        self.stdout.write(f"        çözülemeyen satır -> format tahmini: {int(eski.isna().sum())}, "
+                          f"açık format: {int(yeni.isna().sum())}")
+        ayni = ayni and tarih_ayni
+
+        if ayni:
+            self.stdout.write(self.style.SUCCESS("✅ Benchmark tamamlandı."))
+        else:
+            self.stdout.write(self.style.WARNING("⚠️ Sonuçlarda fark var, dönüşümleri kontrol edin."))
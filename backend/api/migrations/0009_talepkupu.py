@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_otobus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TalepKupuKaynagi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kaynak', models.CharField(max_length=100, unique=True)),
+                ('mtime', models.FloatField()),
+                ('boyut', models.BigIntegerField()),
+                ('guncelleme_zamani', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TalepKupu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hat_no', models.CharField(max_length=10, verbose_name='Ana Hat No')),
+                ('tarih', models.DateField()),
+                ('saat', models.PositiveSmallIntegerField()),
+                ('yolcu', models.IntegerField(default=0)),
+                ('kaynak', models.CharField(max_length=100, verbose_name='Kaynak Dosya')),
+            ],
+            options={
+                'verbose_name': 'Talep Küpü',
+                'verbose_name_plural': 'Talep Küpü',
+                'indexes': [models.Index(fields=['hat_no', 'tarih', 'saat'], name='api_talepku_hat_no_7d97e4_idx')],
+                'unique_together': {('kaynak', 'hat_no', 'tarih', 'saat')},
+            },
+        ),
+    ]
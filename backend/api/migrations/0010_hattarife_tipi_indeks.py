@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+
+def tipleri_kodla(apps, schema_editor):
+    # Eski kayıtlardaki etiketleri (örn: "Hafta İçi") tek harfli koda çevir
+    HatTarife = apps.get_model('api', 'HatTarife')
+    for kod, etiket in [('H', 'Hafta İçi'), ('C', 'Cumartesi'), ('P', 'Pazar')]:
+        HatTarife.objects.filter(tarife_tipi=etiket).update(tarife_tipi=kod)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_talepkupu'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hattarife',
+            name='tarife_tipi',
+            field=models.CharField(choices=[('H', 'Hafta İçi'), ('C', 'Cumartesi'), ('P', 'Pazar')], default='H', max_length=50),
+        ),
+        migrations.RunPython(tipleri_kodla, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='hattarife',
+            index=models.Index(fields=['hat', 'tarife_tipi', 'kalkis_saati'], name='api_hattari_hat_id_dbdc5a_idx'),
+        ),
+    ]
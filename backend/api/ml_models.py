@@ -1,3 +1,12 @@
+"""
+Talep (Prophet) ve seyahat süresi (XGBoost) tahmincileri.
+
+Ağır kütüphaneler (Prophet, XGBoost, scikit-learn) modül import edilirken
+değil, ilk kullanıldıkları anda yüklenir. Tahminci nesneleri model_kaydi
+üzerinden tembel olarak kurulur (talep_tahmincisi(), sure_tahmincisi()).
+Seyahat süresi tahmini sadece XGBoost modelini kullanır; LSTM dosyası
+(travel_lstm.h5) yüklenmez.
+"""
 import pandas as pd
 import numpy as np
 import os
@@ -5,303 +14,192 @@ import joblib
 import glob
 from datetime import datetime, timedelta
 
-# --- KÜTÜPHANE KONTROLLERİ ---
-try:
-    from prophet import Prophet
-except ImportError:
-    Prophet = None
-    print("[ML] UYARI: 'prophet' kütüphanesi yüklü değil. Talep tahmini çalışmayabilir.")
+from .veri_araclari import VERI_SETI_KLASORU, hat_no_temizle
+from .talep_kupu import hat_saatlik_seri
+from .elkart_deposu import hat_saatlik_akis
+from .paralel_okuyucu import paralel_calistir, dosya_gorevleri, durak_varis_parcasi_oku
+from .dosya_onbellegi import dosya_onbellekli
+from .prophet_egitimi import MODEL_DIR, prophet_egit, prophet_model_yolu, prophet_sinifi
+from .tahmin_deposu import hat_tahmini, tahmini_yenile
+from .model_kaydi import PROPHET_MODELLERI
 
-try:
-    from xgboost import XGBRegressor
-except ImportError:
-    XGBRegressor = None
-
-try:
-    from tensorflow.keras.models import Sequential, load_model
-    from tensorflow.keras.layers import LSTM, Dense, Dropout
-except ImportError:
-    Sequential, LSTM, Dense, Dropout, load_model = None, None, None, None, None
-
-from sklearn.preprocessing import MinMaxScaler, LabelEncoder
-
-# --- DİZİN AYARLARI ---
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
-VERI_SETI_KLASORU = os.path.join(PROJECT_ROOT, 'veri_seti')
-MODEL_DIR = os.path.join(CURRENT_DIR, 'saved_models')
-
-if not os.path.exists(MODEL_DIR):
-    os.makedirs(MODEL_DIR)
+# --- KÜTÜPHANE KONTROLLERİ (ilk kullanımda) ---
+def xgb_sinifi():
+    try:
+        from xgboost import XGBRegressor
+    except ImportError:
+        return None
+    return XGBRegressor
 
 
 # =============================================================================
-# 1. HYBRID DEMAND PREDICTOR (PROPHET + LSTM) - YOLCU TALEP TAHMİNİ
+# 1. DEMAND PREDICTOR (PROPHET) - YOLCU TALEP TAHMİNİ
 # =============================================================================
 class DemandPredictor:
     def _clean_hat_no(self, val):
         """Hat numarasını standartlaştırır (örn: '4.0' -> '4')."""
-        try:
-            s = str(val).strip()
-            if '.' in s:
-                return s.split('.')[0]
-            return s
-        except:
-            return str(val)
+        return hat_no_temizle(val)
 
     def _read_all_data(self, hat_no):
         """
-        Elkart verilerini okur. Hat numarası eşleşmesini esnek yapar.
-        Saat formatlarını düzeltir.
+        Hattın saatlik talep serisini (ds, y) talep küpünden okur.
+        Küp ve depo yönetim komutlarıyla güncellenir (kupu_guncelle, elkart_donustur);
+        burada olduğu gibi okunur.
+        Akış modunda (veya küp okunamazsa) seri doğrudan sütunsal depodan
+        parça parça toplanarak üretilir; ham satırlar bellekte biriktirilmez.
         """
-        if not os.path.exists(VERI_SETI_KLASORU): return None
-
-        dosyalar = glob.glob(os.path.join(VERI_SETI_KLASORU, "elkart*.csv"))
-        if not dosyalar: return None
-
-        df_list = []
         hedef_hat = self._clean_hat_no(hat_no)
+        df = None
 
-        print(f"[ML] Hat {hat_no} (Aranan: {hedef_hat}) için veri taranıyor...")
-
-        for dosya in dosyalar:
+        if not self.akis_modu:
+            print(f"[ML] Hat {hat_no} (Aranan: {hedef_hat}) için talep küpü okunuyor...")
             try:
-                with open(dosya, 'r', encoding='utf-8', errors='ignore') as f:
-                    ilk_satir = f.readline()
-                    ayirici = ';' if ';' in ilk_satir else ','
-
-                chunk_iter = pd.read_csv(dosya, sep=ayirici, chunksize=50000, encoding='utf-8', on_bad_lines='skip',
-                                         low_memory=False)
-
-                for temp in chunk_iter:
-                    # Sütunları Temizle
-                    temp.columns = [str(c).strip().upper().replace('İ', 'I').replace(' ', '_') for c in temp.columns]
-
-                    hat_col = next((c for c in temp.columns if 'HAT' in c and 'NO' in c), None)
-                    tarih_col = next((c for c in temp.columns if 'TARIH' in c or 'ISLEM' in c or 'ZAMAN' in c), None)
-                    saat_col = next((c for c in temp.columns if 'SAAT' in c), None)
-                    yolcu_col = next((c for c in temp.columns if 'BINIS' in c or 'YOLCU' in c or 'SAYI' in c), None)
-
-                    if hat_col and tarih_col and saat_col:
-                        # Hat No Temizliği
-                        temp['hat_clean'] = temp[hat_col].apply(self._clean_hat_no)
-
-                        filtered = temp[temp['hat_clean'] == hedef_hat].copy()
-
-                        if not filtered.empty:
-                            rename_map = {tarih_col: 'ds_date', saat_col: 'ds_hour'}
-                            if yolcu_col:
-                                rename_map[yolcu_col] = 'y'
-                            else:
-                                filtered['y'] = 1
-
-                            filtered = filtered.rename(columns=rename_map)
-                            if 'y' not in filtered.columns: filtered['y'] = 1
-                            filtered['y'] = pd.to_numeric(filtered['y'], errors='coerce').fillna(1)
+                df = hat_saatlik_seri(hedef_hat)
+            except Exception as e:
+                print(f"[ML] Talep küpü okuma hatası, akış moduna geçiliyor: {e}")
 
-                            df_list.append(filtered[['ds_date', 'ds_hour', 'y']])
+        if df is None:
+            print(f"[ML] Hat {hat_no} (Aranan: {hedef_hat}) için veri akış modunda toplanıyor...")
+            try:
+                df = hat_saatlik_akis(hedef_hat)
             except Exception as e:
-                continue
+                print(f"[ML] Akış okuma hatası: {e}")
+                return None
 
-        if not df_list:
+        if df.empty:
             print(f"[ML] Hat {hat_no} için HİÇ VERİ BULUNAMADI. CSV dosyalarındaki Hat No sütununu kontrol edin.")
             return None
 
-        # --- VERİ BİRLEŞTİRME ---
-        try:
-            full_df = pd.concat(df_list, ignore_index=True)
-
-            # Saat Temizliği
-            def temizle_saat(val):
-                s = str(val).strip()
-                if '.' in s and ':' not in s: s = s.split('.')[0]
-                if ':' not in s: return s.zfill(2) + ':00'
-
-                parts = s.split(':')
-                h = parts[0].zfill(2)
-                m = parts[1].zfill(2) if len(parts) > 1 else "00"
-                return f"{h}:{m}"
-
-            full_df['clean_hour'] = full_df['ds_hour'].apply(temizle_saat)
-            full_df['ds_str'] = full_df['ds_date'].astype(str) + ' ' + full_df['clean_hour']
-
-            # Datetime Dönüşümü
-            full_df['ds'] = pd.to_datetime(full_df['ds_str'], dayfirst=True, errors='coerce')
-            full_df = full_df.dropna(subset=['ds'])
-
-            return full_df
+        return df
 
-        except Exception as e:
-            print(f"[ML] Veri birleştirme hatası: {e}")
-            return None
-
-    def __init__(self):
-        self.models_prophet = {}
+    def __init__(self, akis_modu=False, modeller=PROPHET_MODELLERI):
+        # Yüklenen Prophet modelleri bellek sınırlı LRU'da tutulur (model_kaydi)
+        self.modeller = modeller
         self.scalers = {}
+        # True ise eğitim verisi küp yerine depodan akış modunda toplanır
+        self.akis_modu = akis_modu
+        if prophet_sinifi() is None:
+            print("[ML] UYARI: 'prophet' kütüphanesi yüklü değil. Talep tahmini çalışmayabilir.")
 
-    def train_model(self, hat_no):
-        """Prophet modelini 'Gerçekçi Döngüler' üretecek şekilde eğitir."""
-        if Prophet is None: return False
+    def train_model(self, hat_no, df=None):
+        """
+        Prophet modelini 'Gerçekçi Döngüler' üretecek şekilde eğitir.
+        df (ds, y) verilirse küp tekrar okunmaz (toplu eğitimde kullanılır).
+        """
+        if prophet_sinifi() is None: return False
 
-        df = self._read_all_data(hat_no)
+        if df is None:
+            df = self._read_all_data(hat_no)
         if df is None or df.empty: return False
 
-        print(f"[ML] Hat {hat_no} için {len(df)} satır veri ile eğitim başlıyor...")
-
-        # 2. Aggregation
-        df_agg = df.groupby('ds')['y'].sum().reset_index().sort_values('ds')
-        df_agg = df_agg.set_index('ds').resample('H').sum().fillna(0).reset_index()
+        print(f"[ML] Hat {hat_no} için {len(df)} saatlik küp hücresi ile eğitim başlıyor...")
 
         try:
-            # --- GERÇEKÇİLİK AYARLARI ---
-            model_p = Prophet(
-                daily_seasonality=True,  # Günlük döngüyü (Sabah/Akşam pikleri) zorla
-                weekly_seasonality=True,  # Haftalık döngüyü (Hafta sonu düşüşü) zorla
-                yearly_seasonality=True,
-                # changepoint_prior_scale=0.001: Trendi çok katı yapar.
-                # Yani veri eski olsa bile 1 yıl sonrasına "düşüş" veya "yükseliş" abartılı yansımaz.
-                changepoint_prior_scale=0.001,
-                # seasonality_prior_scale=10.0: Saatlik dalgalanmaları (sabah yoğunluğu vb.) belirginleştirir.
-                seasonality_prior_scale=10.0
-            )
-
-            model_p.add_country_holidays(country_name='TR')
-            model_p.fit(df_agg)
-
-            path = os.path.join(MODEL_DIR, f'prophet_hat_{hat_no}.pkl')
-            joblib.dump(model_p, path)
-            self.models_prophet[str(hat_no)] = model_p
-
-            print(f"[ML] Model eğitildi (Realistic Mode): {path}")
+            self.modeller.koy(hat_no, prophet_egit(hat_no, df))
+            print(f"[ML] Model eğitildi (Realistic Mode): {prophet_model_yolu(hat_no)}")
             return True
         except Exception as e:
             print(f"[ML] Eğitim hatası: {e}")
             return False
 
     def predict(self, hat_no, hours=24, agg='hour'):
-        """Gelecek tahmini üretir."""
+        """
+        Gelecek tahmini (bu saatten itibaren). Tahminler tahmin deposundan
+        dilimlenir; depo yoksa, model değişmişse veya ufku yetmiyorsa model ile
+        bir kez yeniden hesaplanır.
+        """
         hat_no = str(hat_no)
-        p_path = os.path.join(MODEL_DIR, f'prophet_hat_{hat_no}.pkl')
-
-        # Modeli Yükle
-        model_p = self.models_prophet.get(hat_no)
-        if model_p is None:
-            if os.path.exists(p_path):
-                try:
-                    model_p = joblib.load(p_path)
-                    self.models_prophet[hat_no] = model_p
-                except:
-                    pass
-
-            if model_p is None:
-                # Model yoksa eğit
-                if self.train_model(hat_no):
-                    model_p = self.models_prophet.get(hat_no)
-                else:
-                    return None
-
-        # Tahmin (Bugünden İtibaren)
-        try:
-            # Şu anki saati al, dakikayı sıfırla
-            start_date = datetime.now().replace(minute=0, second=0, microsecond=0)
+        p_path = prophet_model_yolu(hat_no)
 
-            # Gelecek tarihleri oluştur
-            future_dates = pd.date_range(start=start_date, periods=hours, freq='H')
-            future = pd.DataFrame({'ds': future_dates})
+        # Şu anki saati al, dakikayı sıfırla
+        start_date = datetime.now().replace(minute=0, second=0, microsecond=0)
+        sonuc = hat_tahmini(hat_no, start_date, hours, agg)
+        if sonuc is not None:
+            return sonuc
 
-            # Prophet Tahmini
-            forecast = model_p.predict(future)
-            forecast['yhat'] = forecast['yhat'].clip(lower=0)  # Negatifleri temizle
-
-            # Sonuçları Grupla
-            if agg == 'day':
-                result = forecast.resample('D', on='ds')['yhat'].sum().reset_index()
-            elif agg == 'month':
-                result = forecast.resample('MS', on='ds')['yhat'].sum().reset_index()
-            else:
-                result = forecast[['ds', 'yhat']].copy()
-
-            # Tarihleri string formatına çevir (Frontend için garanti olsun)
-            result['ds'] = result['ds'].apply(lambda x: x.isoformat())
+        # Depo yenilenecek: model önbellekten / diskten alınır, model yoksa eğitilir
+        try:
+            model_p = self.modeller.getir(hat_no)
+        except Exception as e:
+            print(f"[ML] Model yüklenemedi: {e}")
+            model_p = None
+        if model_p is None:
+            if not self.train_model(hat_no):
+                return None
+            model_p = self.modeller.getir(hat_no)
 
-            return result.to_dict('records')
+        try:
+            if tahmini_yenile(hat_no, model_p, start_date) is None:
+                return None
+            return hat_tahmini(hat_no, start_date, hours, agg)
 
         except Exception as e:
             print(f"[ML] Tahmin hatası: {e}")
             # Model bozuksa sil
+            self.modeller.cikar(hat_no)
             if os.path.exists(p_path): os.remove(p_path)
             return None
 
 
 # =============================================================================
-# 2. HYBRID TRAVEL TIME PREDICTOR
+# 2. TRAVEL TIME PREDICTOR (XGBOOST)
 # =============================================================================
+def durak_varis_dosyalari():
+    return sorted(glob.glob(os.path.join(VERI_SETI_KLASORU, "otobusdurakvaris*.csv")))
+
+
+@dosya_onbellekli(durak_varis_dosyalari)
+def durak_varis_verisi():
+    """
+    Durak varış dosyalarını süreç havuzunda parça parça okur; her işçi
+    süreyi hesaplayıp sadece eğitimde kullanılan sütunları döner.
+    Dosyalar değişmediği sürece sonuç önbellekten döner.
+    """
+    dosyalar = durak_varis_dosyalari()
+    if not dosyalar: return None
+
+    sonuclar = paralel_calistir(durak_varis_parcasi_oku, dosya_gorevleri(dosyalar, 'durak_varis'))
+    df_list = [df for df in sonuclar if df is not None and not df.empty]
+
+    if not df_list: return None
+    return pd.concat(df_list, ignore_index=True)
+
+
 class TravelTimePredictor:
     def __init__(self):
         self.xgb_model = None
-        self.lstm_model = None
         self.label_encoders = {}
-        self.scaler = MinMaxScaler()
+        self.scaler = None
 
         self.xgb_path = os.path.join(MODEL_DIR, 'travel_xgb.json')
-        self.lstm_path = os.path.join(MODEL_DIR, 'travel_lstm.h5')
         self.artifacts_path = os.path.join(MODEL_DIR, 'travel_artifacts.pkl')
 
         self.load_models()
 
     def load_models(self):
-        if os.path.exists(self.xgb_path) and XGBRegressor:
+        XGBRegressor = xgb_sinifi() if os.path.exists(self.xgb_path) else None
+        if XGBRegressor:
             self.xgb_model = XGBRegressor()
             self.xgb_model.load_model(self.xgb_path)
-        if os.path.exists(self.lstm_path) and load_model:
-            try:
-                self.lstm_model = load_model(self.lstm_path)
-            except:
-                pass
         if os.path.exists(self.artifacts_path):
             try:
                 artifacts = joblib.load(self.artifacts_path)
                 self.label_encoders = artifacts.get('encoders', {})
-                self.scaler = artifacts.get('scaler', MinMaxScaler())
+                self.scaler = artifacts.get('scaler')
             except:
                 pass
 
     def prepare_data(self):
-        # Önceki kodunuzdakiyle aynı mantık, sadece dosya okuma kontrollerini ekleyin
-        dosyalar = glob.glob(os.path.join(VERI_SETI_KLASORU, "otobusdurakvaris*.csv"))
-        if not dosyalar: return None
-
-        df_list = []
-        cols = ['ana_hat_no', 'baslangic_durak_no', 'bitis_durak_no', 'cikis_zaman', 'varis_zaman']
-
-        for dosya in dosyalar:
-            try:
-                with open(dosya, 'r', encoding='utf-8') as f:
-                    ayirici = ';' if ';' in f.readline() else ','
-
-                temp = pd.read_csv(dosya, sep=ayirici, usecols=lambda c: c.lower() in cols, low_memory=False)
-                temp.columns = [c.lower() for c in temp.columns]
-
-                temp['cikis_zaman'] = pd.to_datetime(temp['cikis_zaman'], errors='coerce')
-                temp['varis_zaman'] = pd.to_datetime(temp['varis_zaman'], errors='coerce')
-                temp = temp.dropna()
-
-                temp['sure'] = (temp['varis_zaman'] - temp['cikis_zaman']).dt.total_seconds()
-                temp = temp[(temp['sure'] > 0) & (temp['sure'] < 7200)]
-
-                temp['saat'] = temp['cikis_zaman'].dt.hour
-                temp['gun'] = temp['cikis_zaman'].dt.weekday
-                df_list.append(temp)
-            except:
-                continue
-
-        if not df_list: return None
-        return pd.concat(df_list, ignore_index=True)
+        df = durak_varis_verisi()
+        # train_hybrid sütun ekler; önbellekteki nesne değişmesin
+        return df.copy() if df is not None else None
 
     def train_hybrid(self):
         df = self.prepare_data()
         if df is None: return "Veri Yok"
 
+        from sklearn.preprocessing import MinMaxScaler, LabelEncoder
+
         le_hat = LabelEncoder()
         le_durak = LabelEncoder()
 
@@ -315,6 +213,8 @@ class TravelTimePredictor:
         df['bas_durak_enc'] = le_durak.transform(df['baslangic_durak_no'].astype(str))
         df['bit_durak_enc'] = le_durak.transform(df['bitis_durak_no'].astype(str))
 
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        XGBRegressor = xgb_sinifi()
         if XGBRegressor:
             X = df[['hat_enc', 'bas_durak_enc', 'bit_durak_enc', 'saat', 'gun']]
             y = df['sure']
@@ -323,6 +223,8 @@ class TravelTimePredictor:
             self.xgb_model.save_model(self.xgb_path)
 
         self.label_encoders = {'le_hat': le_hat, 'le_durak': le_durak}
+        if self.scaler is None:
+            self.scaler = MinMaxScaler()
         joblib.dump({'encoders': self.label_encoders, 'scaler': self.scaler}, self.artifacts_path)
         return "Eğitim Tamamlandı"
 
@@ -340,7 +242,3 @@ class TravelTimePredictor:
         except:
             return 60
 
-
-# --- SINGLETON ---
-demand_predictor = DemandPredictor()
-travel_predictor = TravelTimePredictor()
\ No newline at end of file
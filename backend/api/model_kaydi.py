@@ -0,0 +1,189 @@
+"""
+Yapay zeka modelleri için tembel (lazy) ve bellek sınırlı model kaydı.
+
+- Tahminciler (DemandPredictor, TravelTimePredictor) ilk kullanımda kurulur;
+  ml_models ve ağır kütüphaneler (Prophet, XGBoost) bu modül import
+  edilirken YÜKLENMEZ. Böylece worker açılışı ve tahmin yapmayan yönetim
+  komutları bu maliyeti ödemez.
+- Yüklenen Prophet modelleri, toplam boyutu settings.ML_MODEL_BELLEK_MB
+  (varsayılan 512 MB) ile sınırlı bir LRU önbellekte tutulur; sınır aşılınca en
+  uzun süredir kullanılmayan model atılır. Model dosyası başka bir süreçte
+  yeniden eğitilirse (mtime / boyut değişir) bir sonraki istekte yeniden yüklenir.
+- settings.ML_TALEP_AKIS_MODU=True ise talep tahmincisi eğitim verisini küp
+  yerine sütunsal depodan akış modunda toplar (düşük bellek).
+
+Yükleme / atma istatistikleri: model_istatistikleri() (/api/ml/durum/)
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import joblib
+from django.conf import settings
+
+from .prophet_egitimi import prophet_model_yolu
+
+ML_MODEL_BELLEK_SINIRI = int(getattr(settings, 'ML_MODEL_BELLEK_MB', 512)) * 1024 * 1024
+TALEP_AKIS_MODU = bool(getattr(settings, 'ML_TALEP_AKIS_MODU', False))
+
+
+def _dosya_izi(yol):
+    try:
+        st = os.stat(yol)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+# =============================================================================
+# PROPHET MODEL ÖNBELLEĞİ (LRU)
+# =============================================================================
+class ProphetOnbellegi:
+    """
+    hat_no -> (dosya izi, model, boyut). Boyut, modelin pickle dosyasının
+    boyutudur (bellekteki nesnenin yaklaşık karşılığı).
+    """
+
+    def __init__(self, bellek_siniri=ML_MODEL_BELLEK_SINIRI):
+        self.bellek_siniri = bellek_siniri
+        self._modeller = OrderedDict()
+        self._toplam = 0
+        self._kilit = threading.RLock()
+        self.isabet = 0
+        self.yukleme = 0
+        self.atilan = 0
+        self.yukleme_suresi = 0.0
+
+    def getir(self, hat_no):
+        """Hattın modeli; bellekte yoksa (veya dosya değiştiyse) diskten yüklenir. Model yoksa None."""
+        hat_no = str(hat_no)
+        yol = prophet_model_yolu(hat_no)
+        iz = _dosya_izi(yol)
+        with self._kilit:
+            kayit = self._modeller.get(hat_no)
+            if kayit is not None and kayit[0] == iz:
+                self._modeller.move_to_end(hat_no)
+                self.isabet += 1
+                return kayit[1]
+        if iz is None:
+            self.cikar(hat_no)
+            return None
+
+        bas = time.perf_counter()
+        model_p = joblib.load(yol)
+        with self._kilit:
+            self.yukleme += 1
+            self.yukleme_suresi += time.perf_counter() - bas
+        self.koy(hat_no, model_p, iz)
+        return model_p
+
+    def koy(self, hat_no, model_p, iz=None):
+        """Modeli (örn. yeni eğitilmiş) önbelleğe ekler; sınır aşılırsa eskileri atar."""
+        hat_no = str(hat_no)
+        iz = iz or _dosya_izi(prophet_model_yolu(hat_no))
+        boyut = iz[1] if iz else 1
+        with self._kilit:
+            self._sil(hat_no)
+            if boyut > self.bellek_siniri:
+                return
+            self._modeller[hat_no] = (iz, model_p, boyut)
+            self._toplam += boyut
+            while self._toplam > self.bellek_siniri and len(self._modeller) > 1:
+                self._sil(next(iter(self._modeller)))
+                self.atilan += 1
+
+    def _sil(self, hat_no):
+        kayit = self._modeller.pop(hat_no, None)
+        if kayit is not None:
+            self._toplam -= kayit[2]
+
+    def cikar(self, hat_no):
+        with self._kilit:
+            self._sil(str(hat_no))
+
+    def temizle(self):
+        with self._kilit:
+            self._modeller.clear()
+            self._toplam = 0
+
+    def istatistik(self):
+        with self._kilit:
+            return {
+                'kayit_sayisi': len(self._modeller),
+                'hatlar': list(self._modeller),
+                'toplam_bayt': self._toplam,
+                'bellek_siniri': self.bellek_siniri,
+                'isabet': self.isabet,
+                'yukleme': self.yukleme,
+                'atilan': self.atilan,
+                'yukleme_suresi_sn': round(self.yukleme_suresi, 3),
+            }
+
+
+# --- SÜREÇ İÇİ ORTAK ÖNBELLEK ---
+PROPHET_MODELLERI = ProphetOnbellegi()
+
+
+# =============================================================================
+# TEMBEL TAHMİNCİLER
+# =============================================================================
+class TembelNesne:
+    """kurucu() ilk getir() çağrısında bir kez çalışır. Kurulum hata verirse None döner (sonra tekrar denenir)."""
+
+    def __init__(self, ad, kurucu):
+        self.ad = ad
+        self.kurucu = kurucu
+        self._deger = None
+        self._kilit = threading.Lock()
+        self.kurulum_suresi = None
+
+    def getir(self):
+        if self._deger is not None:
+            return self._deger
+        with self._kilit:
+            if self._deger is None:
+                bas = time.perf_counter()
+                try:
+                    self._deger = self.kurucu()
+                    self.kurulum_suresi = time.perf_counter() - bas
+                except Exception as e:
+                    print(f"[ML] {self.ad} yüklenemedi: {e}")
+            return self._deger
+
+    def yuklu_mu(self):
+        return self._deger is not None
+
+    def istatistik(self):
+        return {'yuklu': self.yuklu_mu(),
+                'kurulum_suresi_sn': round(self.kurulum_suresi, 3) if self.kurulum_suresi is not None else None}
+
+
+def _talep_tahmincisi_kur():
+    from .ml_models import DemandPredictor
+    return DemandPredictor(akis_modu=TALEP_AKIS_MODU)
+
+
+def _sure_tahmincisi_kur():
+    from .ml_models import TravelTimePredictor
+    return TravelTimePredictor()
+
+
+_TALEP = TembelNesne('Talep tahmincisi', _talep_tahmincisi_kur)
+_SURE = TembelNesne('Süre tahmincisi', _sure_tahmincisi_kur)
+
+
+def talep_tahmincisi():
+    return _TALEP.getir()
+
+
+def sure_tahmincisi():
+    return _SURE.getir()
+
+
+def model_istatistikleri():
+    return {
+        'talep_tahmincisi': {**_TALEP.istatistik(), 'akis_modu': TALEP_AKIS_MODU},
+        'sure_tahmincisi': _SURE.istatistik(),
+        'prophet_modelleri': PROPHET_MODELLERI.istatistik(),
+    }
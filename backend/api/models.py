@@ -64,10 +64,17 @@ class TalepVerisi(models.Model):
 
 # 6. HAT TARİFE
 class HatTarife(models.Model):
+    TARIFE_TIPLERI = [('H', 'Hafta İçi'), ('C', 'Cumartesi'), ('P', 'Pazar')]
+
     hat = models.ForeignKey(Hat, on_delete=models.CASCADE, related_name='tarifeler')
     yon = models.CharField(max_length=50, blank=True)
     kalkis_saati = models.TimeField()
-    tarife_tipi = models.CharField(max_length=50, default="Hafta İçi")
+    tarife_tipi = models.CharField(max_length=50, choices=TARIFE_TIPLERI, default='H')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['hat', 'tarife_tipi', 'kalkis_saati']),
+        ]
 
     def __str__(self):
         return f"{self.hat.ana_hat_no} - {self.kalkis_saati}"
@@ -104,4 +111,34 @@ class Otobus(models.Model):
         verbose_name_plural = "Otobüsler"
 
     def __str__(self):
-        return f"{self.plaka} - {self.durum}"
\ No newline at end of file
+        return f"{self.plaka} - {self.durum}"
+
+# 10. TALEP KÜPÜ (Hat x Tarih x Saat Biniş Toplamları)
+class TalepKupu(models.Model):
+    hat_no = models.CharField(max_length=10, verbose_name="Ana Hat No")
+    tarih = models.DateField()
+    saat = models.PositiveSmallIntegerField()
+    yolcu = models.IntegerField(default=0)
+    kaynak = models.CharField(max_length=100, verbose_name="Kaynak Dosya")
+
+    class Meta:
+        verbose_name = "Talep Küpü"
+        verbose_name_plural = "Talep Küpü"
+        unique_together = ('kaynak', 'hat_no', 'tarih', 'saat')
+        indexes = [
+            models.Index(fields=['hat_no', 'tarih', 'saat']),
+        ]
+
+    def __str__(self):
+        return f"{self.hat_no} - {self.tarih} {self.saat:02d}:00 ({self.yolcu})"
+
+
+# 11. TALEP KÜPÜ KAYNAKLARI (Artımlı güncelleme için dosya imzaları)
+class TalepKupuKaynagi(models.Model):
+    kaynak = models.CharField(max_length=100, unique=True)
+    mtime = models.FloatField()
+    boyut = models.BigIntegerField()
+    guncelleme_zamani = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.kaynak
@@ -0,0 +1,144 @@
+"""
+Çok dosyalı CSV veri setleri için süreç havuzu (process pool) tabanlı okuyucu.
+
+Büyük dosyalar satır sonlarına hizalanmış bayt aralıklarına (parça) bölünür;
+her parça bir işçi sürece verilir. İşçi, parçayı okuyup filtreler/özetler ve
+ana sürece sadece küçültülmüş sonucu döner.
+
+NOT: İşçi fonksiyonları Django modellerini import etmeyen modüllerde
+tanımlanmalıdır (Windows'ta 'spawn' ile başlatılan süreçler modülleri
+yeniden import eder).
+"""
+import os
+import io
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .veri_semasi import sema_bul, okuma_ayarlari, rol_eslemesi, eksik_roller
+
+ISCI_SAYISI = os.cpu_count() or 1
+PARCA_BOYUTU = 64 * 1024 * 1024  # 64 MB
+
+
+# =============================================================================
+# PARÇALAMA VE OKUMA
+# =============================================================================
+def dosya_parcalari(dosya, parca_boyutu=PARCA_BOYUTU):
+    """
+    Dosyayı (başlık hariç) satır sonlarına hizalı (bas, bit) bayt aralıklarına böler.
+    Küçük dosyalar tek parça döner.
+    """
+    boyut = os.path.getsize(dosya)
+    parcalar = []
+    with open(dosya, 'rb') as f:
+        f.readline()
+        bas = f.tell()
+        while bas < boyut:
+            hedef = bas + parca_boyutu
+            if hedef >= boyut:
+                parcalar.append((bas, boyut))
+                break
+            f.seek(hedef)
+            f.readline()
+            bit = f.tell()
+            parcalar.append((bas, bit))
+            bas = bit
+    return parcalar
+
+
+def parca_oku(dosya, bas, bit, sema, roller=None, **kwargs):
+    """
+    Dosyanın [bas, bit) bayt aralığını şemadaki ayırıcı / kodlama ile okur.
+    roller verilirse sadece o rollerin sütunları okunur ve sütunlar rol
+    adlarıyla döner. chunksize verilirse parça içinde de parçalı okuma yapılır.
+    """
+    with open(dosya, 'rb') as f:
+        f.seek(bas)
+        veri = f.read(bit - bas)
+
+    ayarlar = {'encoding_errors': 'ignore', 'on_bad_lines': 'skip'}
+    ayarlar.update(okuma_ayarlari(sema, roller))
+    ayarlar.update(kwargs)
+    sonuc = pd.read_csv(io.BytesIO(veri), header=None, names=sema['basliklar'], **ayarlar)
+    if roller is None:
+        return sonuc
+    if 'chunksize' in kwargs:
+        return (chunk.rename(columns=rol_eslemesi(sema)) for chunk in sonuc)
+    return sonuc.rename(columns=rol_eslemesi(sema))
+
+
+def dosya_gorevleri(dosyalar, tur=None, parca_boyutu=PARCA_BOYUTU):
+    """
+    Her dosya için (dosya, bas, bit, sema) görevlerini üretir. Şema (ayırıcı,
+    kodlama, sütunlar) dosya başına bir kez kayıttan alınır ve işçilere
+    görevle birlikte gider; işçiler tespit yapmaz.
+    """
+    gorevler = []
+    for dosya in dosyalar:
+        try:
+            sema = sema_bul(dosya, tur)
+        except Exception as e:
+            print(f"[PARALEL] Şema okunamadı ({dosya}): {e}")
+            continue
+        for bas, bit in dosya_parcalari(dosya, parca_boyutu):
+            gorevler.append((dosya, bas, bit, sema))
+    return gorevler
+
+
+# =============================================================================
+# ÇALIŞTIRMA
+# =============================================================================
+def _guvenli_calistir(islev, args):
+    try:
+        return islev(*args)
+    except Exception as e:
+        print(f"[PARALEL] İşçi hatası ({args[0] if args else ''}): {e}")
+        return None
+
+
+def paralel_calistir(islev, gorevler, isci_sayisi=None):
+    """
+    islev(*gorev) çağrılarını süreç havuzunda çalıştırır, sonuçları görev
+    sırasıyla döner. Hata veren görevin sonucu None olur. Tek görev varsa
+    veya havuz kurulamazsa aynı süreçte sırayla çalışır.
+    """
+    gorevler = list(gorevler)
+    isci_sayisi = min(isci_sayisi or ISCI_SAYISI, len(gorevler))
+    if isci_sayisi <= 1:
+        return [_guvenli_calistir(islev, g) for g in gorevler]
+
+    try:
+        with ProcessPoolExecutor(max_workers=isci_sayisi) as havuz:
+            return list(havuz.map(_guvenli_calistir, [islev] * len(gorevler), gorevler))
+    except Exception as e:
+        print(f"[PARALEL] Süreç havuzu kullanılamadı, sıralı okumaya geçiliyor: {e}")
+        return [_guvenli_calistir(islev, g) for g in gorevler]
+
+
+# =============================================================================
+# VERİ SETİNE ÖZEL İŞÇİLER
+# =============================================================================
+DURAK_VARIS_SUTUNLARI = ['ana_hat_no', 'baslangic_durak_no', 'bitis_durak_no', 'cikis_zaman', 'varis_zaman']
+
+
+def durak_varis_parcasi_oku(dosya, bas, bit, sema):
+    """
+    otobusdurakvaris parçasını okur, seyahat süresini hesaplar ve sadece
+    eğitimde kullanılan küçük sütunları (hat, duraklar, sure, saat, gun) döner.
+    """
+    eksik = eksik_roller(sema, DURAK_VARIS_SUTUNLARI)
+    if eksik:
+        raise ValueError(f"Eksik sütunlar: {eksik}")
+    temp = parca_oku(dosya, bas, bit, sema, DURAK_VARIS_SUTUNLARI)
+
+    temp['cikis_zaman'] = pd.to_datetime(temp['cikis_zaman'], errors='coerce')
+    temp['varis_zaman'] = pd.to_datetime(temp['varis_zaman'], errors='coerce')
+    temp = temp.dropna()
+
+    temp['sure'] = (temp['varis_zaman'] - temp['cikis_zaman']).dt.total_seconds().astype(np.float32)
+    temp = temp[(temp['sure'] > 0) & (temp['sure'] < 7200)]
+
+    temp['saat'] = temp['cikis_zaman'].dt.hour.astype(np.int8)
+    temp['gun'] = temp['cikis_zaman'].dt.weekday.astype(np.int8)
+    return temp[['ana_hat_no', 'baslangic_durak_no', 'bitis_durak_no', 'sure', 'saat', 'gun']]
@@ -0,0 +1,93 @@
+"""
+Prophet talep modeli eğitimi (tek hat).
+
+Bu modül Django modellerini import etmez: toplu eğitimde (egitim_yoneticisi)
+süreç havuzundaki işçiler tarafından doğrudan çalıştırılır. Prophet kütüphanesi
+ilk eğitimde yüklenir.
+"""
+import os
+import time
+
+import joblib
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(CURRENT_DIR, 'saved_models')
+
+
+def prophet_sinifi():
+    """Prophet sınıfı; kütüphane yüklü değilse None."""
+    try:
+        from prophet import Prophet
+    except ImportError:
+        return None
+    return Prophet
+
+
+def prophet_model_yolu(hat_no):
+    return os.path.join(MODEL_DIR, f'prophet_hat_{hat_no}.pkl')
+
+
+def prophet_egit(hat_no, df):
+    """
+    Prophet modelini 'Gerçekçi Döngüler' üretecek şekilde eğitir ve diske yazar.
+    df: saatlik seri (ds, y). Eğitilen modeli döner; hata olursa istisna fırlatır.
+    """
+    Prophet = prophet_sinifi()
+    if Prophet is None:
+        raise ImportError("'prophet' kütüphanesi yüklü değil")
+
+    # Küp zaten saatlik; boş saatleri sıfırla doldur
+    df_agg = df.set_index('ds').resample('h').sum().fillna(0).reset_index()
+
+    # --- GERÇEKÇİLİK AYARLARI ---
+    model_p = Prophet(
+        daily_seasonality=True,  # Günlük döngüyü (Sabah/Akşam pikleri) zorla
+        weekly_seasonality=True,  # Haftalık döngüyü (Hafta sonu düşüşü) zorla
+        yearly_seasonality=True,
+        # changepoint_prior_scale=0.001: Trendi çok katı yapar.
+        # Yani veri eski olsa bile 1 yıl sonrasına "düşüş" veya "yükseliş" abartılı yansımaz.
+        changepoint_prior_scale=0.001,
+        # seasonality_prior_scale=10.0: Saatlik dalgalanmaları (sabah yoğunluğu vb.) belirginleştirir.
+        seasonality_prior_scale=10.0
+    )
+
+    model_p.add_country_holidays(country_name='TR')
+    model_p.fit(df_agg)
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = prophet_model_yolu(hat_no)
+    gecici = f"{path}.tmp{os.getpid()}"
+    joblib.dump(model_p, gecici)
+    os.replace(gecici, path)  # Yarım yazılmış model dosyası okunmasın
+    return model_p
+
+
+def hat_egit(hat_no, seri=None):
+    """
+    Süreç havuzu işçisi: tek hattın modelini eğitir, tahmin deposunu yeniler ve
+    durum kaydı döner.
+    seri verilmezse hattın serisi sütunsal depodan akış modunda toplanır
+    (depo, ana süreçte önceden güncellenmiş olmalıdır).
+    """
+    bas = time.perf_counter()
+    kayit = {'hat_no': hat_no, 'durum': 'hata', 'satir': 0, 'hata': None}
+    try:
+        if seri is None:
+            from .elkart_deposu import hat_saatlik_akis
+            seri = hat_saatlik_akis(hat_no)
+        if seri is None or seri.empty:
+            kayit['durum'] = 'veri_yok'
+        else:
+            kayit['satir'] = len(seri)
+            model_p = prophet_egit(hat_no, seri)
+            kayit['durum'] = 'tamam'
+            # Yeni modelin tahminleri hemen depoya yazılır (tahmin_deposu)
+            from .tahmin_deposu import tahmini_yenile
+            try:
+                kayit['tahmin_saat'] = tahmini_yenile(hat_no, model_p)
+            except Exception as e:
+                kayit['hata'] = f"Tahmin deposu yazılamadı: {e}"
+    except Exception as e:
+        kayit['hata'] = str(e)
+    kayit['sure_sn'] = round(time.perf_counter() - bas, 2)
+    return kayit
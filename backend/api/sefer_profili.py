@@ -0,0 +1,293 @@
+"""
+Geçmiş DurakVaris verisinden hat / saat bazlı sefer süre profilleri.
+
+Her hat için durak sırası (HatDurak) boyunca ardışık iki durak arasındaki
+ortalama geçiş süresi (DurakVaris.gecen_sure_saniye), seferin kalkış saatine
+göre 24 ayrı profil olarak hesaplanır ve KÜMÜLATİF diziler halinde tutulur:
+
+    kum[hat, saat] = [0, t(d0->d1), t(d0->d2), ..., sefer süresi]
+
+Bir aracın ilerlemesi, kalkıştan beri geçen sürenin bu dizide ikili arama
+(searchsorted) ile yerinin bulunmasıyla hesaplanır: içinde bulunulan durak
+aralığı, bir sonraki durak ve aralık içindeki oran O(log durak) maliyetlidir.
+Konum, durakların güzergah üzerindeki mesafeleri arasında ara değerlenir.
+
+Saat bucket'ı her segment ölçümünün kendi çıkış saatidir (seferin kalkış
+saati DurakVaris'te yok); uzun seferlerde son segmentler bir sonraki saatin
+profiline düşebilir, bu yaklaşıklık kabul edilmiştir.
+
+Veri yoksa geri dönüşler: saate özel ortalama -> segmentin tüm saatler
+ortalaması -> hattın segment medyanı -> eşit aralıklı 60 dk'lık sefer.
+Durağı 2'den az olan hatlar 60 dk'lık doğrusal ilerlemeyle yürütülür.
+"""
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .models import HatDurak, DurakVaris
+from .dosya_onbellegi import SureliNesne
+from .veri_damgasi import damga_yollari
+from .guzergah_geometrisi import guzergah_geometrisi
+
+VARSAYILAN_SEFER_SN = 60 * 60
+SEGMENT_AZAMI_SN = 30 * 60  # Bundan uzun geçişler (veri hatası / mola) sayılmaz
+SAAT_MIN_ORNEK = 3  # Saate özel ortalama için gereken asgari gözlem
+PROFIL_OMRU = 3600
+SAATLER = 24
+OLCUM_PARCASI = 200000  # Segment ölçümleri bu kadar satırlık parçalarla toplanır
+
+
+def _olcumleri_topla(parcalar):
+    df = pd.concat(parcalar, ignore_index=True)
+    return df.groupby(['hat_id', 'baslangic_durak_id', 'bitis_durak_id', 'saat'], sort=False, as_index=False)[
+        ['toplam', 'n']].sum()
+
+
+def segment_olcumleri(hat_idleri, parca=OLCUM_PARCASI):
+    """
+    (hat, başlangıç, bitiş, saat) bazında segment ölçümleri: [{..., 'ort', 'n'}].
+
+    Saat, veritabanında (ExtractHour) değil burada, çıkış zamanı yerel saate
+    (settings.TIME_ZONE) çevrilerek bulunur: MySQL'de saat dilimi tabloları
+    yüklü değilse CONVERT_TZ NULL döner ve saatlik profiller sessizce
+    kaybolurdu. Satırlar 'parca' büyüklüğünde okunup toplanır; bellek
+    kullanımı tablo boyutuna değil (hat, segment, saat) sayısına bağlıdır.
+    """
+    qs = (DurakVaris.objects
+          .filter(hat_id__in=hat_idleri, gecen_sure_saniye__gt=0,
+                  gecen_sure_saniye__lte=SEGMENT_AZAMI_SN, cikis_zaman__isnull=False)
+          .values_list('hat_id', 'baslangic_durak_id', 'bitis_durak_id', 'cikis_zaman', 'gecen_sure_saniye'))
+
+    sutunlar = ['hat_id', 'baslangic_durak_id', 'bitis_durak_id', 'cikis_zaman', 'toplam']
+    kismi, satirlar = [], []
+
+    def parcayi_isle():
+        df = pd.DataFrame(satirlar, columns=sutunlar)
+        zaman = pd.to_datetime(df.pop('cikis_zaman'), utc=True)
+        df['saat'] = zaman.dt.tz_convert(settings.TIME_ZONE).dt.hour
+        df['n'] = 1
+        kismi.append(_olcumleri_topla([df]))
+        satirlar.clear()
+
+    for satir in qs.iterator(chunk_size=parca):
+        satirlar.append(satir)
+        if len(satirlar) >= parca:
+            parcayi_isle()
+    if satirlar:
+        parcayi_isle()
+    if not kismi:
+        return []
+
+    toplam = _olcumleri_topla(kismi)
+    toplam['ort'] = toplam['toplam'] / toplam['n']
+    return toplam.drop(columns='toplam').to_dict('records')
+
+
+class SeferProfilleri:
+    """
+    Hat sırası (guzergah_geometrisi ile aynı) -> duraklar + saatlik kümülatif süreler.
+
+    Düz diziler:
+        durak_adlari, durak_mesafe : tüm hatların durakları uç uca (ad, güzergah km'si)
+        kum, kum_genel              : tüm (hat, saat) blokları uç uca; kum_genel blok
+                                      ofsetleriyle ağ boyunca sıralıdır (searchsorted için)
+    Hat başına: durak_bas, durak_sayisi, blok_bas (0. saat bloğunun başı).
+    """
+
+    def __init__(self, geometri):
+        self.geometri = geometri
+        hat_sayisi = len(geometri.hat_idleri)
+        self.durak_bas = np.zeros(hat_sayisi, dtype=np.int64)
+        self.durak_sayisi = np.zeros(hat_sayisi, dtype=np.int64)
+        self.durak_adlari = np.empty(0, dtype=object)
+        self.durak_mesafe = np.empty(0, dtype=np.float64)
+        self.blok_bas = np.zeros(hat_sayisi, dtype=np.int64)
+        self.kum = np.empty(0, dtype=np.float64)
+        self.kum_genel = np.empty(0, dtype=np.float64)
+        self.azami_sure = float(VARSAYILAN_SEFER_SN)
+        self.gercek_veri = np.zeros(hat_sayisi, dtype=bool)  # DurakVaris'ten profil çıktı mı
+
+    @classmethod
+    def veritabanindan(cls):
+        """2 sorgu: sıralı hat durakları + segment ölçümleri (saat bazında Python'da toplanır)."""
+        geometri = guzergah_geometrisi()
+        profil = cls(geometri)
+        if not len(geometri.hat_idleri):
+            return profil
+
+        # 1. Duraklar (hat, sıra düzeninde)
+        hat_duraklari = {}
+        for hat_id, durak_id, ad, enlem, boylam in (
+                HatDurak.objects.filter(hat_id__in=list(geometri.hat_sirasi))
+                .order_by('hat_id', 'sira')
+                .values_list('hat_id', 'durak_id', 'durak__durak_adi', 'durak__enlem', 'durak__boylam')):
+            hat_duraklari.setdefault(hat_id, []).append((durak_id, ad, enlem, boylam))
+
+        # 2. Segment süreleri: (hat, başlangıç, bitiş, çıkış saati) -> ortalama, gözlem sayısı
+        olcumler = {}
+        for satir in segment_olcumleri(list(hat_duraklari)):
+            olcumler.setdefault(satir['hat_id'], []).append(satir)
+
+        adlar, mesafeler, bloklar = [], [], []
+        durak_ofset = blok_ofset = 0
+        for k, hat_id in enumerate(geometri.hat_idleri.tolist()):
+            duraklar = hat_duraklari.get(hat_id, [])
+            n = len(duraklar)
+            profil.durak_bas[k], profil.durak_sayisi[k] = durak_ofset, n
+            adlar.extend(d[1] for d in duraklar)
+            mesafeler.append(profil._durak_mesafeleri(k, duraklar))
+            durak_ofset += n
+
+            profil.blok_bas[k] = blok_ofset
+            if n >= 2:
+                sureler, gercek = cls._segment_sureleri(duraklar, olcumler.get(hat_id, []))
+                profil.gercek_veri[k] = gercek
+                kum = np.zeros((SAATLER, n))
+                kum[:, 1:] = np.round(np.cumsum(sureler, axis=1), 3)  # ms; toplamlar kayan noktayla kaymasın
+                bloklar.append(kum.ravel())
+                blok_ofset += SAATLER * n
+
+        profil.durak_adlari = np.array(adlar + [None], dtype=object)[:-1]
+        profil.durak_mesafe = np.concatenate(mesafeler) if mesafeler else profil.durak_mesafe
+        if bloklar:
+            profil.kum = np.concatenate(bloklar)
+            profil._genel_diziyi_kur()
+        return profil
+
+    # =========================================================================
+    # KURULUM YARDIMCILARI
+    # =========================================================================
+    @staticmethod
+    def _segment_sureleri(duraklar, olcumler):
+        """(24, n-1) segment süre matrisi ve gerçek veri kullanılıp kullanılmadığı."""
+        n = len(duraklar)
+        segment_sirasi = {}
+        for i in range(n - 1):
+            segment_sirasi.setdefault((duraklar[i][0], duraklar[i + 1][0]), i)
+
+        toplam = np.zeros((SAATLER, n - 1))
+        adet = np.zeros((SAATLER, n - 1))
+        for satir in olcumler:
+            i = segment_sirasi.get((satir['baslangic_durak_id'], satir['bitis_durak_id']))
+            if i is None or satir['saat'] is None:
+                continue
+            toplam[satir['saat'], i] += satir['ort'] * satir['n']
+            adet[satir['saat'], i] += satir['n']
+
+        varsayilan = VARSAYILAN_SEFER_SN / (n - 1)
+        segment_adet = adet.sum(axis=0)
+        if not segment_adet.any():
+            return np.full((SAATLER, n - 1), varsayilan), False
+
+        # Segmentin tüm saatler ortalaması; hiç ölçülmemiş segmentlere hattın medyanı
+        segment_ort = np.divide(toplam.sum(axis=0), segment_adet, out=np.zeros(n - 1), where=segment_adet > 0)
+        segment_ort[segment_adet == 0] = np.median(segment_ort[segment_adet > 0])
+
+        saatlik = np.divide(toplam, adet, out=np.zeros_like(toplam), where=adet > 0)
+        return np.where(adet >= SAAT_MIN_ORNEK, saatlik, segment_ort), True
+
+    def _durak_mesafeleri(self, k, duraklar):
+        """
+        Durakların güzergah başından itibaren km cinsinden konumu. Durak koordinatları
+        güzergaha izdüşürülür; koordinatlar kullanılamazsa duraklar eşit aralıklı kabul edilir.
+        """
+        n = len(duraklar)
+        g = self.geometri
+        uzunluk = float(g.uzunluk[k])
+        esit = np.linspace(0.0, uzunluk, n) if n > 1 else np.zeros(n)
+        if n < 2:
+            return esit
+
+        koordinat = np.array([(d[2] or 0.0, d[3] or 0.0) for d in duraklar], dtype=np.float64)
+        if (np.abs(koordinat) < 1).any():
+            return esit
+
+        bas, bit = g.bas[k], g.bas[k] + g.sayi[k]
+        olcek = np.cos(np.radians(koordinat[:, 0].mean()))
+        d_enlem = koordinat[:, 0:1] - g.enlem[bas:bit][None, :]
+        d_boylam = (koordinat[:, 1:2] - g.boylam[bas:bit][None, :]) * olcek
+        en_yakin = np.argmin(d_enlem ** 2 + d_boylam ** 2, axis=1)
+
+        mesafe = np.maximum.accumulate(g.mesafe[bas + en_yakin] - g.mesafe[bas])
+        # Duraklar güzergahın küçük bir kısmına yığılıyorsa (koordinatlar hatalı) eşit aralık
+        if mesafe[-1] - mesafe[0] < 0.5 * uzunluk:
+            return esit
+        return mesafe
+
+    def _genel_diziyi_kur(self):
+        """Her bloğa önceki blokların toplam süresini ekleyerek ağ geneli sıralı dizi kurar."""
+        ofset = np.zeros(len(self.kum))
+        bloklar = [(self.blok_bas[k], int(self.durak_sayisi[k]))
+                   for k in range(len(self.blok_bas)) if self.durak_sayisi[k] >= 2]
+        birikim, azami = 0.0, float(VARSAYILAN_SEFER_SN)
+        for bas, n in bloklar:
+            for s in range(SAATLER):
+                b = bas + s * n
+                ofset[b:b + n] = birikim
+                birikim += self.kum[b + n - 1]
+                azami = max(azami, self.kum[b + n - 1])
+        self.kum_genel = self.kum + ofset
+        self.azami_sure = float(azami)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(
+            v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+
+    # =========================================================================
+    # İLERLEME SORGUSU (vektörel)
+    # =========================================================================
+    def ilerleme(self, hatlar, saatler, gecen_sn):
+        """
+        Her araç (hat sırası, kalkış saati, kalkıştan beri geçen sn) için:
+            toplam_sn : seferin profildeki toplam süresi
+            mesafe_km : güzergah başından katedilen mesafe
+            hedef     : bir sonraki durağın düz durak dizisindeki indeksi (-1: durak yok)
+        """
+        hatlar = np.asarray(hatlar, dtype=np.int64)
+        gecen_sn = np.asarray(gecen_sn, dtype=np.float64)
+        n = self.durak_sayisi[hatlar]
+        uzunluk = self.geometri.uzunluk[hatlar]
+
+        toplam = np.full(len(hatlar), float(VARSAYILAN_SEFER_SN))
+        mesafe = np.clip(gecen_sn / VARSAYILAN_SEFER_SN, 0, 1) * uzunluk
+        hedef = np.where(n == 1, self.durak_bas[hatlar], -1)
+
+        p = n >= 2
+        if p.any():
+            hp, np_ = hatlar[p], n[p]
+            bas = self.blok_bas[hp] + (np.asarray(saatler)[p] % SAATLER) * np_
+            son = bas + np_ - 1
+            toplam[p] = self.kum[son]
+            g = np.clip(gecen_sn[p], 0, toplam[p])
+
+            # İçinde bulunulan durak aralığı [j, j+1]
+            j = np.searchsorted(self.kum_genel, self.kum_genel[bas] + g, side='right') - 1
+            j = np.clip(j, bas, son - 1)
+            parca = self.kum[j + 1] - self.kum[j]
+            t = np.clip(np.divide(g - self.kum[j], parca, out=np.ones_like(parca), where=parca > 0), 0, 1)
+
+            i = j - bas
+            d = self.durak_bas[hp] + i
+            mesafe[p] = self.durak_mesafe[d] + t * (self.durak_mesafe[d + 1] - self.durak_mesafe[d])
+            hedef[p] = d + 1
+        return toplam, mesafe, hedef
+
+    def hedef_adlari(self, hedef):
+        adlar = np.full(len(hedef), "Bilinmiyor", dtype=object)
+        var = hedef >= 0
+        adlar[var] = self.durak_adlari[hedef[var]]
+        return adlar
+
+
+# --- SÜREÇ İÇİ PROFİLLER ---
+_PROFILLER = SureliNesne(lambda: SeferProfilleri.veritabanindan(), PROFIL_OMRU,
+                         dosya_bulucu=lambda: damga_yollari('guzergah', 'durak', 'varis'))
+
+
+def profilleri_gecersiz_kil():
+    _PROFILLER.gecersiz_kil()
+
+
+def sefer_profilleri():
+    """Güncel sefer profillerini döner; durak / varış verisi değişince yeniden kurulur."""
+    return _PROFILLER.getir()
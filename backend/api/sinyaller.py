@@ -0,0 +1,28 @@
+"""
+Model sinyalleri: veri değiştiğinde süreç içi önbellekleri geçersiz kılar.
+ApiConfig.ready() içinde yüklenir.
+
+Sadece tek tek değişen küçük tablo (EkSefer) için alıcı vardır. Büyük
+tablolarda (HatTarife, DurakVaris, HatGuzergah, HatDurak, Durak, Hat
+cascade'i) post_delete alıcısı Django'nun hızlı silmesini kapatır ve
+.all().delete() her satırı belleğe yükleyip alıcıyı satır başına çalıştırır;
+bu tabloları yükleyen komutlar (ve admin / Hat API'si) işlemden sonra veri
+damgasını (veri_damgasi) bir kez yeniler, önbellekler damgaya bağlıdır.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import EkSefer, Hat
+from .tarife_motoru import indeksi_gecersiz_kil
+from .konum_motoru import agi_gecersiz_kil
+from .kapasite_analizi import kapasiteyi_gecersiz_kil
+
+
+@receiver([post_save, post_delete], sender=EkSefer)
+def ek_sefer_degisti(sender, instance, **kwargs):
+    indeksi_gecersiz_kil()
+    agi_gecersiz_kil()
+    # Sadece o hattın kapasite sonuçları (ve ağ matrisi) düşer; ek sefer damgası
+    # diğer süreçlerin tarife indeksini ve ağ durumunu da yeniler
+    ana_hat_no = Hat.objects.filter(id=instance.hat_id).values_list('ana_hat_no', flat=True).first()
+    kapasiteyi_gecersiz_kil(ana_hat_no)
@@ -0,0 +1,164 @@
+"""
+Önceden hesaplanmış saatlik talep tahminleri deposu.
+
+Her hat için Prophet tahmini, içinde bulunulan saatten başlayarak
+TAHMIN_UFKU saatlik kayan bir ufuk için BİR KEZ hesaplanır ve
+veri_seti/_depo/tahminler/tahmin_hat_<hat>.npz dosyasına yazılır:
+
+    bas      : ilk tahmin saati (epoch saat, datetime64[h])
+    yhat     : saatlik tahminler (float32, negatifler sıfırlanmış)
+    model_iz : tahmini üreten model dosyasının (mtime_ns, boyut) imzası
+
+İstekler (günlük / haftalık / aylık / yıllık) depodaki seriden dilimlenip
+kümelenir. Hattın depo kaydı (npz) dosyanın parmak izi ile dosya_onbellekli'de
+hat başına BİR kez tutulur; istek sonuçları önbelleğe alınmaz (saat / ufuk /
+küme kombinasyonları önbelleği doldurmasın).
+
+Depo şu durumlarda yenilenir:
+  - Model yeniden eğitildiğinde (prophet_egitimi.hat_egit eğitimden hemen sonra)
+  - Zamanlanmış görevle: python manage.py tahminleri_guncelle (kalan ufuk azaldıysa)
+  - İstekte depo yoksa, model değişmişse veya kalan ufuk yetmiyorsa (DemandPredictor)
+
+Bu modül Django modellerini import etmez (süreç havuzu işçilerinde çalışır).
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .veri_araclari import DEPO_KLASORU
+from .dosya_onbellegi import dosya_onbellekli
+from .prophet_egitimi import prophet_model_yolu
+
+TAHMIN_KLASORU = os.path.join(DEPO_KLASORU, 'tahminler')
+EN_UZUN_ISTEK = 8760  # saat (yıllık tahmin)
+TAHMIN_UFKU = EN_UZUN_ISTEK + 24 * 31  # Yıllık istekler bir ay boyunca depodan karşılanır
+YENILEME_PAYI = 24 * 7  # Zamanlanmış yenileme: kalan ufuk EN_UZUN_ISTEK + bu değerin altındaysa
+
+
+def tahmin_dosyasi(hat_no):
+    return os.path.join(TAHMIN_KLASORU, f'tahmin_hat_{hat_no}.npz')
+
+
+def _saat_no(zaman):
+    return int(np.datetime64(pd.Timestamp(zaman).floor('h').to_datetime64(), 'h').astype(np.int64))
+
+
+def model_izi(hat_no):
+    try:
+        st = os.stat(prophet_model_yolu(hat_no))
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return [0, 0]
+
+
+# =============================================================================
+# HESAPLAMA / YAZMA
+# =============================================================================
+def tahmin_hesapla(model_p, bas, saat=TAHMIN_UFKU):
+    """bas saatinden itibaren 'saat' adet saatlik tahmin (float32, negatifsiz)."""
+    future = pd.DataFrame({'ds': pd.date_range(start=pd.Timestamp(bas).floor('h'), periods=saat, freq='h')})
+    forecast = model_p.predict(future)
+    return forecast['yhat'].clip(lower=0).to_numpy(dtype=np.float32)
+
+
+def tahmini_kaydet(hat_no, bas, yhat, model_iz):
+    os.makedirs(TAHMIN_KLASORU, exist_ok=True)
+    yol = tahmin_dosyasi(hat_no)
+    gecici = f"{yol}.tmp{os.getpid()}"
+    with open(gecici, 'wb') as f:
+        np.savez(f, bas=np.int64(_saat_no(bas)), yhat=yhat, model_iz=np.array(model_iz, dtype=np.int64))
+    os.replace(gecici, yol)
+
+
+def tahmini_yenile(hat_no, model_p=None, bas=None):
+    """
+    Hattın tahmin deposunu yeniden hesaplar. Model verilmezse diskten yüklenir.
+    Yazılan saat sayısını döner; model yoksa None.
+    """
+    hat_no = str(hat_no)
+    iz = model_izi(hat_no)
+    if model_p is None:
+        if iz == [0, 0]:
+            return None
+        model_p = joblib.load(prophet_model_yolu(hat_no))
+    bas = bas or pd.Timestamp.now()
+    yhat = tahmin_hesapla(model_p, bas)
+    tahmini_kaydet(hat_no, bas, yhat, iz)
+    return len(yhat)
+
+
+# =============================================================================
+# OKUMA
+# =============================================================================
+def tahmin_oku(hat_no):
+    """{'bas': epoch saat, 'yhat': dizi, 'model_iz': [..]} ya da None (her çağrıda diskten)."""
+    try:
+        with np.load(tahmin_dosyasi(hat_no)) as veri:
+            return {'bas': int(veri['bas']), 'yhat': veri['yhat'], 'model_iz': veri['model_iz'].tolist()}
+    except Exception:
+        return None
+
+
+def kalan_ufuk(hat_no, simdi, kayit=None):
+    """
+    Depodaki tahminin simdi'den itibaren kaç saat daha yettiği. Depo yoksa ya da
+    tahmin güncel model dosyasıyla üretilmemişse -1.
+    """
+    kayit = kayit if kayit is not None else tahmin_oku(hat_no)
+    if kayit is None or kayit['model_iz'] != model_izi(hat_no):
+        return -1
+    i = _saat_no(simdi) - kayit['bas']
+    if i < 0:
+        return -1
+    return len(kayit['yhat']) - i
+
+
+def tahmin_kumele(bas, yhat, agg='hour'):
+    """Saatlik diziyi istenen kümeye indirger: [{'ds': iso, 'yhat': değer}]."""
+    seri = pd.Series(yhat.astype(float), index=pd.date_range(start=bas, periods=len(yhat), freq='h'))
+    if agg == 'day':
+        seri = seri.resample('D').sum()
+    elif agg == 'month':
+        seri = seri.resample('MS').sum()
+    return [{'ds': ds.isoformat(), 'yhat': float(y)} for ds, y in seri.items()]
+
+
+@dosya_onbellekli(lambda hat_no: [tahmin_dosyasi(hat_no)])
+def _depo_kaydi(hat_no):
+    """Hattın depo kaydı; dosya değişene kadar bellekten döner."""
+    return tahmin_oku(hat_no)
+
+
+def hat_tahmini(hat_no, simdi, hours=24, agg='hour'):
+    """
+    simdi'nin saatinden başlayan 'hours' saatlik tahmin (agg ile kümelenmiş).
+    Depo yoksa, eskiyse veya ufku yetmiyorsa None (çağıran yeniler).
+    """
+    hat_no, hours = str(hat_no), int(hours)
+    kayit = _depo_kaydi(hat_no)
+    saat_no = _saat_no(simdi)
+    if kalan_ufuk(hat_no, simdi, kayit) < hours:
+        return None
+    i = saat_no - kayit['bas']
+    return tahmin_kumele(pd.Timestamp(np.datetime64(saat_no, 'h')), kayit['yhat'][i:i + hours], agg)
+
+
+# =============================================================================
+# ZAMANLANMIŞ YENİLEME (süreç havuzu işçisi)
+# =============================================================================
+def yenileme_gerekli_mi(hat_no, simdi=None):
+    simdi = simdi or pd.Timestamp.now()
+    return kalan_ufuk(hat_no, simdi) < EN_UZUN_ISTEK + YENILEME_PAYI
+
+
+def hat_tahminini_guncelle(hat_no, zorla=False):
+    """(hat_no, durum, saat sayısı / hata) döner. durum: yenilendi / guncel / model_yok / hata"""
+    try:
+        if not zorla and not yenileme_gerekli_mi(hat_no):
+            return hat_no, 'guncel', None
+        n = tahmini_yenile(hat_no)
+        return (hat_no, 'model_yok', None) if n is None else (hat_no, 'yenilendi', n)
+    except Exception as e:
+        return hat_no, 'hata', str(e)
@@ -0,0 +1,155 @@
+"""
+Hat x Tarih x Saat talep küpü.
+
+Elkart dosyaları dönüştürülürken tek geçişte üretilen ağ geneli (hat, takvim
+günü, saat) özetleri (elkart_deposu.ozet_oku) TalepKupu tablosuna yazılır. Kapasite
+analizi ve Prophet eğitimi ham biniş satırları yerine bu küpü okur; bir
+hattın bir yıllık verisi en fazla 8.760 hücredir.
+
+Küp artımlı güncellenir: her kaynak CSV'nin mtime/boyut imzası
+TalepKupuKaynagi tablosunda tutulur, sadece değişen dosyaların satırları
+silinip yeniden yazılır. Güncelleme (kupu_guncelle) yönetim komutlarından
+çalışır; okuyucular web isteklerinde küpü olduğu gibi okur.
+"""
+import os
+import pandas as pd
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import TalepKupu, TalepKupuKaynagi
+from .veri_araclari import hat_no_temizle
+from .veri_damgasi import damgala
+from .elkart_deposu import (
+    depoyu_guncelle, elkart_dosyalari, kaynak_klasoru, dosya_imzasi, ozet_oku
+)
+
+KUP_BATCH = 5000
+
+
+# =============================================================================
+# KÜP OLUŞTURMA / GÜNCELLEME
+# =============================================================================
+def _kaynak_adi(dosya):
+    return os.path.basename(kaynak_klasoru(dosya))
+
+
+def kaynagi_kupe_yaz(dosya):
+    """Bir kaynak dosyanın küp satırlarını silip yeniden yazar. Yazılan hücre sayısını döner."""
+    kaynak = _kaynak_adi(dosya)
+    imza = dosya_imzasi(dosya)
+    hucre_sayisi = 0
+
+    with transaction.atomic():
+        TalepKupu.objects.filter(kaynak=kaynak).delete()
+        batch = []
+        for hat_no, tarih, saat, yolcu in ozet_oku(dosya).itertuples(index=False, name=None):
+            batch.append(TalepKupu(
+                hat_no=hat_no[:10], tarih=tarih.date(), saat=int(saat), yolcu=int(yolcu), kaynak=kaynak
+            ))
+            if len(batch) >= KUP_BATCH:
+                TalepKupu.objects.bulk_create(batch, batch_size=KUP_BATCH)
+                hucre_sayisi += len(batch)
+                batch = []
+        if batch:
+            TalepKupu.objects.bulk_create(batch, batch_size=KUP_BATCH)
+            hucre_sayisi += len(batch)
+
+        TalepKupuKaynagi.objects.update_or_create(
+            kaynak=kaynak, defaults={'mtime': imza['mtime'], 'boyut': imza['boyut']}
+        )
+    return hucre_sayisi
+
+
+def kupu_guncelle(zorla=False):
+    """
+    Değişen veya yeni elkart dosyalarını küpe işler, silinen dosyaların
+    hücrelerini kaldırır. Güncellenen kaynak adlarını döner.
+    """
+    depoyu_guncelle(zorla=zorla)
+
+    dosyalar = elkart_dosyalari()
+    kayitli = {k.kaynak: k for k in TalepKupuKaynagi.objects.all()}
+    guncellenen = []
+
+    for dosya in dosyalar:
+        kaynak = _kaynak_adi(dosya)
+        imza = dosya_imzasi(dosya)
+        kayit = kayitli.get(kaynak)
+        if not zorla and kayit and kayit.mtime == imza['mtime'] and kayit.boyut == imza['boyut']:
+            continue
+        try:
+            hucre = kaynagi_kupe_yaz(dosya)
+            print(f"[KÜP] {kaynak}: {hucre} hücre yazıldı.")
+            guncellenen.append(kaynak)
+        except Exception as e:
+            print(f"[KÜP] Güncelleme hatası ({kaynak}): {e}")
+
+    gecerli = {_kaynak_adi(d) for d in dosyalar}
+    eskiler = [k for k in kayitli if k not in gecerli]
+    if eskiler:
+        TalepKupu.objects.filter(kaynak__in=eskiler).delete()
+        TalepKupuKaynagi.objects.filter(kaynak__in=eskiler).delete()
+
+    if guncellenen or eskiler:
+        damgala('talep')  # Küpten türetilen sonuçlar (kapasite) tüm süreçlerde yenilensin
+    return guncellenen
+
+
+# =============================================================================
+# KÜP OKUMA
+# =============================================================================
+def hat_saatlik_seri(hat_no, guncelle=False):
+    """
+    Hattın saatlik talep serisini döner (Prophet formatı: ds, y).
+    Aynı saate düşen farklı kaynakların hücreleri toplanır.
+    """
+    if guncelle:
+        kupu_guncelle()
+
+    satirlar = (TalepKupu.objects.filter(hat_no=hat_no_temizle(hat_no))
+                .values('tarih', 'saat').annotate(toplam=Sum('yolcu')).order_by())
+    df = pd.DataFrame.from_records(satirlar, columns=['tarih', 'saat', 'toplam'])
+    if df.empty:
+        return pd.DataFrame(columns=['ds', 'y'])
+
+    df['ds'] = pd.to_datetime(df['tarih']) + pd.to_timedelta(df['saat'].astype(int), unit='h')
+    return df.rename(columns={'toplam': 'y'})[['ds', 'y']].sort_values('ds').reset_index(drop=True)
+
+
+def hat_saatlik_ortalama(hat_no, guncelle=False):
+    """
+    Hattın saat bazında ortalama GÜNLÜK biniş sayısını döner: {saat: ortalama}.
+    Ortalama, küpte verisi bulunan gün sayısına bölünerek hesaplanır.
+    """
+    if guncelle:
+        kupu_guncelle()
+
+    qs = TalepKupu.objects.filter(hat_no=hat_no_temizle(hat_no))
+    gun_sayisi = qs.values('tarih').distinct().count()
+    if not gun_sayisi:
+        return {}
+
+    toplamlar = qs.values('saat').annotate(toplam=Sum('yolcu')).order_by()
+    return {r['saat']: r['toplam'] / gun_sayisi for r in toplamlar}
+
+
+def tum_hat_serileri(guncelle=False):
+    """
+    TÜM hatların saatlik talep serilerini tek sorguyla döner: {hat_no: DataFrame(ds, y)}.
+    Toplu eğitimde her hat için ayrı okuma yapılmasını önler.
+    """
+    if guncelle:
+        kupu_guncelle()
+
+    satirlar = (TalepKupu.objects.values('hat_no', 'tarih', 'saat')
+                .annotate(toplam=Sum('yolcu')).order_by())
+    df = pd.DataFrame.from_records(satirlar, columns=['hat_no', 'tarih', 'saat', 'toplam'])
+    if df.empty:
+        return {}
+
+    df['ds'] = pd.to_datetime(df['tarih']) + pd.to_timedelta(df['saat'].astype(int), unit='h')
+    df = df.rename(columns={'toplam': 'y'})
+    return {
+        hat_no: grup[['ds', 'y']].sort_values('ds').reset_index(drop=True)
+        for hat_no, grup in df.groupby('hat_no', sort=False)
+    }
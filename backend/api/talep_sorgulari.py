@@ -0,0 +1,114 @@
+"""
+TalepVerisi (biniş satırları) üzerinde zaman kovalı toplama.
+
+Filtre (hat, tarih_saat) indeksine uygun kurulur; yalnızca (zaman, yolcu)
+sütunları parça parça okunur ve kovalar burada, zaman yerel saate
+(settings.TIME_ZONE) çevrilerek bulunur. Veritabanında TruncDay/ExtractHour
+kullanılmaz: USE_TZ=True iken MySQL'de bunlar CONVERT_TZ'ye derlenir ve saat
+dilimi tabloları yüklü değilse NULL döner. Bellek kullanımı satır sayısına
+değil kova sayısına bağlıdır.
+
+    talep_ozeti(hat_no='10', aralik='gun', baslangic=..., bitis=...)
+    # [{'zaman': '2025-01-06T00:00:00+00:00', 'yolcu': 5120, 'kayit': 4980}, ...]
+"""
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from .models import TalepVerisi
+from .veri_araclari import hat_no_temizle
+
+# aralik -> yerel (naive) zaman serisinden kova. 'saat_profili' günün saatine göre (0-23) toplar.
+KOVALAR = {
+    'saat': lambda z: z.dt.floor('h'),
+    'gun': lambda z: z.dt.normalize(),
+    'hafta': lambda z: z.dt.normalize() - pd.to_timedelta(z.dt.weekday, unit='D'),  # Pazartesi başı
+    'saat_profili': lambda z: z.dt.hour,
+}
+VARSAYILAN_ARALIK = 'gun'
+TALEP_PARCASI = 200000  # Satırlar bu kadarlık parçalarla okunup toplanır
+
+
+def zaman_parametresi(deger, gun_sonu=False):
+    """
+    ISO tarih ('2025-01-06') veya tarih-saat değerini aware datetime'a çevirir.
+    Sadece tarih verilmişse gün başı (gun_sonu=True ise ertesi gün başı) alınır.
+    Geçersiz değerde ValueError.
+    """
+    if not deger:
+        return None
+    zaman = parse_datetime(deger)
+    if zaman is None:
+        tarih = parse_date(deger)
+        if tarih is None:
+            raise ValueError(f"Geçersiz tarih: {deger}")
+        zaman = datetime.combine(tarih, time.min)
+        if gun_sonu:
+            zaman += timedelta(days=1)
+    if timezone.is_naive(zaman):
+        zaman = timezone.make_aware(zaman)
+    return zaman
+
+
+def talep_sorgusu(hat_id=None, hat_no=None, baslangic=None, bitis=None):
+    """Filtrelenmiş TalepVerisi sorgusu; aralık [baslangic, bitis) yarı açıktır."""
+    qs = TalepVerisi.objects.all()
+    if hat_id is not None:
+        qs = qs.filter(hat_id=hat_id)
+    if hat_no is not None:
+        qs = qs.filter(hat__ana_hat_no=hat_no_temizle(hat_no))
+    if baslangic is not None:
+        qs = qs.filter(tarih_saat__gte=baslangic)
+    if bitis is not None:
+        qs = qs.filter(tarih_saat__lt=bitis)
+    return qs
+
+
+def talep_ozeti(aralik=VARSAYILAN_ARALIK, hatlara_gore=False, parca=TALEP_PARCASI, **filtreler):
+    """
+    Kova başına toplam yolcu ve kayıt sayısı.
+    hatlara_gore=True ise kovalar ana hat numarasına göre de ayrılır.
+    """
+    if aralik not in KOVALAR:
+        raise ValueError(f"Geçersiz aralık: {aralik} (geçerli: {', '.join(KOVALAR)})")
+
+    alanlar = ['kova'] + (['hat__ana_hat_no'] if hatlara_gore else [])
+    qs = talep_sorgusu(**filtreler).values_list('tarih_saat', 'yolcu_sayisi', *alanlar[1:])
+    sutunlar = ['tarih_saat', 'yolcu'] + alanlar[1:]
+    kismi, satirlar = [], []
+
+    def parcayi_isle():
+        df = pd.DataFrame(satirlar, columns=sutunlar)
+        yerel = pd.to_datetime(df.pop('tarih_saat'), utc=True).dt.tz_convert(settings.TIME_ZONE).dt.tz_localize(None)
+        df['kova'] = KOVALAR[aralik](yerel)
+        df['kayit'] = 1
+        kismi.append(df.groupby(alanlar, sort=False, dropna=False, as_index=False)[['yolcu', 'kayit']].sum())
+        satirlar.clear()
+
+    for satir in qs.iterator(chunk_size=parca):
+        satirlar.append(satir)
+        if len(satirlar) >= parca:
+            parcayi_isle()
+    if satirlar:
+        parcayi_isle()
+    if not kismi:
+        return []
+
+    toplam = pd.concat(kismi, ignore_index=True).groupby(alanlar, dropna=False, as_index=False)[
+        ['yolcu', 'kayit']].sum()
+
+    anahtar = 'saat' if aralik == 'saat_profili' else 'zaman'
+    sonuc = []
+    for satir in toplam.itertuples(index=False):
+        if aralik == 'saat_profili':
+            kova = int(satir.kova)
+        else:
+            kova = timezone.make_aware(satir.kova.to_pydatetime()).isoformat()
+        kayit = {anahtar: kova, 'yolcu': int(satir.yolcu), 'kayit': int(satir.kayit)}
+        if hatlara_gore:
+            kayit['hat_no'] = hat_no_temizle(satir.hat__ana_hat_no)
+        sonuc.append(kayit)
+    return sonuc
@@ -0,0 +1,351 @@
+"""
+Bellek içi, indeksli tarife motoru.
+
+Tarife dosyası (tarifeler.csv / .xlsx) vektörel olarak ayrıştırılır ve
+tarifeleri_veritabanina_yukle() ile HatTarife tablosuna toplu yüklenir
+(bkz. yukle_tarifeler komutu). İstek anındaki tarife sorguları
+(hat_tarifeleri) bu tablonun (hat, tarife_tipi, kalkis_saati) indeksini kullanır.
+
+Sık sorgulanan uçlar için HatTarife + aktif EkSefer kayıtları bellekte her
+(hat, alt hat, gün tipi H/C/P) için SIRALI kalkış dakikaları dizisine
+(gece yarısından itibaren dakika, int16) dönüştürülür:
+
+    indeks = tarife_indeksi()
+    indeks.hat_seferleri('1', 'H')         # O(1) sözlük araması
+    indeks.aralik('1', 600, 660)           # ikili arama ile [10:00, 11:00) seferleri
+    indeks.sonraki_seferler('1', 600, 5, 'H', 'H')   # aralik ile sonraki 5 kalkış
+
+Tablolar değişince indeks bir sonraki sorguda yeniden kurulur.
+"""
+import os
+from datetime import time
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractHour
+
+from .models import Hat, HatTarife, EkSefer
+
+from .veri_araclari import VERI_SETI_KLASORU, hat_no_temizle
+from .veri_semasi import sema_bul, okuma_ayarlari, rol_eslemesi, eksik_roller
+from .zaman_donusum import dakika_vektor
+from .dosya_onbellegi import dosya_onbellekli, SureliNesne
+from .veri_damgasi import damgala, damga_yollari
+
+GUN_TIPLERI = ('H', 'C', 'P')  # Haftaiçi, Cumartesi, Pazar
+TARIFE_ROLLERI = ['hat', 'alt_hat', 'saat', 'gun_tipi', 'yon']
+BOS_DIZI = np.empty(0, dtype=np.int16)
+GUN_DAKIKA = 24 * 60
+TARIFE_BATCH = 5000
+ZAMANLAR = [time(dk // 60, dk % 60) for dk in range(GUN_DAKIKA)]  # dakika -> time
+
+
+# =============================================================================
+# TARİFE DOSYASI
+# =============================================================================
+def tarife_adaylari():
+    """Tarife olabilecek dosyaların tam yollarını (içinde 'tarife' geçenler önce) döner."""
+    if not os.path.exists(VERI_SETI_KLASORU):
+        return []
+
+    tum_dosyalar = os.listdir(VERI_SETI_KLASORU)
+    yasakli_kelimeler = ['elkart', 'durak', 'guzergah', 'hatbilgisi', 'varis']
+
+    adaylar = [
+        f for f in tum_dosyalar
+        if (f.endswith('.csv') or f.endswith('.xlsx'))
+           and not any(y in f.lower() for y in yasakli_kelimeler)
+    ]
+    adaylar.sort(key=lambda x: 'tarife' not in x.lower())
+    return [os.path.join(VERI_SETI_KLASORU, aday) for aday in adaylar]
+
+
+@dosya_onbellekli(tarife_adaylari)
+def get_tarife_dataframe():
+    """
+    Tarife dosyasını bulur ve okur (CSV veya Excel).
+    Ayırıcı, kodlama ve sütunlar şema kaydından gelir; sadece tarife rolleri
+    (hat, alt_hat, saat, gun_tipi, yon) metin olarak okunur ve bu adlarla döner.
+    'hat_str' sütunu temizlenmiş ana hat numarasıdır.
+    Sonuç, aday dosyaların parmak izi değişene kadar önbellekten döner.
+    """
+    for tam_yol in tarife_adaylari():
+        aday = os.path.basename(tam_yol)
+        try:
+            sema = sema_bul(tam_yol, 'tarife')
+            if eksik_roller(sema, ['hat', 'saat']):
+                continue
+
+            if aday.endswith('.xlsx'):
+                df = pd.read_excel(tam_yol, **okuma_ayarlari(sema, TARIFE_ROLLERI))
+            else:
+                df = pd.read_csv(tam_yol, on_bad_lines='skip', **okuma_ayarlari(sema, TARIFE_ROLLERI))
+
+            df = df.rename(columns=rol_eslemesi(sema))
+            df['hat_str'] = df['hat'].astype(str).str.split('.').str[0].str.strip()
+            return df
+        except Exception as e:
+            print(f"Dosya okuma hatası ({aday}): {e}")
+            continue
+    return None
+
+
+# =============================================================================
+# İNDEKS
+# =============================================================================
+def gun_tipi_bul(tarih):
+    """Tarihin tarife gün tipini döner: Pazar 'P', Cumartesi 'C', diğerleri 'H'."""
+    gun = tarih.weekday()
+    return 'P' if gun == 6 else ('C' if gun == 5 else 'H')
+
+
+def dakika_metni(dakika):
+    return f"{dakika // 60:02d}:{dakika % 60:02d}"
+
+
+def _sirali(dakikalar):
+    return np.sort(np.asarray(dakikalar, dtype=np.int16), kind='stable')
+
+
+def _alt_hat_kodu(seri):
+    # '0 - HOCAFAKIH TIP FAKÜLTESİ ANASULTAN' -> '0'
+    return seri.astype(str).str.split(' - ').str[0].map(hat_no_temizle)
+
+
+def tarife_satirlari(df):
+    """
+    get_tarife_dataframe() çıktısını geçerli kalkışların
+    (hat, alt_hat, dakika, gun_tipi, yon) tablosuna çevirir.
+    gun_tipi değerin içindeki ilk H/C/P kodudur; kod yoksa None.
+    """
+    dakika = dakika_vektor(df['saat']).to_numpy()
+    satirlar = pd.DataFrame({
+        'hat': df['hat_str'].to_numpy(),
+        'alt_hat': _alt_hat_kodu(df['alt_hat']).to_numpy() if 'alt_hat' in df else '0',
+        'dakika': dakika,
+        'gun_tipi': (df['gun_tipi'].astype(str).str.upper().str.extract(f"([{''.join(GUN_TIPLERI)}])")[0]
+                     .to_numpy() if 'gun_tipi' in df else None),
+        'yon': df['yon'].fillna('').astype(str).str.strip().to_numpy() if 'yon' in df else '',
+    })
+    return satirlar[dakika >= 0].reset_index(drop=True)
+
+
+class TarifeIndeksi:
+    """
+    Tarife satırlarının hat / alt hat / gün tipi bazında sıralı dakika dizileri.
+
+    seferler  : (hat, alt_hat, gun_tipi) -> dizi
+    hat_gun   : (hat, gun_tipi)          -> hattın tüm alt hatları birleşik
+    hat_tum   : hat                      -> gün tipinden bağımsız TÜM satırlar
+    ek        : hat                      -> aktif ek seferler (her gün geçerli)
+    ek_alt    : (hat, alt_hat)           -> alt hattın aktif ek seferleri
+    hat_ana   : Hat.id                   -> ana hat no (istekte sorgu yapmamak için)
+    gun_tipli=False ise (gün tipi bilinmiyor) satırlar her gün tipine yazılır.
+    """
+
+    def __init__(self, satirlar=None, gun_tipli=True):
+        self.seferler = {}
+        self.hat_gun = {}
+        self.hat_tum = {}
+        self.ek = {}
+        self.ek_alt = {}
+        self.hat_ana = {}
+        if satirlar is not None and not satirlar.empty:
+            self._kur(satirlar, gun_tipli)
+
+    @classmethod
+    def veritabanindan(cls):
+        """HatTarife + aktif EkSefer kayıtlarından kurar (3 sorgu)."""
+        hatlar = {h: (hat_no_temizle(a), hat_no_temizle(b))
+                  for h, a, b in Hat.objects.values_list('id', 'ana_hat_no', 'alt_hat_no')}
+        kayitlar = list(HatTarife.objects.values_list('hat_id', 'tarife_tipi', 'kalkis_saati'))
+        satirlar = pd.DataFrame({
+            'hat': [hatlar[h][0] for h, _, _ in kayitlar],
+            'alt_hat': [hatlar[h][1] for h, _, _ in kayitlar],
+            'dakika': [z.hour * 60 + z.minute for _, _, z in kayitlar],
+            'gun_tipi': [g for _, g, _ in kayitlar],
+        })
+        indeks = cls(satirlar)
+        indeks.hat_ana = {h: ana for h, (ana, _) in hatlar.items()}
+
+        ek_seferler = {}
+        for h, z in EkSefer.objects.filter(aktif=True).values_list('hat_id', 'kalkis_saati'):
+            ek_seferler.setdefault(hatlar[h], []).append(z.hour * 60 + z.minute)
+        indeks.ek_alt = {anahtar: _sirali(dk) for anahtar, dk in ek_seferler.items()}
+        ana_ek = {}
+        for (ana, _), dk in ek_seferler.items():
+            ana_ek.setdefault(ana, []).extend(dk)
+        indeks.ek = {ana: _sirali(dk) for ana, dk in ana_ek.items()}
+        return indeks
+
+    def _kur(self, satirlar, gun_tipli):
+        if gun_tipli:
+            gun = satirlar['gun_tipi']
+            gun_maskeleri = {k: (gun == k).to_numpy() for k in GUN_TIPLERI}
+        else:
+            gun_maskeleri = {k: np.ones(len(satirlar), dtype=bool) for k in GUN_TIPLERI}
+
+        for hat, grup in satirlar.groupby('hat', sort=False):
+            self.hat_tum[hat] = _sirali(grup['dakika'])
+
+        for kod, maske in gun_maskeleri.items():
+            secili = satirlar[maske]
+            if 'alt_hat' in secili:
+                for (hat, alt), grup in secili.groupby(['hat', 'alt_hat'], sort=False):
+                    self.seferler[(hat, alt, kod)] = _sirali(grup['dakika'])
+            for hat, grup in secili.groupby('hat', sort=False):
+                self.hat_gun[(hat, kod)] = _sirali(grup['dakika'])
+
+    def __sizeof__(self):
+        diziler = (list(self.seferler.values()) + list(self.hat_gun.values()) + list(self.hat_tum.values())
+                   + list(self.ek.values()) + list(self.ek_alt.values()))
+        return object.__sizeof__(self) + sum(d.nbytes + 100 for d in diziler)
+
+    # --- SORGULAR ---
+    def hat_seferleri(self, hat_no, gun_tipi=None, alt_hat=None):
+        """
+        Hattın sıralı kalkış dakikaları. gun_tipi verilmezse tüm satırlar
+        (gün tipinden bağımsız) döner; alt_hat sadece gun_tipi ile birlikte kullanılır.
+        """
+        hat = hat_no_temizle(hat_no)
+        if gun_tipi is None:
+            return self.hat_tum.get(hat, BOS_DIZI)
+        if alt_hat is not None:
+            return self.seferler.get((hat, hat_no_temizle(alt_hat), gun_tipi), BOS_DIZI)
+        return self.hat_gun.get((hat, gun_tipi), BOS_DIZI)
+
+    def ek_seferleri(self, hat_no, alt_hat=None):
+        hat = hat_no_temizle(hat_no)
+        if alt_hat is not None:
+            return self.ek_alt.get((hat, hat_no_temizle(alt_hat)), BOS_DIZI)
+        return self.ek.get(hat, BOS_DIZI)
+
+    def aralik(self, hat_no, bas_dk, bit_dk, gun_tipi=None, alt_hat=None):
+        """
+        [bas_dk, bit_dk) aralığındaki kalkışları ikili arama ile bulur.
+        (ilk sıra no, dakikalar) döner; sıra no, dizideki kalıcı konumdur.
+        """
+        dizi = self.hat_seferleri(hat_no, gun_tipi, alt_hat)
+        bas, bit = np.searchsorted(dizi, [bas_dk, bit_dk], side='left')
+        return int(bas), dizi[bas:bit]
+
+    def sonraki_seferler(self, hat_no, bas_dk, n, gun_tipi, sonraki_gun_tipi, alt_hat=None):
+        """
+        bas_dk'dan itibaren ilk n kalkışı (planlı + ek) döner: [(dakika, ek_mi, gun_farki)].
+        Gün biterse ertesi günün (sonraki_gun_tipi) seferlerinden devam edilir.
+        Planlı seferler aralik() ile, ek seferler aynı ikili arama ile dilimlenir;
+        her günden en fazla n kalkış birleştirilir. alt_hat verilirse yalnız o alt hat.
+        """
+        ek = self.ek_seferleri(hat_no, alt_hat)
+        sonuc = []
+        for gun_farki, kod in ((0, gun_tipi), (1, sonraki_gun_tipi)):
+            baslangic = bas_dk if gun_farki == 0 else 0
+            kalan = n - len(sonuc)
+            _, planli = self.aralik(hat_no, baslangic, GUN_DAKIKA, kod, alt_hat)
+            ek_dilim = ek[np.searchsorted(ek, baslangic, side='left'):]
+            # Eşit dakikada planlı sefer önce gelir (sıralama kararlı)
+            gun = sorted([(int(dk), False) for dk in planli[:kalan]] + [(int(dk), True) for dk in ek_dilim[:kalan]],
+                         key=lambda s: s[0])
+            sonuc.extend((dk, ek_mi, gun_farki) for dk, ek_mi in gun[:kalan])
+            if len(sonuc) >= n:
+                break
+        return sonuc
+
+
+# --- SÜREÇ İÇİ İNDEKS ---
+# Tarife yüklemeleri / Hat değişiklikleri 'tarife', ek seferler 'ek_sefer'
+# damgasını yeniler; indeks bütün süreçlerde bir sonraki sorguda yeniden kurulur.
+INDEKS_OMRU = 60
+_INDEKS = SureliNesne(lambda: TarifeIndeksi.veritabanindan(), INDEKS_OMRU,
+                      dosya_bulucu=lambda: damga_yollari('tarife', 'ek_sefer'))
+
+
+def indeksi_gecersiz_kil():
+    _INDEKS.gecersiz_kil()
+
+
+def tarife_indeksi():
+    """
+    HatTarife ve aktif ek seferlerden kurulmuş güncel indeksi döner.
+    İndeks süreç içinde tutulur; veri değişince ilk sorguda yeniden kurulur.
+    """
+    return _INDEKS.getir()
+
+
+# =============================================================================
+# VERİTABANI (HatTarife)
+# =============================================================================
+def _hat_eslemesi():
+    """
+    'ana-alt' -> Hat.id ve ana_hat_no -> Hat.id (alt hat 0 öncelikli) eşlemelerini
+    döner. Tarifedeki alt hat veritabanında yoksa satır ana hatta bağlanır.
+    """
+    tam, ana = {}, {}
+    for hat_id, ana_no, alt_no in Hat.objects.order_by('id').values_list('id', 'ana_hat_no', 'alt_hat_no'):
+        ana_no, alt_no = hat_no_temizle(ana_no), hat_no_temizle(alt_no)
+        tam.setdefault(f"{ana_no}-{alt_no}", hat_id)
+        ana.setdefault(ana_no, hat_id)
+    for ana_no in ana:
+        ana[ana_no] = tam.get(f"{ana_no}-0", ana[ana_no])
+    return tam, ana
+
+
+def tarifeleri_veritabanina_yukle(df=None):
+    """
+    Tarife dosyasını HatTarife tablosuna toplu olarak yükler (mevcut kayıtlar silinir).
+    Ayrıştırma ve hat eşleştirme vektöreldir; kayıtlar TARIFE_BATCH'lik bulk_create
+    ile yazılır. Gün tipi kodu olmayan satırlar 'H' sayılır.
+    {'yuklenen': n, 'eslesmeyen': n} döner; tarife dosyası yoksa None.
+    """
+    if df is None:
+        df = get_tarife_dataframe()
+    if df is None:
+        return None
+
+    satirlar = tarife_satirlari(df)
+    tam, ana = _hat_eslemesi()
+    hat_id = (satirlar['hat'] + '-' + satirlar['alt_hat']).map(tam)
+    hat_id = hat_id.fillna(satirlar['hat'].map(ana))
+
+    eslesen = satirlar[hat_id.notna()]
+    hat_id = hat_id[hat_id.notna()].astype(int)
+    gun_tipi = eslesen['gun_tipi'].fillna('H')
+
+    kayitlar = [
+        HatTarife(hat_id=h, kalkis_saati=ZAMANLAR[dk], tarife_tipi=g, yon=y[:50])
+        for h, dk, g, y in zip(hat_id.tolist(), eslesen['dakika'].tolist(), gun_tipi.tolist(),
+                               eslesen['yon'].tolist())
+    ]
+
+    with transaction.atomic():
+        HatTarife.objects.all().delete()
+        HatTarife.objects.bulk_create(kayitlar, batch_size=TARIFE_BATCH)
+    # Toplu işlemden sonra bir kez (HatTarife için sinyal alıcısı yok)
+    indeksi_gecersiz_kil()
+    damgala('tarife')
+
+    return {'yuklenen': len(kayitlar), 'eslesmeyen': int(len(satirlar) - len(eslesen))}
+
+
+def _hat_idleri(hat_no):
+    return list(Hat.objects.filter(ana_hat_no=hat_no_temizle(hat_no)).values_list('id', flat=True))
+
+
+def hat_tarifeleri(hat_no, gun_tipi=None):
+    """
+    Ana hattın (tüm alt hatları) HatTarife kayıtları, kalkış saatine göre sıralı.
+    Filtre (hat, tarife_tipi, kalkis_saati) indeksine uygun kurulur.
+    """
+    qs = HatTarife.objects.filter(hat_id__in=_hat_idleri(hat_no))
+    if gun_tipi:
+        qs = qs.filter(tarife_tipi=gun_tipi)
+    return qs.order_by('kalkis_saati')
+
+
+def saatlik_planli_sefer(hat_no):
+    """Ana hattın saat bazında planlı sefer sayıları (tüm gün tipleri): {saat: sayı}."""
+    satirlar = (HatTarife.objects.filter(hat_id__in=_hat_idleri(hat_no))
+                .annotate(saat=ExtractHour('kalkis_saati')).values('saat')
+                .annotate(sayi=Count('id')).order_by())
+    return {r['saat']: r['sayi'] for r in satirlar}
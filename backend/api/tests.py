@@ -1,3 +1,648 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+
+from django.db.models.deletion import Collector
+from django.db.models.signals import post_delete, post_save
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from . import (
+    veri_araclari, elkart_deposu, veri_damgasi, paralel_okuyucu, tarife_motoru, tahmin_deposu,
+    prophet_egitimi, egitim_yoneticisi,
+)
+from .models import (
+    Hat, Durak, HatDurak, HatGuzergah, HatTarife, EkSefer, DurakVaris, TalepVerisi, TalepKupu, TalepKupuKaynagi,
+)
+from .veri_araclari import parse_time_column
+from .veri_semasi import SemaKaydi
+from .zaman_donusum import saat_vektor, dakika_vektor
+from .dosya_onbellegi import DosyaOnbellegi, ONBELLEK, dosya_onbellekli, nesne_boyutu
+from .tarife_motoru import indeksi_gecersiz_kil, tarife_indeksi, tarifeleri_veritabanina_yukle
+from .konum_motoru import agi_gecersiz_kil, AgDurumu, ag_durumu
+from .konum_farki import FarkKaydi
+from .zamanlayici import TickZamanlayici
+from .model_kaydi import ProphetOnbellegi
+from .guzergah_geometrisi import geometriyi_gecersiz_kil
+from .sefer_profili import profilleri_gecersiz_kil, sefer_profilleri, segment_olcumleri
+from .arac_havuzu import havuzu_gecersiz_kil, arac_havuzu
+from .hat_baglami import baglamlari_gecersiz_kil, hat_baglami
+from .guzergah_geometrisi import guzergah_geometrisi
+from .veri_damgasi import damgala, damga_yolu
+from .talep_kupu import kupu_guncelle
+from .kapasite_analizi import ag_kapasite_matrisi, hat_kapasite_analizi
+from .talep_sorgulari import talep_ozeti, zaman_parametresi
+
+
+# =============================================================================
+# ORTAK: GEÇİCİ VERİ KLASÖRÜ
+# =============================================================================
+class GeciciDepoMixin:
+    """
+    veri_seti, sütunsal depo, şema kaydı, damgalar, tahmin deposu ve model
+    klasörünü her test için geçici bir klasöre yönlendirir ve süreç içi
+    önbellekleri boşaltır; testler gerçek veri_seti/ ağacına dokunmaz.
+    Bütün testler (veritabanı kullananlar dahil) bu sınıftan türetilir:
+    model kayıtları damga yazar.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.kok = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.kok, ignore_errors=True)
+        depo = os.path.join(self.kok, '_depo')
+        yamalar = [
+            mock.patch.object(veri_araclari, 'VERI_SETI_KLASORU', self.kok),
+            mock.patch.object(veri_araclari, 'DEPO_KLASORU', depo),
+            mock.patch.object(elkart_deposu, 'VERI_SETI_KLASORU', self.kok),
+            mock.patch.object(elkart_deposu, 'ELKART_DEPO_KLASORU', os.path.join(depo, 'elkart')),
+            mock.patch.object(tarife_motoru, 'VERI_SETI_KLASORU', self.kok),
+            mock.patch.object(veri_damgasi, 'DAMGA_KLASORU', os.path.join(depo, 'damgalar')),
+            mock.patch.object(tahmin_deposu, 'TAHMIN_KLASORU', os.path.join(depo, 'tahminler')),
+            mock.patch('api.arac_havuzu.ARAC_HAVUZU_DOSYASI', os.path.join(depo, 'arac_havuzu.json')),
+            mock.patch.object(egitim_yoneticisi, 'MANIFEST_YOLU', os.path.join(depo, 'egitim_manifesti.json')),
+            mock.patch.object(prophet_egitimi, 'MODEL_DIR', os.path.join(self.kok, 'saved_models')),
+            mock.patch('api.veri_semasi.KAYIT', SemaKaydi(os.path.join(depo, 'semalar.json'))),
+            mock.patch.object(paralel_okuyucu, 'ISCI_SAYISI', 1),  # Dönüşüm aynı süreçte
+        ]
+        for yama in yamalar:
+            yama.start()
+            self.addCleanup(yama.stop)
+        ONBELLEK.temizle()
+        for gecersiz_kil in (indeksi_gecersiz_kil, agi_gecersiz_kil, geometriyi_gecersiz_kil,
+                             profilleri_gecersiz_kil, havuzu_gecersiz_kil, baglamlari_gecersiz_kil):
+            gecersiz_kil()
+
+    def elkart_yaz(self, ad, satirlar):
+        """satirlar: [(hat, 'YYYY-MM-DD', 'HH:MM', yolcu)]"""
+        yol = os.path.join(self.kok, ad)
+        with open(yol, 'w', encoding='utf-8') as f:
+            f.write('hat_no;tarih;saat;yolcu\n')
+            for hat, tarih, saat, yolcu in satirlar:
+                f.write(f'{hat};{tarih};{saat};{yolcu}\n')
+        return yol
+
+
+def ornek_binisler(gun_sayisi=3):
+    return [(hat, f'2025-01-0{gun}', f'{saat:02d}:15', hat + saat)
+            for hat in (1, 2) for gun in range(1, gun_sayisi + 1) for saat in (7, 8, 17)]
+
+
+# =============================================================================
+# SÜTUNSAL ELKART DEPOSU
+# =============================================================================
+class ElkartDeposuTest(GeciciDepoMixin, SimpleTestCase):
+    def test_donusum_ve_okuyucular(self):
+        satirlar = ornek_binisler()
+        self.elkart_yaz('elkart_test.csv', satirlar)
+        self.assertEqual(elkart_deposu.depoyu_guncelle(), ['elkart_test.csv'])
+        self.assertEqual(elkart_deposu.depoyu_guncelle(), [])  # Güncel; tekrar dönüştürülmez
+
+        beklenen = sum(y for h, _, _, y in satirlar if h == 1)
+        self.assertEqual(int(elkart_deposu.hat_verisini_oku('1')['yolcu'].sum()), beklenen)
+        self.assertTrue(elkart_deposu.hat_verisini_oku('99').empty)
+
+    def test_saatlik_akis_dilimlerle_ayni(self):
+        satirlar = ornek_binisler() + [(1, '2025-01-01', '07:50', 4)]
+        self.elkart_yaz('elkart_test.csv', satirlar)
+        elkart_deposu.depoyu_guncelle()
+
+        akis = elkart_deposu.hat_saatlik_akis('1')
+        self.assertEqual(int(akis['y'].sum()), sum(y for h, *_, y in satirlar if h == 1))
+        self.assertEqual(akis.iloc[0].tolist(), [pd.Timestamp('2025-01-01 07:00'), 8 + 4])
+        self.assertTrue(akis['ds'].is_monotonic_increasing)
+        pd.testing.assert_frame_equal(elkart_deposu.hat_saatlik_akis('1', dilim=2), akis)
+        self.assertTrue(elkart_deposu.hat_saatlik_akis('99').empty)
+
+    def test_ag_ozeti_dosyalari_birlestirir(self):
+        a, b = ornek_binisler(), [(1, '2025-01-01', '07:40', 5), (3, '2025-01-02', '09:00', 4)]
+        self.elkart_yaz('elkart_a.csv', a)
+        self.elkart_yaz('elkart_b.csv', b)
+        elkart_deposu.depoyu_guncelle()
+
+        ozet = elkart_deposu.ag_ozeti()
+        self.assertEqual(int(ozet['yolcu'].sum()), sum(y for *_, y in a + b))
+        self.assertFalse(ozet.duplicated(['hat', 'tarih', 'saat']).any())
+        hucre = ozet[(ozet['hat'].astype(str) == '1') & (ozet['saat'] == 7)
+                     & (pd.to_datetime(ozet['tarih']) == pd.Timestamp('2025-01-01'))]
+        self.assertEqual(hucre['yolcu'].tolist(), [8 + 5])
+
+    def test_okuyucular_donusum_baslatmaz(self):
+        self.elkart_yaz('elkart_test.csv', ornek_binisler())
+        self.assertTrue(elkart_deposu.hat_verisini_oku('1').empty)
+        self.assertFalse(os.path.exists(elkart_deposu.ELKART_DEPO_KLASORU))
+
+    def test_eszamanli_donusum(self):
+        self.elkart_yaz('elkart_test.csv', ornek_binisler())
+        hatalar = []
+
+        def donustur():
+            try:
+                elkart_deposu.depoyu_guncelle(zorla=True)
+            except Exception as e:
+                hatalar.append(e)
+
+        isler = [threading.Thread(target=donustur) for _ in range(4)]
+        for t in isler:
+            t.start()
+        for t in isler:
+            t.join()
+        self.assertEqual(hatalar, [])
+        klasorler = [a for a in os.listdir(elkart_deposu.ELKART_DEPO_KLASORU)
+                     if os.path.isdir(os.path.join(elkart_deposu.ELKART_DEPO_KLASORU, a))]
+        self.assertEqual(klasorler, ['elkart_test'])  # Geçici / eski klasör kalmadı
+        self.assertEqual(len(elkart_deposu.hat_verisini_oku('2')), 9)
+
+
+# =============================================================================
+# HAT BAĞLAMI / GÜZERGAH GEOMETRİSİ
+# =============================================================================
+class HatBaglamiTest(GeciciDepoMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hat = Hat.objects.create(ana_hat_no='3', alt_hat_no='0')
+        self.durak = Durak.objects.create(durak_no='10', durak_adi='Eski')
+        HatDurak.objects.create(hat=self.hat, durak=self.durak, sira=1)
+
+    def test_kararli_durumda_sorgu_yok_damga_degisince_yeniden_kurulur(self):
+        self.assertEqual(hat_baglami(self.hat.id).durak_adlari, ['Eski'])
+
+        # Başka bir süreçteki toplu yükleme gibi: sinyal yok, sadece damga
+        Durak.objects.filter(id=self.durak.id).update(durak_adi='Yeni')
+        with self.assertNumQueries(0):
+            self.assertEqual(hat_baglami(self.hat.id).durak_adlari, ['Eski'])
+        damgala('durak')
+        self.assertEqual(hat_baglami(self.hat.id).durak_adlari, ['Yeni'])
+
+    def test_rota_yuklemesi_geometriyi_ve_baglami_yeniler(self):
+        self.assertEqual(len(hat_baglami(self.hat.id)), 0)
+        HatGuzergah.objects.bulk_create([HatGuzergah(hat=self.hat, sira=i, enlem=37.8 + i / 100, boylam=32.4)
+                                         for i in range(3)])
+        self.assertEqual(guzergah_geometrisi().hat_uzunlugu(self.hat.id), 0.0)
+        damgala('guzergah')
+        self.assertAlmostEqual(guzergah_geometrisi().hat_uzunlugu(self.hat.id), 2.22, places=2)
+        self.assertEqual(len(hat_baglami(self.hat.id)), 3)
+
+
+# =============================================================================
+# AĞ KONUM MOTORU
+# =============================================================================
+class AgDurumuTest(GeciciDepoMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = Hat.objects.create(ana_hat_no='1', alt_hat_no='0')
+        self.alt = Hat.objects.create(ana_hat_no='1', alt_hat_no='1')
+        self.rotasiz = Hat.objects.create(ana_hat_no='1', alt_hat_no='2')
+        for hat in (self.ana, self.alt):
+            for sira, (enlem, boylam) in enumerate([(37.80, 32.40), (37.85, 32.45), (37.90, 32.50)]):
+                HatGuzergah.objects.create(hat=hat, sira=sira, enlem=enlem, boylam=boylam)
+        for hat, tip, saat in [(self.ana, 'H', time(9, 0)), (self.ana, 'C', time(9, 0)), (self.ana, 'P', time(9, 0)),
+                               (self.alt, 'H', time(9, 10)), (self.rotasiz, 'H', time(9, 20)),
+                               (self.ana, 'C', time(23, 50))]:
+            HatTarife.objects.create(hat=hat, tarife_tipi=tip, kalkis_saati=saat)
+        EkSefer.objects.create(hat=self.ana, kalkis_saati=time(9, 5), arac_no='77')
+
+    def test_gun_tipine_gore_tarife_satiri_basina_bir_arac(self):
+        ag = AgDurumu.veritabanindan()
+        self.assertEqual(len(ag.sefer_dk), HatTarife.objects.count() + 1)
+
+        pazartesi = ag.anlik(datetime(2025, 1, 6, 9, 30))
+        self.assertEqual(len(pazartesi), 4)  # H: 09:00, 09:10 (alt), 09:20 (rotasız -> ana), ek 09:05
+        self.assertEqual(len({a['id'] for a in pazartesi}), 4)
+        self.assertEqual(sorted(a['hat_id'] for a in pazartesi), sorted([self.ana.id] * 3 + [self.alt.id]))
+
+        cumartesi = ag.anlik(datetime(2025, 1, 11, 9, 30))
+        self.assertEqual(sorted(a['arac_no'] for a in cumartesi), ['1', '77'])
+
+        self.assertEqual(len(ag.anlik(datetime(2025, 1, 6, 9, 30), hat_id=self.alt.id)), 1)
+
+    def test_gece_yarisini_gecen_sefer_onceki_gunun_tipiyle(self):
+        ag = AgDurumu.veritabanindan()
+        pazar_gecesi = ag.anlik(datetime(2025, 1, 12, 0, 20))  # Cumartesi 23:50 seferi yolda
+        self.assertEqual([a['id'].split('_')[0] for a in pazar_gecesi], ['1-23:50'])
+        self.assertEqual(pazar_gecesi[0]['kalan_sure_dk'], 30)
+        self.assertEqual(ag.anlik(datetime(2025, 1, 13, 0, 20)), [])  # Önceki gün Pazar
+
+    def test_toplu_rota_yuklemesi_damgayla_gorunur(self):
+        eski = ag_durumu()
+        self.assertIs(ag_durumu(), eski)
+        HatGuzergah.objects.filter(hat=self.alt).delete()
+        HatGuzergah.objects.bulk_create([HatGuzergah(hat=self.alt, sira=0, enlem=37.0, boylam=32.0),
+                                         HatGuzergah(hat=self.alt, sira=1, enlem=37.1, boylam=32.0)])
+        self.assertIs(ag_durumu(), eski)
+        damgala('guzergah')
+        self.assertIsNot(ag_durumu(), eski)
+
+    def test_rota_ve_durak_tablolari_hizli_silinir(self):
+        # Alıcı yok: .all().delete() satırları belleğe yüklemeden tek DELETE ile çalışır
+        for model in (HatGuzergah, HatDurak, Durak):
+            self.assertFalse(post_delete.has_listeners(model))
+        for model in (HatGuzergah, HatDurak):
+            self.assertTrue(Collector(using='default').can_fast_delete(model.objects.all()))
+
+
+# =============================================================================
+# SEFER PROFİLLERİ / DURAK VARIŞ
+# =============================================================================
+class SeferProfiliTest(GeciciDepoMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hat = Hat.objects.create(ana_hat_no='5', alt_hat_no='0')
+        self.duraklar = [Durak.objects.create(durak_no=str(i), durak_adi=f'D{i}') for i in range(3)]
+
+    def varislar(self, arac_no='55'):
+        kayitlar = []
+        for gun in (6, 7):
+            for saat, sure in ((5, 120), (21, 300)):
+                cikis = datetime(2025, 1, gun, saat, 50, tzinfo=dt_timezone.utc)
+                kayitlar.append(DurakVaris(hat=self.hat, baslangic_durak=self.duraklar[0], bitis_durak=self.duraklar[1],
+                                           cikis_zaman=cikis, varis_zaman=cikis, gecen_sure_saniye=sure,
+                                           arac_no=arac_no))
+        DurakVaris.objects.bulk_create(kayitlar)
+
+    def test_segment_saatleri_yerel_saatte_ve_parcali(self):
+        self.varislar()
+        with override_settings(TIME_ZONE='Europe/Istanbul'):
+            olcumler = segment_olcumleri([self.hat.id])
+            self.assertEqual(segment_olcumleri([self.hat.id], parca=3), olcumler)
+        self.assertEqual(sorted((o['saat'], o['n'], o['ort']) for o in olcumler), [(0, 2, 300.0), (8, 2, 120.0)])
+
+    def test_toplu_varis_yuklemesi_damgayla_gorunur(self):
+        self.assertEqual(arac_havuzu().hat_araclari('5'), [])
+        eski = sefer_profilleri()
+        self.varislar()
+        self.assertIs(sefer_profilleri(), eski)
+        damgala('varis')
+        self.assertIsNot(sefer_profilleri(), eski)
+        self.assertEqual(arac_havuzu().hat_araclari('5'), ['55'])
+
+    def test_varis_tablosu_hizli_silinir(self):
+        self.assertFalse(post_delete.has_listeners(DurakVaris))
+        self.assertTrue(Collector(using='default').can_fast_delete(DurakVaris.objects.all()))
+
+
+# =============================================================================
+# TARİFE İNDEKSİ: SONRAKİ SEFERLER
+# =============================================================================
+class SonrakiSeferlerTest(GeciciDepoMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hat = Hat.objects.create(ana_hat_no='5', alt_hat_no='0')
+        for tip, saat in [('H', time(23, 30)), ('H', time(23, 50)), ('C', time(0, 10)), ('C', time(6, 0)),
+                          ('P', time(0, 5))]:
+            HatTarife.objects.create(hat=self.hat, tarife_tipi=tip, kalkis_saati=saat)
+        EkSefer.objects.create(hat=self.hat, kalkis_saati=time(23, 55), arac_no='99')
+        EkSefer.objects.create(hat=self.hat, kalkis_saati=time(23, 58), arac_no='98', aktif=False)
+
+    def test_sonraki_seferler_gece_yarisini_gecer(self):
+        indeks = tarife_indeksi()
+        self.assertEqual(indeks.sonraki_seferler('5', 23 * 60 + 40, 4, 'H', 'C'), [
+            (23 * 60 + 50, False, 0), (23 * 60 + 55, True, 0), (10, False, 1), (360, False, 1)])
+        self.assertEqual(indeks.sonraki_seferler('5', 23 * 60 + 56, 3, 'C', 'P'), [(5, False, 1), (23 * 60 + 55, True, 1)])
+
+    def test_alt_hat_dizileri_ve_aralik(self):
+        alt = Hat.objects.create(ana_hat_no='5', alt_hat_no='1')
+        HatTarife.objects.create(hat=alt, tarife_tipi='H', kalkis_saati=time(23, 45))
+        EkSefer.objects.create(hat=alt, kalkis_saati=time(23, 52), arac_no='97')
+        damgala('tarife', 'ek_sefer')
+        indeks = tarife_indeksi()
+
+        self.assertEqual(indeks.hat_seferleri('5', 'H', alt_hat='1').tolist(), [23 * 60 + 45])
+        self.assertEqual(indeks.hat_seferleri('5', 'H', alt_hat='0').tolist(), [23 * 60 + 30, 23 * 60 + 50])
+        ilk, dakikalar = indeks.aralik('5', 23 * 60 + 40, 23 * 60 + 50, 'H')
+        self.assertEqual((ilk, dakikalar.tolist()), (1, [23 * 60 + 45]))
+        self.assertEqual(indeks.aralik('5', 0, 60, 'H', alt_hat='1')[1].tolist(), [])
+
+        self.assertEqual(indeks.sonraki_seferler('5', 23 * 60 + 40, 3, 'H', 'C', alt_hat='1'),
+                         [(23 * 60 + 45, False, 0), (23 * 60 + 52, True, 0), (23 * 60 + 52, True, 1)])
+        self.assertEqual(indeks.sonraki_seferler('5', 23 * 60 + 40, 4, 'H', 'C'), [
+            (23 * 60 + 45, False, 0), (23 * 60 + 50, False, 0), (23 * 60 + 52, True, 0), (23 * 60 + 55, True, 0)])
+        with mock.patch('api.views.datetime') as saat:
+            saat.now.return_value = datetime(2025, 1, 10, 12, 0)
+            cevap = self.client.get(f'/api/hatlar/{self.hat.id}/sonraki-seferler/?n=2&from=23:40&alt_hat=0')
+        self.assertEqual([s['saat'] for s in cevap.json()], ['23:50', '23:55'])
+
+    def test_uc_nokta(self):
+        with mock.patch('api.views.datetime') as saat:
+            saat.now.return_value = datetime(2025, 1, 10, 12, 0)  # Cuma -> ertesi gün Cumartesi
+            cevap = self.client.get(f'/api/hatlar/{self.hat.id}/sonraki-seferler/?n=3&from=23:40')
+        self.assertEqual(cevap.status_code, 200)
+        self.assertEqual([(s['saat'], s['tip'], s['kalan_dk']) for s in cevap.json()],
+                         [('23:50', 'Planlı', 10), ('23:55', 'Ek Sefer', 15), ('00:10', 'Planlı', 30)])
+        self.assertEqual(self.client.get('/api/hatlar/999/sonraki-seferler/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/hatlar/{self.hat.id}/sonraki-seferler/?from=25:00').status_code, 400)
+
+    def test_toplu_tarife_yuklemesi_hizli_ve_tek_damga(self):
+        self.assertFalse(post_delete.has_listeners(HatTarife) or post_save.has_listeners(HatTarife))
+        self.assertTrue(Collector(using='default').can_fast_delete(HatTarife.objects.all()))
+
+        self.assertEqual(len(tarife_indeksi().hat_seferleri('5', 'H')), 2)
+        df = pd.DataFrame({'hat': ['5'] * 3, 'hat_str': ['5'] * 3, 'alt_hat': ['0'] * 3,
+                           'saat': ['07:00', '07:30', '08:00'], 'gun_tipi': ['H', 'H', 'C'], 'yon': [''] * 3})
+        with mock.patch('api.tarife_motoru.damgala', wraps=damgala) as damga:
+            self.assertEqual(tarifeleri_veritabanina_yukle(df), {'yuklenen': 3, 'eslesmeyen': 0})
+        damga.assert_called_once_with('tarife')
+        self.assertEqual(tarife_indeksi().hat_seferleri('5', 'H').tolist(), [420, 450])
+
+
+# =============================================================================
+# TALEP SORGULARI
+# =============================================================================
+class TalepSorgulariTest(GeciciDepoMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        hat = Hat.objects.create(ana_hat_no='4', alt_hat_no='0')
+        for gun, saat, yolcu in [(6, 7, 3), (6, 7, 2), (6, 8, 1), (7, 7, 4), (8, 22, 5)]:
+            TalepVerisi.objects.create(hat=hat, yolcu_sayisi=yolcu,
+                                       tarih_saat=datetime(2025, 1, gun, saat, 10, tzinfo=dt_timezone.utc))
+
+    def test_gun_ve_saat_profili_kovalari(self):
+        self.assertEqual([(k['yolcu'], k['kayit']) for k in talep_ozeti('gun', hat_no='4')], [(6, 3), (4, 1), (5, 1)])
+        self.assertEqual(talep_ozeti('saat_profili'), [{'saat': 7, 'yolcu': 9, 'kayit': 3},
+                                                       {'saat': 8, 'yolcu': 1, 'kayit': 1},
+                                                       {'saat': 22, 'yolcu': 5, 'kayit': 1}])
+        self.assertEqual(len(talep_ozeti('gun', baslangic=zaman_parametresi('2025-01-07'))), 2)
+        self.assertEqual(talep_ozeti('hafta', hatlara_gore=True),
+                         [{'zaman': '2025-01-06T00:00:00+00:00', 'yolcu': 15, 'kayit': 5, 'hat_no': '4'}])
+        self.assertEqual(talep_ozeti('gun', parca=2), talep_ozeti('gun'))
+
+    @override_settings(TIME_ZONE='Europe/Istanbul')
+    def test_kovalar_yerel_saatte_ve_bos_degil(self):
+        for aralik in ('saat', 'gun', 'hafta', 'saat_profili'):
+            self.assertNotIn(None, [k.get('zaman', k.get('saat')) for k in talep_ozeti(aralik)])
+        self.assertEqual([k['zaman'] for k in talep_ozeti('gun')],
+                         ['2025-01-06T00:00:00+03:00', '2025-01-07T00:00:00+03:00', '2025-01-09T00:00:00+03:00'])
+        self.assertEqual([k['saat'] for k in talep_ozeti('saat_profili')], [1, 10, 11])
+        self.assertEqual(talep_ozeti('saat')[0]['zaman'], '2025-01-06T10:00:00+03:00')
+
+    def test_gecersiz_parametreler(self):
+        with self.assertRaises(ValueError):
+            zaman_parametresi('dun')
+        with self.assertRaises(ValueError):
+            talep_ozeti('yil')
+
+
+# =============================================================================
+# ZAMAN DÖNÜŞÜMLERİ
+# =============================================================================
+class ZamanDonusumTest(GeciciDepoMixin, SimpleTestCase):
+    DEGERLER = ['06:00', '6', '06.30', '6.0', ' 7:45 ', '23:59', '00:05', '12', 'abc', '', None,
+                float('nan'), '25:00', '-1', '7.5.1', '08:00:00']
+
+    def test_saat_vektor_parse_time_column_ile_ayni(self):
+        beklenen = [parse_time_column(d) for d in self.DEGERLER]
+        self.assertEqual(saat_vektor(pd.Series(self.DEGERLER, dtype=object)).tolist(), beklenen)
+
+    def test_saat_vektor_sayisal_sutun(self):
+        seri = pd.Series([6.0, 7.9, np.nan, 23.0])
+        self.assertEqual(saat_vektor(seri).tolist(), [parse_time_column(d) for d in seri])
+
+    def test_dakika_vektor_saat_ile_tutarli(self):
+        degerler = pd.Series(['06:00', '06:35', '2024-01-01 07:30:00', '08.00', '21', '23:59', '00:05'])
+        dakika = dakika_vektor(degerler)
+        self.assertEqual(dakika.tolist(), [360, 395, 450, 480, 1260, 1439, 5])
+        for deger, dk in zip(degerler, dakika):
+            self.assertEqual(dk // 60, parse_time_column(str(deger).split(' ')[-1]))
+
+    def test_dakika_vektor_gecersizler(self):
+        self.assertEqual(dakika_vektor(pd.Series(['abc', '24:00', '07:75', None])).tolist(), [-1, -1, -1, -1])
+
+
+# =============================================================================
+# TALEP KÜPÜ
+# =============================================================================
+class TalepKupuTest(GeciciDepoMixin, TestCase):
+    def kup_toplami(self, hat_no=None):
+        qs = TalepKupu.objects.all() if hat_no is None else TalepKupu.objects.filter(hat_no=hat_no)
+        return sum(qs.values_list('yolcu', flat=True))
+
+    def test_artimli_guncelleme_cift_saymaz(self):
+        a = ornek_binisler()
+        self.elkart_yaz('elkart_a.csv', a)
+        self.assertEqual(kupu_guncelle(), ['elkart_a'])
+        self.assertEqual(self.kup_toplami(), sum(y for *_, y in a))
+
+        # Değişmeyen kaynak yeniden yazılmaz
+        self.assertEqual(kupu_guncelle(), [])
+        self.assertEqual(self.kup_toplami(), sum(y for *_, y in a))
+
+        # Değişen kaynak silinip yeniden yazılır; yeni kaynak eklenir
+        a2 = a + [(1, '2025-01-01', '07:40', 5)]
+        self.elkart_yaz('elkart_a.csv', a2)
+        b = [(3, '2025-01-02', '09:00', 4)]
+        self.elkart_yaz('elkart_b.csv', b)
+        self.assertEqual(sorted(kupu_guncelle()), ['elkart_a', 'elkart_b'])
+        self.assertEqual(self.kup_toplami(), sum(y for *_, y in a2 + b))
+        self.assertEqual(self.kup_toplami('1'), sum(y for h, *_, y in a2 if h == 1))
+
+        # Silinen kaynağın hücreleri kalkar
+        os.remove(os.path.join(self.kok, 'elkart_b.csv'))
+        kupu_guncelle()
+        self.assertEqual(self.kup_toplami(), sum(y for *_, y in a2))
+        self.assertEqual(list(TalepKupuKaynagi.objects.values_list('kaynak', flat=True)), ['elkart_a'])
+
+    def test_guncelleme_talep_damgasini_yeniler(self):
+        self.elkart_yaz('elkart_a.csv', ornek_binisler())
+        kupu_guncelle()
+        self.assertTrue(os.path.exists(damga_yolu('talep')))
+
+
+# =============================================================================
+# DOSYA ÖNBELLEĞİ
+# =============================================================================
+class DosyaOnbellegiTest(GeciciDepoMixin, SimpleTestCase):
+    def test_damga_degisince_yeniden_hesaplanir(self):
+        cagri = []
+
+        @dosya_onbellekli(lambda: [damga_yolu('deneme')], onbellek=DosyaOnbellegi())
+        def hesapla():
+            cagri.append(1)
+            return len(cagri)
+
+        self.assertEqual(hesapla(), 1)
+        self.assertEqual(hesapla(), 1)
+        damgala('deneme')
+        self.assertEqual(hesapla(), 2)
+        self.assertEqual(hesapla(), 2)
+        with mock.patch('api.veri_damgasi.time.time_ns', return_value=1):
+            damgala('deneme')
+        self.assertEqual(hesapla(), 3)
+
+    def test_bellek_siniri_ic_ice_degerleri_sayar(self):
+        liste = [{'ds': f'2025-01-01T{i % 24:02d}:00:00', 'yhat': float(i)} for i in range(1000)]
+        self.assertGreater(nesne_boyutu(liste), 10 * len(liste) * 8)
+        dizi = np.zeros(10000)
+        self.assertGreaterEqual(nesne_boyutu({'a': dizi, 'b': dizi}), dizi.nbytes)
+        self.assertLess(nesne_boyutu({'a': dizi, 'b': dizi}), 2 * dizi.nbytes)
+
+        onbellek = DosyaOnbellegi(bellek_siniri=3 * nesne_boyutu(liste))
+        for i in range(5):
+            onbellek.getir(('liste', i), (), lambda: list(liste))
+        self.assertLessEqual(onbellek.istatistik()['toplam_bayt'], onbellek.bellek_siniri)
+        self.assertLess(onbellek.istatistik()['kayit_sayisi'], 5)
+
+
+# =============================================================================
+# KAPASİTE ANALİZİ
+# =============================================================================
+class KapasiteAnaliziTest(GeciciDepoMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.hat = Hat.objects.create(ana_hat_no='7', alt_hat_no='0')
+        for saat in (time(7, 0), time(7, 30), time(8, 0)):
+            HatTarife.objects.create(hat=self.hat, tarife_tipi='H', kalkis_saati=saat)
+        for gun in (1, 2):
+            TalepKupu.objects.create(hat_no='7', tarih=date(2025, 1, gun), saat=7, yolcu=300, kaynak='test')
+
+    def test_hat_analizi_ag_matrisiyle_ayni(self):
+        matris = ag_kapasite_matrisi('daily').sozluk()
+        k = matris['hatlar'].index('7')
+        hat = hat_kapasite_analizi('7', 'daily')
+        self.assertEqual([s['doluluk_yuzdesi'] for s in hat], [satir[k] for satir in matris['doluluk']])
+        self.assertEqual(hat[1]['ortalama_yolcu'], 150)  # 07:00, iki günün ortalamasının yarısı
+
+    def test_ek_sefer_hattin_sonucunu_yeniler(self):
+        once = hat_kapasite_analizi('7', 'weekly')[1]['sefer_sayisi']
+        EkSefer.objects.create(hat=self.hat, kalkis_saati=time(7, 45))
+        self.assertEqual(hat_kapasite_analizi('7', 'weekly')[1]['sefer_sayisi'], once + 7)
+
+
+# =============================================================================
+# KONUM FARKI (DELTA) PROTOKOLÜ
+# =============================================================================
+class KonumFarkiTest(GeciciDepoMixin, SimpleTestCase):
+    @staticmethod
+    def uygula(durum, paket):
+        """İstemci tarafı: paketi {no: [id, ..., enlem, boylam, ...]} durumuna uygular."""
+        if paket['tam']:
+            durum = {}
+        for satir in paket['eklenen']:
+            durum[satir[0]] = list(satir[1:])
+        for no, d_enlem, d_boylam, *degisken in paket['degisen']:
+            kayit = durum[no]
+            kayit[-3] += d_enlem
+            kayit[-2] += d_boylam
+            kayit[-1:] = degisken
+        for no in paket['silinen']:
+            durum.pop(no)
+        return durum
+
+    @staticmethod
+    def beklenen(araclar, olcek):
+        return sorted([a['id'], a['hedef_durak'], round(a['enlem'] * olcek), round(a['boylam'] * olcek),
+                       a['kalan_sure_dk']] for a in araclar)
+
+    def test_tam_bos_ve_degisen_paket(self):
+        kayit = FarkKaydi(('kalan_sure_dk',))
+        araclar = [
+            {'id': 'A', 'hedef_durak': 'X', 'enlem': 37.87, 'boylam': 32.48, 'kalan_sure_dk': 10},
+            {'id': 'B', 'hedef_durak': 'Y', 'enlem': 37.90, 'boylam': 32.50, 'kalan_sure_dk': 20},
+        ]
+        tam = kayit.paket(araclar)
+        self.assertTrue(tam['tam'])
+        durum = self.uygula({}, tam)
+        self.assertEqual(sorted(durum.values()), self.beklenen(araclar, tam['olcek']))
+
+        bos = kayit.paket(araclar, tam['akis'], tam['sira'])
+        self.assertFalse(bos['tam'])
+        self.assertEqual((bos['sira'], bos['eklenen'], bos['degisen'], bos['silinen']), (tam['sira'], [], [], []))
+
+        yeni = [dict(araclar[0], enlem=37.871, kalan_sure_dk=9)]
+        fark = kayit.paket(yeni, tam['akis'], tam['sira'])
+        self.assertFalse(fark['tam'])
+        self.assertEqual(fark['sira'], tam['sira'] + 1)
+        self.assertEqual(len(fark['degisen']), 1)
+        self.assertEqual(fark['eklenen'], [])
+        self.assertEqual(len(fark['silinen']), 1)
+        durum = self.uygula(durum, fark)
+        self.assertEqual(sorted(durum.values()), self.beklenen(yeni, fark['olcek']))
+
+    def test_bilinmeyen_akis_tam_paket_alir(self):
+        kayit = FarkKaydi(('kalan_sure_dk',))
+        paket = kayit.paket([{'id': 'A', 'enlem': 1, 'boylam': 2, 'kalan_sure_dk': 3}], 'baska', 1)
+        self.assertTrue(paket['tam'])
+
+
+# =============================================================================
+# TİCK ZAMANLAYICI
+# =============================================================================
+class TickZamanlayiciTest(GeciciDepoMixin, SimpleTestCase):
+    def test_bayat_goruntu_tek_kez_hesaplanir(self):
+        zamanlayici = TickZamanlayici(aralik=1000)
+        cagri = []
+
+        class SahteAg:
+            def anlik(self, simdi):
+                cagri.append(simdi)
+                return [{'id': 'A', 'hat_id': 1}]
+
+        with mock.patch('api.zamanlayici.ag_durumu', return_value=SahteAg()), \
+                mock.patch.object(zamanlayici, 'baslat'):
+            isler = [threading.Thread(target=zamanlayici.son_goruntu) for _ in range(8)]
+            for t in isler:
+                t.start()
+            for t in isler:
+                t.join()
+        self.assertEqual(len(cagri), 1)
+        self.assertEqual(zamanlayici.goruntu.hat(1), [{'id': 'A', 'hat_id': 1}])
+
+
+# =============================================================================
+# TAHMİN DEPOSU
+# =============================================================================
+class SahteModel:
+    def predict(self, future):
+        return pd.DataFrame({'ds': future['ds'], 'yhat': future['ds'].dt.hour.astype(float) - 1})
+
+
+class TahminDeposuTest(GeciciDepoMixin, SimpleTestCase):
+    def test_depodan_dilimlenir_ve_kumelenir(self):
+        bas = datetime(2025, 1, 6, 0, 0)
+        self.assertIsNone(tahmin_deposu.hat_tahmini('9', bas))
+        tahmin_deposu.tahmini_yenile('9', SahteModel(), bas)
+
+        saatlik = tahmin_deposu.hat_tahmini('9', bas + timedelta(hours=5, minutes=20), hours=3)
+        self.assertEqual(saatlik, [{'ds': '2025-01-06T05:00:00', 'yhat': 4.0},
+                                   {'ds': '2025-01-06T06:00:00', 'yhat': 5.0},
+                                   {'ds': '2025-01-06T07:00:00', 'yhat': 6.0}])
+        gunluk = tahmin_deposu.hat_tahmini('9', bas, hours=48, agg='day')
+        self.assertEqual([g['yhat'] for g in gunluk], [float(sum(range(23)))] * 2)  # 00:00 -> 0 (negatif kırpılır)
+
+        ufuk = tahmin_deposu.TAHMIN_UFKU
+        self.assertIsNone(tahmin_deposu.hat_tahmini('9', bas + timedelta(hours=ufuk - 2), hours=3))
+
+    def test_model_degisince_depo_eskir(self):
+        bas = datetime(2025, 1, 6)
+        tahmin_deposu.tahmini_yenile('9', SahteModel(), bas)
+        self.assertIsNotNone(tahmin_deposu.hat_tahmini('9', bas))
+        yol = prophet_egitimi.prophet_model_yolu('9')
+        os.makedirs(os.path.dirname(yol), exist_ok=True)
+        joblib.dump({'yeni': 'model'}, yol)
+        self.assertIsNone(tahmin_deposu.hat_tahmini('9', bas))
+
+
+class ProphetOnbellegiTest(GeciciDepoMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(prophet_egitimi.MODEL_DIR)
+        for hat_no in ('1', '2', '3'):
+            joblib.dump(list(range(2000)), prophet_egitimi.prophet_model_yolu(hat_no))
+
+    def test_bellek_siniri_ve_yeniden_yukleme(self):
+        boyut = os.path.getsize(prophet_egitimi.prophet_model_yolu('1'))
+        onbellek = ProphetOnbellegi(bellek_siniri=2 * boyut)
+        for hat_no in ('1', '2', '1', '3'):
+            onbellek.getir(hat_no)
+        istatistik = onbellek.istatistik()
+        self.assertEqual(istatistik['hatlar'], ['1', '3'])  # En uzun süredir kullanılmayan (2) atıldı
+        self.assertEqual((istatistik['yukleme'], istatistik['isabet'], istatistik['atilan']), (3, 1, 1))
+
+        joblib.dump(['yeni'], prophet_egitimi.prophet_model_yolu('1'))
+        self.assertEqual(onbellek.getir('1'), ['yeni'])
+        self.assertIsNone(onbellek.getir('yok'))
@@ -25,10 +25,14 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # Token Yenile
 
     # --- 3. ÖZEL ANALİZ VE TAHMİN ENDPOINTLERİ ---
+    path('capacity-analysis/ag/', views.AgKapasiteView.as_view(), name='capacity-analysis-ag'),
     path('capacity-analysis/<str:hat_no>/', views.CapacityAnalysisView.as_view(), name='capacity-analysis'),
     path('predict-demand/<str:hat_no>/', views.PredictDemandView.as_view(), name='predict-demand'),
 
     path('simulasyon/aktif-otobusler/', views.aktif_otobusler, name='aktif_otobusler'),
+    path('simulasyon/ag-anlik/', views.ag_anlik, name='ag_anlik'),
+    path('simulasyon/akis/', views.konum_akisi, name='konum_akisi'),
     path('sure-tahmin/', views.PredictTravelTimeView.as_view(), name='sure-tahmin'),
+    path('ml/durum/', views.ml_durum, name='ml-durum'),
     path('detayli-analiz/<str:hat_no>/', views.DetayliAnalizView.as_view(), name='detayli-analiz'),
 ]
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+
+# --- DİZİN AYARLARI ---
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
+VERI_SETI_KLASORU = os.path.join(PROJECT_ROOT, 'veri_seti')
+DEPO_KLASORU = os.path.join(VERI_SETI_KLASORU, '_depo')
+
+
+# =============================================================================
+# ORTAK YARDIMCI FONKSİYONLAR (views, ml_models ve veri depoları kullanır)
+# =============================================================================
+def normalize_cols(cols):
+    """Sütun isimlerini temizler."""
+    return [
+        str(c).strip().upper()
+            .replace('İ', 'I').replace('Ğ', 'G').replace('Ü', 'U')
+            .replace('Ş', 'S').replace('Ö', 'O').replace('Ç', 'C')
+            .replace(' ', '_').replace('\n', '')
+        for c in cols
+    ]
+
+
+def parse_time_column(val):
+    """
+    Farklı saat formatlarını (06:00, 6, 06.00, 6.0) integer saate çevirir.
+    Hata durumunda -1 döner.
+    """
+    try:
+        s = str(val).strip()
+        if ':' in s:
+            return int(s.split(':')[0])
+        elif '.' in s:  # 06.30 veya 6.0 formatı için
+            return int(s.split('.')[0])
+        else:
+            return int(float(s))  # "6" veya "6.0" gelebilir
+    except:
+        return -1
+
+
+def hat_no_temizle(val):
+    """Hat numarasını standartlaştırır (örn: '4.0' -> '4')."""
+    try:
+        s = str(val).strip()
+        if '.' in s:
+            return s.split('.')[0]
+        return s
+    except:
+        return str(val)
+
+
+def elkart_sutunlari(columns):
+    """
+    Normalize edilmiş elkart sütunlarından (hat, tarih, saat, yolcu) sütun adlarını bulur.
+    Bulunamayanlar None döner.
+    """
+    hat_col = next((c for c in columns if 'HAT' in c and 'NO' in c), None)
+    tarih_col = next((c for c in columns if 'TARIH' in c or 'ISLEM' in c or 'ZAMAN' in c), None)
+    saat_col = next((c for c in columns if 'SAAT' in c), None)
+    yolcu_col = next((c for c in columns if 'BINIS' in c or 'YOLCU' in c or 'SAYI' in c), None)
+    return hat_col, tarih_col, saat_col, yolcu_col
@@ -0,0 +1,55 @@
+"""
+Süreçler arası veri değişiklik damgaları.
+
+Her veri kaynağı için veri_seti/_depo/damgalar/ altında küçük bir damga
+dosyası tutulur:
+
+    tarife.damga            HatTarife / Hat değişiklikleri, tarife yüklemeleri
+    guzergah.damga          HatGuzergah (rota) yüklemeleri
+    durak.damga             Durak / HatDurak yüklemeleri ve düzeltmeleri
+    varis.damga             DurakVaris yüklemeleri
+    talep.damga             Talep küpü (TalepKupu) güncellemeleri
+    ek_sefer.damga          Herhangi bir hatta ek sefer eklendi / silindi
+    ek_sefer_<hat>.damga    Belirli bir ana hatta ek sefer eklendi / silindi
+
+Veriyi değiştiren süreç (web isteği, model sinyali, yönetim komutu) ilgili
+damgayı yeniden yazar; toplu yükleme komutları işlem bittikten sonra BİR
+kez damgalar. Okuyucular damga dosyalarını dosya_onbellekli'nin (ya da
+SureliNesne'nin) dosya listesine ekler; parmak izi (mtime + boyut) değişince önbellekteki sonuç
+bütün worker süreçlerinde bir sonraki istekte geçersiz sayılır. Ortak bir
+önbellek sunucusu gerekmez.
+"""
+import os
+import time
+
+from .veri_araclari import DEPO_KLASORU
+from .elkart_deposu import klasor_adi
+
+DAMGA_KLASORU = os.path.join(DEPO_KLASORU, 'damgalar')
+
+
+def damga_yolu(ad):
+    return os.path.join(DAMGA_KLASORU, f"{ad}.damga")
+
+
+def damga_yollari(*adlar):
+    return [damga_yolu(ad) for ad in adlar]
+
+
+def ek_sefer_damgasi(ana_hat_no=None):
+    """Ek sefer damgasının adı (ana_hat_no verilmezse ağ geneli)."""
+    return 'ek_sefer' if ana_hat_no is None else f"ek_sefer_{klasor_adi(ana_hat_no)}"
+
+
+def damgala(*adlar):
+    """Damgaları yeniler (atomik yazım; yarım dosya okunmaz)."""
+    try:
+        os.makedirs(DAMGA_KLASORU, exist_ok=True)
+        for ad in adlar:
+            yol = damga_yolu(ad)
+            gecici = f"{yol}.tmp{os.getpid()}"
+            with open(gecici, 'w', encoding='utf-8') as f:
+                f.write(str(time.time_ns()))
+            os.replace(gecici, yol)
+    except Exception as e:
+        print(f"[DAMGA] Yazılamadı ({', '.join(adlar)}): {e}")
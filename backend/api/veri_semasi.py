@@ -0,0 +1,229 @@
+"""
+Girdi dosyaları için şema kaydı (ayırıcı, kodlama, sütun eşlemesi, tipler).
+
+Bir dosyanın şeması BİR KEZ tespit edilir ve veri_seti/_depo/semalar.json
+içinde dosyanın mtime/boyut imzasıyla birlikte saklanır. Sonraki okumalar
+ayırıcıyı koklamaz, kodlama denemesi yapmaz ve sütunları tekrar aramaz;
+pandas'a doğrudan açık sep / encoding / usecols / dtype verilir:
+
+    sema = sema_bul(dosya, 'elkart')
+    df = pd.read_csv(dosya, **okuma_ayarlari(sema, ['hat', 'saat']))
+    df = df.rename(columns=rol_eslemesi(sema))
+
+Rol sütunları metin (str) olarak okunur; tip tahmini yapılmaz, sayısal ve
+zaman dönüşümleri zaman_donusum içinde vektörel olarak yapılır.
+Dosya değişirse (mtime/boyut) şema yeniden tespit edilir.
+"""
+import io
+import os
+import json
+import threading
+
+import pandas as pd
+
+from .veri_araclari import DEPO_KLASORU, normalize_cols, elkart_sutunlari
+
+SEMA_DOSYASI = os.path.join(DEPO_KLASORU, 'semalar.json')
+SEMA_SURUMU = 1
+ORNEK_BOYUTU = 256 * 1024  # Kodlama / ayırıcı tespiti için okunan bayt
+KODLAMALAR = ['utf-8-sig', 'cp1254', 'latin-1']  # utf-8-sig BOM'suz UTF-8'i de okur
+AYIRICILAR = [';', ',', '\t', '|']
+
+
+# =============================================================================
+# ROL KURALLARI (Veri seti türüne göre normalize sütun adı -> rol)
+# =============================================================================
+def _elkart_rolleri(sutunlar):
+    hat, tarih, saat, yolcu = elkart_sutunlari(sutunlar)
+    return {'hat': hat, 'tarih': tarih, 'saat': saat, 'yolcu': yolcu}
+
+
+def _tarife_rolleri(sutunlar):
+    return {
+        'hat': next((c for c in sutunlar if 'HAT' in c and 'NO' in c and 'ALT' not in c), None),
+        'alt_hat': next((c for c in sutunlar if 'ALT' in c and 'HAT' in c), None),
+        'saat': next((c for c in sutunlar if 'SAAT' in c), None),
+        'gun_tipi': next((c for c in sutunlar if 'ZAMAN' in c or 'GUN' in c), None),
+        'yon': next((c for c in sutunlar if 'CIKIS' in c or 'VARIS' in c or 'ISTIKAMET' in c), None),
+    }
+
+
+def _durak_varis_rolleri(sutunlar):
+    # Sütun adları sabittir; rol adı = küçük harfli sütun adı
+    roller = ['ana_hat_no', 'alt_hat_no', 'baslangic_durak_no', 'bitis_durak_no',
+              'cikis_zaman', 'varis_zaman', 'arac_no']
+    return {r: next((c for c in sutunlar if c == r.upper()), None) for r in roller}
+
+
+ROL_KURALLARI = {
+    'elkart': _elkart_rolleri,
+    'tarife': _tarife_rolleri,
+    'durak_varis': _durak_varis_rolleri,
+}
+
+
+def tur_tahmin_et(dosya):
+    """Dosya adından veri seti türünü tahmin eder; bilinmeyenler 'genel' olur."""
+    ad = os.path.basename(dosya).lower()
+    if 'elkart' in ad:
+        return 'elkart'
+    if 'durakvaris' in ad:
+        return 'durak_varis'
+    if 'tarife' in ad:
+        return 'tarife'
+    return 'genel'
+
+
+# =============================================================================
+# TESPİT
+# =============================================================================
+def _ornek_coz(dosya):
+    """Dosyanın başından bir örnek okur; örneği hatasız çözen ilk kodlamayı döner."""
+    with open(dosya, 'rb') as f:
+        ornek = f.read(ORNEK_BOYUTU)
+    if len(ornek) == ORNEK_BOYUTU and b'\n' in ornek:
+        # Çok baytlı bir karakterin ortasından kesilmesin
+        ornek = ornek[:ornek.rindex(b'\n') + 1]
+
+    for kodlama in KODLAMALAR:
+        try:
+            return kodlama, ornek.decode(kodlama)
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1', ornek.decode('latin-1', errors='ignore')
+
+
+def _ayirici_tespit(metin):
+    ilk_satir = metin.split('\n', 1)[0]
+    sayilar = {a: ilk_satir.count(a) for a in AYIRICILAR}
+    ayirici = max(AYIRICILAR, key=lambda a: sayilar[a])
+    return ayirici if sayilar[ayirici] else ','
+
+
+def _imza(dosya):
+    st = os.stat(dosya)
+    return {'mtime': st.st_mtime, 'boyut': st.st_size}
+
+
+def sema_tespit_et(dosya, tur=None):
+    """Dosyanın şemasını (kayda bakmadan) tespit eder."""
+    tur = tur or tur_tahmin_et(dosya)
+    sema = {'dosya': os.path.basename(dosya), 'tur': tur, 'surum': SEMA_SURUMU, **_imza(dosya)}
+
+    if dosya.lower().endswith(('.xlsx', '.xls')):
+        sema.update({'ayirici': None, 'kodlama': None})
+        basliklar = list(pd.read_excel(dosya, nrows=0).columns)
+    else:
+        kodlama, metin = _ornek_coz(dosya)
+        ayirici = _ayirici_tespit(metin)
+        sema.update({'ayirici': ayirici, 'kodlama': kodlama})
+        # Başlık tırnak içinde satır sonu içerebilir (tarifeler.csv); csv ayrıştırıcısı çözsün
+        basliklar = list(pd.read_csv(io.StringIO(metin), sep=ayirici, nrows=0).columns)
+
+    basliklar = [str(b) for b in basliklar]
+    normal = dict(zip(normalize_cols(basliklar), basliklar))
+    kural = ROL_KURALLARI.get(tur)
+    roller = kural(list(normal)) if kural else {}
+
+    sema['basliklar'] = basliklar
+    sema['sutunlar'] = {rol: normal[c] for rol, c in roller.items() if c}
+    sema['dtype'] = {normal[c]: 'str' for c in roller.values() if c}
+    return sema
+
+
+# =============================================================================
+# KAYIT
+# =============================================================================
+class SemaKaydi:
+    """
+    Dosya yolu -> şema eşlemesi. Kayıt diskte JSON olarak tutulur, süreç
+    içinde bellekte saklanır; her sorguda sadece dosyanın os.stat bilgisi
+    okunur.
+    """
+
+    def __init__(self, yol=SEMA_DOSYASI):
+        self.yol = yol
+        self._semalar = None
+        self._kilit = threading.RLock()
+
+    def _yukle(self):
+        if self._semalar is None:
+            try:
+                with open(self.yol, 'r', encoding='utf-8') as f:
+                    self._semalar = json.load(f)
+            except Exception:
+                self._semalar = {}
+        return self._semalar
+
+    def _kaydet(self):
+        try:
+            os.makedirs(os.path.dirname(self.yol), exist_ok=True)
+            gecici = f"{self.yol}.tmp{os.getpid()}"
+            with open(gecici, 'w', encoding='utf-8') as f:
+                json.dump(self._semalar, f, ensure_ascii=False, indent=1)
+            os.replace(gecici, self.yol)
+        except Exception as e:
+            print(f"[ŞEMA] Kayıt dosyası yazılamadı: {e}")
+
+    def bul(self, dosya, tur=None):
+        """Dosyanın güncel şemasını döner; yoksa veya dosya değiştiyse tespit edip kaydeder."""
+        anahtar = os.path.abspath(dosya)
+        imza = _imza(dosya)
+        with self._kilit:
+            sema = self._yukle().get(anahtar)
+            if (sema and sema.get('surum') == SEMA_SURUMU
+                    and sema.get('mtime') == imza['mtime'] and sema.get('boyut') == imza['boyut']
+                    and (tur is None or sema.get('tur') == tur)):
+                return sema
+
+            sema = sema_tespit_et(dosya, tur)
+            print(f"[ŞEMA] {sema['dosya']}: ayırıcı={sema['ayirici']!r}, kodlama={sema['kodlama']}, "
+                  f"roller={sema['sutunlar']}")
+            self._semalar[anahtar] = sema
+            self._kaydet()
+            return sema
+
+    def temizle(self):
+        with self._kilit:
+            self._semalar = {}
+            self._kaydet()
+
+
+# --- SÜREÇ İÇİ ORTAK KAYIT ---
+KAYIT = SemaKaydi()
+
+
+def sema_bul(dosya, tur=None):
+    return KAYIT.bul(dosya, tur)
+
+
+# =============================================================================
+# OKUMA AYARLARI
+# =============================================================================
+def okuma_ayarlari(sema, roller=None):
+    """
+    Şemadan pd.read_csv / pd.read_excel için açık okuma parametrelerini üretir.
+    roller verilirse sadece o rollerin sütunları (usecols) sabit tiple okunur;
+    verilmezse tüm sütunlar metin olarak okunur.
+    """
+    ayarlar = {}
+    if sema.get('ayirici'):
+        ayarlar.update({'sep': sema['ayirici'], 'encoding': sema['kodlama']})
+
+    if roller is None:
+        ayarlar['dtype'] = str
+        return ayarlar
+
+    kullan = [sema['sutunlar'][r] for r in roller if r in sema['sutunlar']]
+    ayarlar['usecols'] = kullan
+    ayarlar['dtype'] = {c: sema['dtype'].get(c, 'str') for c in kullan}
+    return ayarlar
+
+
+def rol_eslemesi(sema):
+    """Orijinal sütun adı -> rol adı eşlemesi (DataFrame.rename için)."""
+    return {c: rol for rol, c in sema['sutunlar'].items()}
+
+
+def eksik_roller(sema, gerekli):
+    return [r for r in gerekli if r not in sema['sutunlar']]
@@ -3,12 +3,13 @@ from django.contrib.auth.models import User
 from rest_framework.views import APIView
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import ValidationError
 from django.utils import timezone
+from django.http import StreamingHttpResponse, HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from datetime import datetime, timedelta
-import os
-import glob
-import pandas as pd
-import numpy as np
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from .serializers import UserSerializer
@@ -17,12 +18,31 @@ from .serializers import CustomTokenObtainPairSerializer
 # --- MODELLER VE SERIALIZERS ---
 from .models import (
     Hat, Durak, HatDurak, TalepVerisi, EkSefer,
-    Otobus, HatTarife, HatGuzergah
+    Otobus, HatTarife
 )
 from .serializers import (
     HatSerializer, DurakSerializer, HatDurakSerializer,
     TalepVerisiSerializer, OtobusSerializer
 )
+
+# --- YAPAY ZEKA MODÜLLERİ (ilk tahmin isteğinde yüklenir; model_kaydi) ---
+from .model_kaydi import talep_tahmincisi, sure_tahmincisi, model_istatistikleri
+
+# --- ORTAK YARDIMCILAR ---
+from .tarife_motoru import hat_tarifeleri, tarife_indeksi, gun_tipi_bul, dakika_metni
+from .kapasite_analizi import ag_kapasite_matrisi, hat_kapasite_analizi
+from .veri_damgasi import damgala
+from .talep_sorgulari import talep_sorgusu, talep_ozeti, zaman_parametresi, VARSAYILAN_ARALIK
+
+# --- CANLI KONUM (zamanlayıcı, araç havuzu, fark paketleri, SSE) ---
+from .zamanlayici import son_goruntu, ZAMANLAYICI
+from .arac_havuzu import arac_havuzu
+from .konum_farki import fark_istegi_mi, fark_paketi
+from .canli_yayin import YAYINCI, anlik_goruntu, olay_metni, YENIDEN_BAGLANMA_MS
+
+SONRAKI_SEFER_SINIRI = 50
+
+
 # --- ÖZEL LOGIN VIEW ---
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
@@ -33,147 +53,6 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
-# --- YAPAY ZEKA MODÜLLERİ ---
-try:
-    from .ml_models import demand_predictor, travel_predictor
-except ImportError:
-    demand_predictor = None
-    travel_predictor = None
-    print("UYARI: ML Modülleri yüklenemedi. Tahmin servisleri çalışmayabilir.")
-
-# --- DOSYA YOLLARI ---
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PROJECT_ROOT = os.path.dirname(BASE_DIR)
-VERI_SETI_KLASORU = os.path.join(PROJECT_ROOT, 'veri_seti')
-
-
-# =============================================================================
-# YARDIMCI FONKSİYONLAR
-# =============================================================================
-def normalize_cols(cols):
-    """Sütun isimlerini temizler."""
-    return [
-        str(c).strip().upper()
-            .replace('İ', 'I').replace('Ğ', 'G').replace('Ü', 'U')
-            .replace('Ş', 'S').replace('Ö', 'O').replace('Ç', 'C')
-            .replace(' ', '_').replace('\n', '')
-        for c in cols
-    ]
-
-
-def parse_time_column(val):
-    """
-    Farklı saat formatlarını (06:00, 6, 06.00, 6.0) integer saate çevirir.
-    Hata durumunda -1 döner.
-    """
-    try:
-        s = str(val).strip()
-        if ':' in s:
-            return int(s.split(':')[0])
-        elif '.' in s:  # 06.30 veya 6.0 formatı için
-            return int(s.split('.')[0])
-        else:
-            return int(float(s))  # "6" veya "6.0" gelebilir
-    except:
-        return -1
-
-
-def get_elkart_data(hat_no):
-    """
-    Elkart verilerini tüm dosyalardan okur, birleştirir ve temizler.
-    Hataları gizlemez, konsola yazar.
-    """
-    if not os.path.exists(VERI_SETI_KLASORU):
-        return pd.DataFrame()
-
-    dosyalar = glob.glob(os.path.join(VERI_SETI_KLASORU, "elkart*.csv"))
-    if not dosyalar:
-        return pd.DataFrame()
-
-    # Dosyaları tarihe göre sırala
-    dosyalar.sort(reverse=True)
-    df_list = []
-
-    # Hat numarası "4-A" gibi string gelebilir, int() zorlaması patlatır.
-    hat_no_str = str(hat_no).strip()
-
-    print(f"Hat {hat_no} için {len(dosyalar)} adet Elkart dosyası taranıyor...")
-
-    for dosya in dosyalar:
-        try:
-            with open(dosya, 'r', encoding='utf-8', errors='ignore') as f:
-                ilk_satir = f.readline()
-                ayirici = ';' if ';' in ilk_satir else ','
-
-            iter_csv = pd.read_csv(dosya, sep=ayirici, chunksize=50000,
-                                   encoding='utf-8', on_bad_lines='skip', low_memory=False)
-
-            for chunk in iter_csv:
-                chunk.columns = normalize_cols(chunk.columns)
-                hat_col = next((c for c in chunk.columns if 'HAT' in c and 'NO' in c), None)
-                yolcu_col = next((c for c in chunk.columns if 'BINIS' in c or 'SAYI' in c or 'YOLCU' in c), None)
-                saat_col = next((c for c in chunk.columns if 'SAAT' in c), None)
-
-                if hat_col and yolcu_col and saat_col:
-                    # Hat numarasını stringe çevirip karşılaştır
-                    chunk[hat_col] = chunk[hat_col].astype(str).str.strip()
-                    filtered = chunk[chunk[hat_col] == hat_no_str].copy()
-
-                    if not filtered.empty:
-                        filtered = filtered.rename(columns={yolcu_col: 'yolcu', saat_col: 'saat'})
-                        filtered['yolcu'] = pd.to_numeric(filtered['yolcu'], errors='coerce').fillna(1)
-                        df_list.append(filtered[['yolcu', 'saat']])
-        except Exception as e:
-            continue
-
-    if not df_list:
-        return pd.DataFrame()
-
-    return pd.concat(df_list, ignore_index=True)
-
-
-def get_tarife_dataframe():
-    """
-    Tarife dosyasını bulur ve okur (CSV veya Excel).
-    Hatalı satırları atlar ve ayırıcıyı otomatik çözer.
-    """
-    if not os.path.exists(VERI_SETI_KLASORU):
-        return None
-
-    tum_dosyalar = os.listdir(VERI_SETI_KLASORU)
-    yasakli_kelimeler = ['elkart', 'durak', 'guzergah', 'hatbilgisi', 'varis']
-
-    adaylar = [
-        f for f in tum_dosyalar
-        if (f.endswith('.csv') or f.endswith('.xlsx'))
-           and not any(y in f.lower() for y in yasakli_kelimeler)
-    ]
-    adaylar.sort(key=lambda x: 'tarife' not in x.lower())
-
-    for aday in adaylar:
-        tam_yol = os.path.join(VERI_SETI_KLASORU, aday)
-        try:
-            if aday.endswith('.xlsx'):
-                df = pd.read_excel(tam_yol)
-            else:
-                try:
-                    df = pd.read_csv(tam_yol, sep=';', on_bad_lines='skip', engine='python', encoding='utf-8')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(tam_yol, sep=';', on_bad_lines='skip', engine='python', encoding='cp1254')
-                except:
-                    df = pd.read_csv(tam_yol, sep=None, on_bad_lines='skip', engine='python', encoding='utf-8')
-
-            df.columns = normalize_cols(df.columns)
-            col_str = " ".join(df.columns)
-
-            if 'HAT' in col_str and 'SAAT' in col_str:
-                return df
-        except Exception as e:
-            print(f"Dosya okuma hatası ({aday}): {e}")
-            continue
-    return None
-
-
 # =============================================================================
 # 1. HAT VIEWSET (Harita ve Yönetim İçin)
 # =============================================================================
@@ -185,6 +64,19 @@ class HatViewSet(viewsets.ModelViewSet):
     queryset = Hat.objects.all()
     serializer_class = HatSerializer
 
+    # Hat için model sinyali yok (toplu silmeler hızlı kalsın); önbellekler damgayla yenilenir
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        damgala('tarife')
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        damgala('tarife')
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        damgala('tarife', 'guzergah', 'durak', 'varis')  # Silme rota / durak / varış kayıtlarına yayılır
+
     # ---------------------------------------------------------
     # 1. HARİTA: ROTA ÇİZGİSİ
     # ---------------------------------------------------------
@@ -220,32 +112,12 @@ class HatViewSet(viewsets.ModelViewSet):
         hat_no = str(hat.ana_hat_no).strip()
         liste = []
 
-        # A) Dosyadan Normal Tarifeyi Çek
+        # A) Bugünün Normal Seferlerini Çek (HatTarife, indeksli sorgu)
         try:
-            df = get_tarife_dataframe()
-            if df is not None:
-                hat_col = next((c for c in df.columns if 'HAT' in c and 'NO' in c), None)
-                if hat_col:
-                    df['hat_str'] = df[hat_col].astype(str).str.split('.').str[0].str.strip()
-                    df_hat = df[df['hat_str'] == hat_no].copy()
-
-                    bugun = datetime.today().weekday()
-                    gun_kodu = 'P' if bugun == 6 else ('C' if bugun == 5 else 'H')
-
-                    zaman_col = next((c for c in df.columns if 'ZAMAN' in c or 'GUN' in c), None)
-                    if zaman_col:
-                        df_hat = df_hat[df_hat[zaman_col].astype(str).str.upper().str.contains(gun_kodu, na=False)]
-
-                    saat_col = next((c for c in df_hat.columns if 'SAAT' in c), None)
-                    if saat_col:
-                        df_hat['saat_temiz'] = df_hat[saat_col].astype(str).apply(lambda x: x.split(' ')[-1][:5])
-                        df_hat = df_hat.sort_values('saat_temiz')
-
-                        for _, row in df_hat.iterrows():
-                            saat_val = row['saat_temiz']
-                            if saat_val == 'nan' or not saat_val: continue
-                            liste.append({'id': None, 'saat': saat_val, 'tip': 'Planlı', 'alt_hat': str(hat_no),
-                                          'durum': 'Normal'})
+            gun_kodu = gun_tipi_bul(datetime.today())
+            for saat in hat_tarifeleri(hat_no, gun_kodu).values_list('kalkis_saati', flat=True):
+                liste.append({'id': None, 'saat': saat.strftime('%H:%M'), 'tip': 'Planlı', 'alt_hat': str(hat_no),
+                              'durum': 'Normal'})
         except Exception as e:
             print(f"Tarife okuma hatası: {e}")
 
@@ -268,6 +140,66 @@ class HatViewSet(viewsets.ModelViewSet):
         # --- HATA ÇÖZÜMÜ: BU SATIR EKSİKTİ ---
         return Response(liste)
 
+    # ---------------------------------------------------------
+    # 3b. YOLCU EKRANLARI: SONRAKİ SEFERLER
+    # ---------------------------------------------------------
+    @action(detail=True, methods=['get'], url_path='sonraki-seferler')
+    def sonraki_seferler(self, request, pk=None):
+        """
+        ?n=5&from=HH:MM&alt_hat=0 -> verilen saatten (varsayılan: şimdi) sonraki n
+        kalkış; alt_hat verilmezse ana hattın bütün alt hatları birleşik döner.
+        Bellekteki sıralı sefer dizilerinden ikili arama ile cevaplanır; istek
+        başına veritabanı sorgusu yapılmaz.
+        """
+        indeks = tarife_indeksi()
+        try:
+            ana_hat_no = indeks.hat_ana.get(int(pk))
+        except (TypeError, ValueError):
+            ana_hat_no = None
+        if ana_hat_no is None:
+            return Response({"error": "Hat bulunamadı"}, status=404)
+
+        try:
+            n = max(1, min(int(request.GET.get('n', 5)), SONRAKI_SEFER_SINIRI))
+        except ValueError:
+            return Response({"error": "n bir sayı olmalı"}, status=400)
+
+        simdi = datetime.now()
+        bas = request.GET.get('from')
+        if bas:
+            try:
+                saat, dakika = (int(p) for p in bas.split(':'))
+                if not (0 <= saat <= 23 and 0 <= dakika <= 59): raise ValueError
+            except ValueError:
+                return Response({"error": "from HH:MM formatında olmalı"}, status=400)
+        else:
+            saat, dakika = simdi.hour, simdi.minute
+        bas_dk = saat * 60 + dakika
+
+        gun_kodu = gun_tipi_bul(simdi)
+        yarin_kodu = gun_tipi_bul(simdi + timedelta(days=1))
+        seferler = indeks.sonraki_seferler(ana_hat_no, bas_dk, n, gun_kodu, yarin_kodu,
+                                            alt_hat=request.GET.get('alt_hat') or None)
+
+        return Response([
+            {
+                'saat': dakika_metni(dk),
+                'tip': 'Ek Sefer' if ek_mi else 'Planlı',
+                'kalan_dk': dk + gun_farki * 1440 - bas_dk,
+                'yarin': bool(gun_farki),
+            }
+            for dk, ek_mi, gun_farki in seferler
+        ])
+
+    # ---------------------------------------------------------
+    # 3c. YÖNETİM: HATTIN ARAÇ HAVUZU (Ek sefer için araç seçimi)
+    # ---------------------------------------------------------
+    @action(detail=True, methods=['get'])
+    def araclar(self, request, pk=None):
+        """DurakVaris'te bu hatta görülen araçlar (sefer sayısı, son görülme), en aktif önce."""
+        hat = self.get_object()
+        return Response(arac_havuzu().hat_kayitlari(hat.ana_hat_no))
+
     # ---------------------------------------------------------
     # 4. YÖNETİM: EK SEFER OLUŞTURMA
     # ---------------------------------------------------------
@@ -325,98 +257,96 @@ class DurakViewSet(viewsets.ModelViewSet):
     serializer_class = DurakSerializer
 
 
+class TalepSayfalama(CursorPagination):
+    """
+    Ham biniş satırları için keyset (imleç) sayfalama: sayfalar OFFSET yerine
+    son görülen (tarih_saat, id) değerinden devam eder; (hat, tarih_saat)
+    indeksiyle derin sayfalar da sabit maliyetlidir.
+    """
+    ordering = ('-tarih_saat', '-id')
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+
+
 class TalepVerisiViewSet(viewsets.ModelViewSet):
+    """
+    Ham satırlar: /api/talep-verisi/?hat=<id>&hat_no=<ana hat>&baslangic=..&bitis=..
+    (imleçli sayfalama). Zaman kovalı toplamlar için: /api/talep-verisi/ozet/
+    """
     queryset = TalepVerisi.objects.all()
     serializer_class = TalepVerisiSerializer
+    pagination_class = TalepSayfalama
+
+    def _filtreler(self):
+        p = self.request.query_params
+        return {
+            'hat_id': p.get('hat') or None,
+            'hat_no': p.get('hat_no') or None,
+            'baslangic': zaman_parametresi(p.get('baslangic')),
+            'bitis': zaman_parametresi(p.get('bitis'), gun_sonu=True),
+        }
+
+    def get_queryset(self):
+        if self.action != 'list':
+            return super().get_queryset()
+        try:
+            return talep_sorgusu(**self._filtreler())
+        except ValueError as e:
+            raise ValidationError({"error": str(e)})
+
+    # ---------------------------------------------------------
+    # ZAMAN KOVALI TOPLAMLAR (yerel saatle, talep_sorgulari)
+    # ---------------------------------------------------------
+    @action(detail=False, methods=['get'])
+    def ozet(self, request):
+        """
+        ?aralik=saat|gun|hafta|saat_profili (varsayılan gun), ?hatlara_gore=1
+        ve ham satırlarla aynı filtreler (hat, hat_no, baslangic, bitis).
+        """
+        aralik = request.query_params.get('aralik', VARSAYILAN_ARALIK)
+        hatlara_gore = request.query_params.get('hatlara_gore') in ('1', 'true')
+        try:
+            sonuc = talep_ozeti(aralik, hatlara_gore, **self._filtreler())
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({"aralik": aralik, "sonuc": sonuc})
 
 
 # =============================================================================
 # 3. KAPASİTE VE İZDİHAM ANALİZİ (HatYonetimi.jsx Tablosu İçin)
 # =============================================================================
 class CapacityAnalysisView(APIView):
+    """Hattın saatlik kapasite analizi; sonuç (hat, periyot) başına önbellekli (kapasite_analizi)."""
+
     def get(self, request, hat_no):
         try:
             hat_no = str(hat_no).strip()
             period = request.query_params.get('period', 'daily')
-            OTOBUS_KAPASITESI = 80
-
-            # Periyot Çarpanı
-            carpan = 0.5
-            if period == 'weekly': carpan = 7
-            elif period == 'monthly': carpan = 30
-            elif period == 'yearly': carpan = 365
-
-            # 1. ARZ - PLANLI (CSV)
-            sefer_sayilari = {}
-            df_tarife = get_tarife_dataframe()
-            if df_tarife is not None:
-                hat_col = next((c for c in df_tarife.columns if 'HAT' in c and 'NO' in c), None)
-                saat_col = next((c for c in df_tarife.columns if 'SAAT' in c), None)
-                if hat_col and saat_col:
-                    df_tarife['hat_str'] = df_tarife[hat_col].astype(str).str.split('.').str[0].str.strip()
-                    df_hat = df_tarife[df_tarife['hat_str'] == hat_no].copy()
-                    df_hat['saat'] = df_hat[saat_col].apply(parse_time_column)
-                    sefer_sayilari = df_hat[df_hat['saat'] >= 0].groupby('saat').size().to_dict()
-
-            # --- EKLENEN KISIM: EK SEFERLERİ DE SAY (DB) ---
-            try:
-                # Veritabanında bu numaraya sahip hattı bul
-                hat_obj = Hat.objects.filter(ana_hat_no=hat_no).first()
-                if hat_obj:
-                    ek_seferler = EkSefer.objects.filter(hat=hat_obj, aktif=True)
-                    for ek in ek_seferler:
-                        s = ek.kalkis_saati.hour
-                        # Planlı seferlerin üzerine ekle
-                        sefer_sayilari[s] = sefer_sayilari.get(s, 0) + 1
-            except Exception as e:
-                print(f"Ek sefer hatası: {e}")
-            # ------------------------------------------------
-
-            # 2. TALEP (Elkart)
-            df_elkart = get_elkart_data(hat_no)
-            talep_ort = {}
-            if not df_elkart.empty:
-                df_elkart['saat'] = df_elkart['saat'].apply(parse_time_column)
-                valid = df_elkart[(df_elkart['saat'] >= 0) & (df_elkart['saat'] <= 23)]
-                talep_ort = (valid.groupby('saat')['yolcu'].sum() / 365).to_dict()
-
-            # 3. BİRLEŞTİRME
-            sonuc = []
-            for saat in range(6, 24):
-                gunluk_sefer = sefer_sayilari.get(saat, 0)
-                gunluk_yolcu = talep_ort.get(saat, 0)
-
-                # Çarpan Uygula
-                toplam_sefer = int(gunluk_sefer * carpan)
-                toplam_yolcu = int(round(gunluk_yolcu * carpan))
-                kapasite = toplam_sefer * OTOBUS_KAPASITESI
-
-                doluluk = 0
-                if kapasite > 0:
-                    doluluk = round((toplam_yolcu / kapasite) * 100)
-                elif toplam_yolcu > 0:
-                    doluluk = 100
-
-                sonuc.append({
-                    "saat": f"{saat:02d}:00",
-                    "ortalama_yolcu": toplam_yolcu,
-                    "sefer_sayisi": toplam_sefer,
-                    "kapasite": kapasite,
-                    "doluluk_yuzdesi": doluluk
-                })
-
-            return Response({"hat_no": hat_no, "analiz": sonuc})
+            return Response({"hat_no": hat_no, "analiz": hat_kapasite_analizi(hat_no, period)})
 
         except Exception as e:
             print(f"Kapasite Hatası: {e}")
             return Response({"hat_no": hat_no, "analiz": []})
 
 
+class AgKapasiteView(APIView):
+    """Tüm ağın saat x hat doluluk matrisi (tek geçişte hesaplanır, periyot başına önbellekli)."""
+
+    def get(self, request):
+        try:
+            return Response(ag_kapasite_matrisi(request.query_params.get('period', 'daily')).sozluk())
+        except Exception as e:
+            print(f"Ağ Kapasite Hatası: {e}")
+            return Response({"error": str(e)}, status=500)
+
+
 # =============================================================================
 # 4. YAPAY ZEKA TAHMİN VIEW'LARI
 # =============================================================================
 class PredictDemandView(APIView):
     def get(self, request, hat_no):
+        demand_predictor = talep_tahmincisi()
         if not demand_predictor:
             return Response({"error": "ML Modülü Yok veya Yüklenemedi"}, status=500)
 
@@ -452,6 +382,7 @@ class PredictDemandView(APIView):
 
 class PredictTravelTimeView(APIView):
     def get(self, request):
+        travel_predictor = sure_tahmincisi()
         if not travel_predictor: return Response({"error": "ML Modülü Yok"}, status=500)
 
         hat_no = request.query_params.get('hat_no')
@@ -471,12 +402,18 @@ class PredictTravelTimeView(APIView):
                 "baslangic": durak_a, "bitis": durak_b,
                 "tahmini_sure_sn": sure,
                 "tahmini_sure_dk": round(sure / 60, 1),
-                "model": "Hybrid (XGBoost + LSTM)"
+                "model": "XGBoost"
             })
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
+@api_view(['GET'])
+def ml_durum(request):
+    """Model kaydı durumu: yüklü tahminciler, Prophet önbelleği (yükleme / atma / isabet)."""
+    return Response(model_istatistikleri())
+
+
 # =============================================================================
 # 5. GERÇEK ZAMANLI ARAÇ TAKİBİ (HARİTA İÇİN)
 # =============================================================================
@@ -484,98 +421,67 @@ class PredictTravelTimeView(APIView):
 def aktif_otobusler(request):
     """
     Tarifeye göre araçları yürütür ve bir sonraki durağın GERÇEK İSMİNİ hesaplar.
+    Konumlar tick zamanlayıcısının yayınladığı son ağ görüntüsünden (zamanlayici)
+    tek hat için okunur; istek sırasında hesap yapılmaz.
+    ?fark=1 ile son alınan sıraya göre sadece değişen araçlar döner (konum_farki).
     """
     hat_id = request.GET.get('hat_id')
     if not hat_id: return Response([])
 
     try:
-        # 1. Hat, Rota ve Durak Bilgilerini Çek
-        hat_obj = Hat.objects.get(id=hat_id)
-        hat_no = str(hat_obj.ana_hat_no).strip()
-
-        # Rota Noktaları
-        rota_noktalari = list(HatGuzergah.objects.filter(hat=hat_obj).order_by('sira').values_list('enlem', 'boylam'))
+        hat_id = int(hat_id)
+        goruntu = son_goruntu()
+        if fark_istegi_mi(request):
+            return Response(fark_paketi(request, ('hat', hat_id), goruntu.hat(hat_id), kaynak=goruntu.sira))
+        # Görüntünün JSON metni hat başına bir kez kodlanır
+        return HttpResponse(goruntu.json(hat_id), content_type='application/json')
+    except Exception as e:
+        print(f"Aktif araç hatası: {e}")
+        return Response([])
 
-        # Durak Listesi
-        duraklar = list(HatDurak.objects.filter(hat=hat_obj).order_by('sira').select_related('durak'))
-        toplam_durak_sayisi = len(duraklar)
 
-        if not rota_noktalari: return Response([])
+@api_view(['GET'])
+def ag_anlik(request):
+    """
+    Kontrol odası için TÜM hatlardaki yoldaki araçların anlık görüntüsü.
+    Tick zamanlayıcısının son görüntüsünü döner; her araç kaydında hat_id bulunur.
+    ?fark=1 ile sadece değişen araçlar sabit noktalı koordinatlarla döner.
+    """
+    try:
+        goruntu = son_goruntu()
+        zaman = goruntu.zaman.isoformat(timespec='seconds')
+        if fark_istegi_mi(request):
+            return Response({"zaman": zaman, **fark_paketi(request, ('ag',), goruntu.araclar, kaynak=goruntu.sira)})
+        return Response({"zaman": zaman, "arac_sayisi": len(goruntu.araclar), "araclar": goruntu.araclar,
+                         "zamanlayici": ZAMANLAYICI.durum()})
+    except Exception as e:
+        print(f"Ağ anlık görüntü hatası: {e}")
+        return Response({"error": str(e)}, status=500)
 
-        toplam_nokta_sayisi = len(rota_noktalari)
-        SEFER_SURESI_DK = 60
-        SEFER_SURESI_SN = SEFER_SURESI_DK * 60
-        simdi = datetime.now()
-        aktif_araclar = []
-
-        # 2. Sefer Listesini Oluştur (CSV + DB)
-        sefer_listesi = []
-
-        # A) CSV Tarife
-        df = get_tarife_dataframe()
-        if df is not None:
-            hat_col = next((c for c in df.columns if 'HAT' in c and 'NO' in c), None)
-            if hat_col:
-                df['hat_str'] = df[hat_col].astype(str).str.split('.').str[0].str.strip()
-                df_hat = df[df['hat_str'] == hat_no].copy()
-                saat_col = next((c for c in df_hat.columns if 'SAAT' in c), None)
-                if saat_col:
-                    bugun = simdi.date()
-                    for val in df_hat[saat_col].values:
-                        try:
-                            s_str = str(val).split(' ')[-1][:5]
-                            h, m = map(int, s_str.split(':'))
-                            kalkis = datetime.combine(bugun, datetime.min.time().replace(hour=h, minute=m))
-                            sefer_listesi.append(
-                                {'zaman': kalkis, 'tip': 'normal', 'kod': f"{hat_no}-{s_str}", 'arac': hat_no})
-                        except:
-                            pass
-
-        # B) Ek Seferler
-        ek_seferler = EkSefer.objects.filter(hat=hat_obj, aktif=True)
-        for ek in ek_seferler:
-            kalkis = datetime.combine(simdi.date(), ek.kalkis_saati)
-            sefer_listesi.append({'zaman': kalkis, 'tip': 'ek', 'kod': f"EK-{ek.arac_no}", 'arac': ek.arac_no})
-
-        # 3. Konum ve Hedef Durak Hesapla
-        for i, sefer in enumerate(sefer_listesi):
-            gecen_sn = (simdi - sefer['zaman']).total_seconds()
-
-            # Araç yolda mı?
-            if 0 <= gecen_sn <= SEFER_SURESI_SN:
-                oran = gecen_sn / SEFER_SURESI_SN
-
-                # Koordinat Hesabı
-                idx = int(toplam_nokta_sayisi * oran)
-                if idx >= toplam_nokta_sayisi: idx = toplam_nokta_sayisi - 1
-                lat, lng = rota_noktalari[idx]
-
-                # Hedef Durak Hesabı
-                hedef_isim = "Bilinmiyor"
-                if toplam_durak_sayisi > 0:
-                    durak_idx = int(toplam_durak_sayisi * oran)
-                    if durak_idx < toplam_durak_sayisi - 1: durak_idx += 1
-                    if durak_idx >= toplam_durak_sayisi: durak_idx = toplam_durak_sayisi - 1
-                    hedef_isim = duraklar[durak_idx].durak.durak_adi
-
-                kalan_dk = int((SEFER_SURESI_SN - gecen_sn) / 60)
-
-                # FIX: ID'nin sonuna sıra numarasını ekliyoruz (Örn: '2-23:00_154')
-                unique_id = f"{sefer['kod']}_{i}"
-
-                aktif_araclar.append({
-                    "id": unique_id,
-                    "arac_no": sefer['arac'],
-                    "enlem": lat, "boylam": lng,
-                    "durum": 'kritik' if sefer['tip'] == 'ek' else 'normal',
-                    "kalan_sure_dk": kalan_dk,
-                    "hedef_durak": hedef_isim
-                })
 
-        return Response(aktif_araclar)
-    except Exception as e:
-        print(f"Aktif araç hatası: {e}")
-        return Response([])
+async def konum_akisi(request):
+    """
+    Araç konumlarının canlı yayını (Server-Sent Events).
+    ?hat_id=.. verilirse o hat, verilmezse tüm ağ yayınlanır. Görüntü her tick'te
+    anahtar başına bir kez hesaplanıp tüm abonelere dağıtılır (canli_yayin).
+    """
+    hat_id = request.GET.get('hat_id')
+    try:
+        anahtar = int(hat_id) if hat_id else None
+    except ValueError:
+        return HttpResponse(status=400)
+
+    if isinstance(request, ASGIRequest):
+        icerik = YAYINCI.akis(anahtar)
+    else:
+        # WSGI altında uzun bağlantı tutulmaz: tek görüntü + yeniden bağlanma süresi
+        veri = await sync_to_async(anlik_goruntu)(anahtar)
+        icerik = [f"retry: {YENIDEN_BAGLANMA_MS}\n\n", olay_metni(veri)]
+
+    cevap = StreamingHttpResponse(icerik, content_type='text/event-stream')
+    cevap['Cache-Control'] = 'no-cache'
+    cevap['X-Accel-Buffering'] = 'no'  # nginx arabelleğe almasın
+    return cevap
 
 
 class DetayliAnalizView(APIView):
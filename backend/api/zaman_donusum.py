@@ -0,0 +1,93 @@
+"""
+Vektörel saat / tarih dönüşümleri.
+
+parse_time_column gibi satır satır çalışan Python fonksiyonlarının yerine
+pandas string ve NumPy işlemleriyle tüm sütunu tek seferde dönüştürür.
+Sonuçlar satır bazlı fonksiyonlarla birebir aynıdır (bkz. zaman_benchmark).
+"""
+import numpy as np
+import pandas as pd
+
+# Tarih kısmı için denenecek açık formatlar (en sık görülen başta)
+TARIH_FORMATLARI = ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%Y.%m.%d']
+
+
+def _tekil_uzerinden(seri, islev):
+    """
+    Sütunu tekil değerlerine ayırır (pd.factorize), dönüşümü sadece tekil
+    değerlere uygular ve sonucu kodlar üzerinden geri yayar. Saat/tarih
+    sütunlarında tekil değer sayısı satır sayısından çok küçük olduğundan
+    maliyet satır başına bir hash işlemine iner.
+    """
+    seri = pd.Series(seri)
+    kodlar, tekiller = pd.factorize(seri, use_na_sentinel=False)
+    donusen = np.asarray(islev(pd.Series(tekiller)))
+    return pd.Series(donusen[kodlar], index=seri.index)
+
+
+def _saat_tekil(seri):
+    if pd.api.types.is_numeric_dtype(seri):
+        sayi = seri.astype(float)
+        gecerli = np.isfinite(sayi)
+        return np.where(gecerli, np.trunc(sayi.where(gecerli, 0)), -1).astype(int)
+
+    s = seri.astype(str).str.strip()
+    iki_nokta = s.str.contains(':', regex=False, na=False)
+    nokta = ~iki_nokta & s.str.contains('.', regex=False, na=False)
+
+    bas = s.where(~iki_nokta, s.str.split(':', n=1).str[0])
+    bas = bas.where(~nokta, bas.str.split('.', n=1).str[0]).str.strip()
+
+    sayi = pd.to_numeric(bas, errors='coerce')
+    # ':' veya '.' içeren değerlerde baş kısım tam sayı olmalı (int()),
+    # diğerlerinde ondalıklı sayı kabul edilir (int(float())).
+    tam_sayi = bas.str.fullmatch(r'[+-]?\d+').fillna(False).astype(bool)
+    gecerli = sayi.notna() & np.isfinite(sayi.fillna(0)) & (tam_sayi | ~(iki_nokta | nokta))
+    return np.where(gecerli, np.trunc(sayi.where(gecerli, 0)), -1).astype(int)
+
+
+def saat_vektor(seri):
+    """
+    Farklı saat formatlarını (06:00, 6, 06.30, 6.0) integer saate çevirir.
+    parse_time_column'ın vektörel karşılığıdır; geçersiz değerler -1 olur.
+    """
+    return _tekil_uzerinden(seri, _saat_tekil).astype(int)
+
+
+def _dakika_tekil(seri):
+    # İlk 'HH:MM' parçası alınır: '2024-01-01 06:35:00', '06:35', '07:30  *' (tarife notu),
+    # elle girilmiş '08.00' / '16,45' ve sadece saat içeren '21' gibi
+    parcalar = seri.astype(str).str.extract(r'(?:^|\s)(\d{1,2})(?:[:.,](\d{2})|\s*$)')
+    saat = pd.to_numeric(parcalar[0], errors='coerce')
+    dakika = pd.to_numeric(parcalar[1], errors='coerce').where(parcalar[0].isna() | parcalar[1].notna(), 0)
+    toplam = saat * 60 + dakika
+    gecerli = toplam.notna() & (saat <= 23) & (dakika <= 59)
+    return np.where(gecerli, toplam.fillna(-1), -1).astype(int)
+
+
+def dakika_vektor(seri):
+    """'HH:MM' (veya tarih + saat, 'HH.MM', 'HH') değerlerini gece yarısından itibaren dakikaya çevirir; geçersizler -1."""
+    return _tekil_uzerinden(seri, _dakika_tekil).astype(int)
+
+
+def _tarih_tekil(s, formatlar):
+    s = s.astype(str).str.strip().str.split(' ').str[0]
+    sonuc = pd.Series(pd.NaT, index=s.index, dtype='datetime64[ns]')
+    kalan = s.notna()
+    for fmt in formatlar:
+        if not kalan.any():
+            break
+        sonuc.loc[kalan] = pd.to_datetime(s[kalan], format=fmt, errors='coerce')
+        kalan = sonuc.isna() & s.notna()
+    return sonuc.values
+
+
+def tarih_vektor(seri, formatlar=TARIH_FORMATLARI):
+    """
+    Tarih sütununu açık formatlarla (format tahmini yapmadan) gün hassasiyetinde çözer.
+    Değerin saat kısmı varsa atılır. Her format sadece henüz çözülemeyen tekil değerlere uygulanır.
+    """
+    s = pd.Series(seri)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.dt.floor('D')
+    return _tekil_uzerinden(s, lambda t: _tarih_tekil(t, formatlar))
@@ -0,0 +1,146 @@
+"""
+Simülasyon tick zamanlayıcısı.
+
+Arka planda çalışan tek bir iş parçacığı, her TICK_ARALIGI saniyede ağ
+genelindeki araç konumlarını (konum_motoru) BİR KEZ hesaplar ve değişmez bir
+AgGoruntusu olarak yayınlar. İstek işleyicileri hesap yapmaz; sadece son
+görüntüyü okur / serileştirir. Böylece istek gecikmesi tick başına yapılan
+simülasyon işinden ve eşzamanlı istemci sayısından bağımsız olur.
+
+Aralık settings.SIMULASYON_TICK_SANIYE ile ayarlanır (varsayılan 2 sn).
+Zamanlayıcı ilk erişimde başlatılır (migrate gibi yönetim komutlarında
+gereksiz iş parçacığı açılmasın). Görüntü bayatlarsa (iş parçacığı durmuş,
+hesap çok uzun sürmüş) okuyucu görüntüyü kendisi hesaplar; hesaplar tek bir
+kilit arkasında sıralanır, bekleyen okuyucular hesabı tekrarlamaz, yeni
+görüntüyü alır.
+"""
+import json
+import time
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .konum_motoru import ag_durumu
+
+TICK_ARALIGI = float(getattr(settings, 'SIMULASYON_TICK_SANIYE', 2.0))
+BAYATLIK_CARPANI = 3  # Bu kadar tick boyunca yenilenmeyen görüntü bayat sayılır
+
+
+class AgGoruntusu:
+    """Tek tick'in değişmez ağ görüntüsü; hat bazlı listeler ve JSON metinleri önbellekli."""
+
+    __slots__ = ('sira', 'zaman', 'araclar', 'hatlar', 'olusturma', '_json')
+
+    def __init__(self, sira, zaman, araclar):
+        self.sira = sira
+        self.zaman = zaman
+        self.araclar = araclar
+        self.hatlar = {}
+        for arac in araclar:
+            self.hatlar.setdefault(arac['hat_id'], []).append(arac)
+        self.olusturma = time.monotonic()
+        self._json = {}
+
+    def hat(self, hat_id=None):
+        """Tüm ağın (hat_id=None) ya da tek hattın araç listesi."""
+        if hat_id is None:
+            return self.araclar
+        return self.hatlar.get(int(hat_id), [])
+
+    def json(self, hat_id=None):
+        """Araç listesinin JSON metni; anahtar başına bir kez kodlanır."""
+        anahtar = None if hat_id is None else int(hat_id)
+        metin = self._json.get(anahtar)
+        if metin is None:
+            metin = self._json.setdefault(anahtar, json.dumps(self.hat(anahtar), ensure_ascii=False))
+        return metin
+
+    def yas(self):
+        return time.monotonic() - self.olusturma
+
+
+class TickZamanlayici:
+    """Ağ görüntüsünü periyodik olarak hesaplayıp yayınlayan arka plan iş parçacığı."""
+
+    def __init__(self, aralik=TICK_ARALIGI):
+        self.aralik = aralik
+        self.goruntu = None
+        self.sira = 0
+        self.tick_suresi = 0.0
+        self._is_parcacigi = None
+        self._durdur = threading.Event()
+        self._kilit = threading.Lock()
+        self._hesap_kilidi = threading.Lock()  # Aynı anda tek ağ hesabı (tick ya da okuyucu)
+
+    def hesapla(self, simdi=None):
+        """Yeni görüntüyü hesaplar ve yayınlar (atomik referans değişimi)."""
+        with self._hesap_kilidi:
+            return self._hesapla(simdi)
+
+    def _hesapla(self, simdi=None):
+        bas = time.perf_counter()
+        simdi = simdi or datetime.now()
+        araclar = ag_durumu().anlik(simdi)
+        with self._kilit:
+            self.sira += 1
+            goruntu = AgGoruntusu(self.sira, simdi, araclar)
+            self.goruntu = goruntu
+        self.tick_suresi = time.perf_counter() - bas
+        return goruntu
+
+    def _bayat_mi(self, goruntu):
+        return goruntu is None or goruntu.yas() > self.aralik * BAYATLIK_CARPANI
+
+    def _dongu(self):
+        while not self._durdur.is_set():
+            try:
+                close_old_connections()
+                self.hesapla()
+            except Exception as e:
+                print(f"[TICK] Görüntü hesaplanamadı: {e}")
+            self._durdur.wait(self.aralik)
+
+    def calisiyor_mu(self):
+        return self._is_parcacigi is not None and self._is_parcacigi.is_alive()
+
+    def baslat(self):
+        with self._kilit:
+            if self.calisiyor_mu():
+                return
+            self._durdur.clear()
+            self._is_parcacigi = threading.Thread(target=self._dongu, name='simulasyon-tick', daemon=True)
+            self._is_parcacigi.start()
+            print(f"[TICK] Zamanlayıcı başladı ({self.aralik} sn)")
+
+    def durdur(self):
+        self._durdur.set()
+
+    def son_goruntu(self):
+        """Yayınlanan son görüntü; yoksa ya da bayatsa burada hesaplanır."""
+        self.baslat()
+        goruntu = self.goruntu
+        if self._bayat_mi(goruntu):
+            with self._hesap_kilidi:
+                # Kilidi beklerken tick (ya da başka bir okuyucu) yenilemiş olabilir
+                goruntu = self.goruntu
+                if self._bayat_mi(goruntu):
+                    goruntu = self._hesapla()
+        return goruntu
+
+    def durum(self):
+        goruntu = self.goruntu
+        return {
+            'calisiyor': self.calisiyor_mu(), 'aralik': self.aralik, 'sira': self.sira,
+            'tick_suresi_ms': round(self.tick_suresi * 1000, 2),
+            'goruntu_yasi': round(goruntu.yas(), 2) if goruntu else None,
+        }
+
+
+# --- SÜREÇ İÇİ ORTAK ZAMANLAYICI ---
+ZAMANLAYICI = TickZamanlayici()
+
+
+def son_goruntu():
+    return ZAMANLAYICI.son_goruntu()
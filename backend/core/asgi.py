@@ -3,6 +3,11 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Canlı araç yayını (/api/simulasyon/akis/) uzun süreli bağlantı kullandığı için
+bu uygulama bir ASGI sunucusuyla çalıştırılmalıdır, örn:
+
+    uvicorn core.asgi:application --host 0.0.0.0 --port 8000
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -146,4 +146,10 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1), # Test kolaylığı için 1 gün yaptık
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-}
\ No newline at end of file
+}
+# Canlı araç simülasyonu: ağ görüntüsünün yeniden hesaplanma aralığı (saniye)
+SIMULASYON_TICK_SANIYE = 2.0
+# Bellekte tutulan Prophet talep modellerinin toplam boyut sınırı (MB); aşılınca en eski model atılır
+ML_MODEL_BELLEK_MB = 512
+# True: talep modeli eğitim verisi küp yerine sütunsal elkart deposundan akış modunda toplanır (düşük bellek)
+ML_TALEP_AKIS_MODU = False
@@ -131,17 +131,16 @@ const Harita = () => {
         }
     }, [seciliHat]);
 
-    // 4. Canlı Takip (Simülasyon)
+    // 4. Canlı Takip (Simülasyon) - Sunucu konumları her tick'te kendisi gönderir (SSE)
     useEffect(() => {
         if (!seciliHat) return;
-        const fetchBus = () => {
-            axios.get(`http://127.0.0.1:8000/api/simulasyon/aktif-otobusler/?hat_id=${seciliHat}`)
-                .then(res => setOtobusler(res.data || []))
-                .catch(e => console.error(e));
+        const akis = new EventSource(`http://127.0.0.1:8000/api/simulasyon/akis/?hat_id=${seciliHat}`);
+        akis.onmessage = (e) => {
+            try { setOtobusler(JSON.parse(e.data) || []); }
+            catch (err) { console.error(err); }
         };
-        fetchBus();
-        const interval = setInterval(fetchBus, 2000);
-        return () => clearInterval(interval);
+        akis.onerror = (e) => console.error(e); // Tarayıcı 'retry' süresi sonra kendisi yeniden bağlanır
+        return () => akis.close();
     }, [seciliHat]);
 
     // --- FONKSİYONLAR ---